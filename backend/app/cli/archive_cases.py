@@ -0,0 +1,50 @@
+"""
+Move resolved and closed cases that have not been updated for a while into
+the archive collections, together with their reports and the victims linked
+only to archived cases.
+
+Archived records stay readable: single lookups fall through to the archive
+and list and analytics endpoints include it with `include_archived=true`.
+Updating an archived record moves it back. Run this periodically (or submit
+an `archive` job) to keep the active collections and their indexes small.
+
+Usage (from the backend directory):
+    python -m app.cli.archive_cases [--older-than-days N] [--dry-run]
+"""
+import argparse
+import time
+
+from app.core.archive import archive_cases
+from app.core.config import settings
+from app.core.database import mongodb
+from app.core.indexes import ensure_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    mongodb.connect_to_mongodb()
+    try:
+        ensure_indexes()
+        started = time.perf_counter()
+        moved = archive_cases(
+            args.older_than_days,
+            args.batch_size,
+            dry_run=args.dry_run,
+            on_batch=lambda counts: print(f"\r{counts['cases']} cases", end="", flush=True),
+        )
+        verb = "Would archive" if args.dry_run else "Archived"
+        print(
+            f"\r{verb} {moved['cases']} cases, {moved['incident_reports']} reports and "
+            f"{moved['victims']} victims in {time.perf_counter() - started:.1f}s"
+        )
+    finally:
+        mongodb.close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    main()
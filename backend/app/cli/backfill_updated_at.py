@@ -0,0 +1,34 @@
+"""
+Give every case, report and victim an `updated_at` timestamp.
+
+Delta sync reads changes in `updated_at` order, so documents without one are
+never sent to clients. Reports created before `create_report` set the field
+are backfilled from `created_at`.
+
+Usage (from the backend directory):
+    python -m app.cli.backfill_updated_at
+"""
+import argparse
+
+from app.core.database import mongodb
+from app.core.sync import SYNC_ENTITIES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    mongodb.connect_to_mongodb()
+    try:
+        for name, spec in SYNC_ENTITIES.items():
+            result = mongodb.get_collection(spec["collection"]).update_many(
+                {"updated_at": None},
+                [{"$set": {"updated_at": {"$ifNull": ["$created_at", "$$NOW"]}}}],
+            )
+            print(f"{name}: {result.modified_count} documents backfilled")
+    finally:
+        mongodb.close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Export cases, reports and victims to Parquet or Arrow files.
+
+Usage (from the backend directory):
+    python -m app.cli.export cases reports --format parquet --output exports/
+    python -m app.cli.export all --country Syria --start-date 2023-01-01
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+from app.core.database import mongodb
+from app.core.export import DEFAULT_BATCH_SIZE, ENTITIES, build_query, pa, write_arrow_file, write_parquet
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entities", nargs="+", choices=list(ENTITIES) + ["all"])
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--output", default="exports", help="Directory to write files into")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--country")
+    parser.add_argument("--start-date", type=datetime.fromisoformat)
+    parser.add_argument("--end-date", type=datetime.fromisoformat)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if pa is None:
+        sys.exit("pyarrow is required for exports: pip install pyarrow")
+
+    entities = list(ENTITIES) if "all" in args.entities else args.entities
+    os.makedirs(args.output, exist_ok=True)
+    mongodb.connect_to_mongodb()
+    try:
+        for entity in entities:
+            query = build_query(entity, args.country, args.start_date, args.end_date)
+            extension = "parquet" if args.format == "parquet" else "arrows"
+            path = os.path.join(args.output, f"{entity}.{extension}")
+            writer = write_parquet if args.format == "parquet" else write_arrow_file
+
+            started = time.perf_counter()
+            rows = writer(
+                entity, path, query, args.batch_size,
+                on_batch=lambda docs: print(f"\r{entity}: {docs} documents", end="", flush=True),
+            )
+            print(f"\r{entity}: {rows} rows written to {path} in {time.perf_counter() - started:.1f}s")
+    finally:
+        mongodb.close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    main()
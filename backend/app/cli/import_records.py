@@ -0,0 +1,122 @@
+"""
+Import historical cases, reports or victims from CSV, JSON lines, JSON
+array or Excel (.xlsx, needs openpyxl) files.
+
+Rows are streamed from the file, mapped to the create schema by a mapping
+file (see `app.core.importer.load_mapping`) and validated in a process
+pool; valid records get the same server-assigned fields as records created
+through the API and are written with unordered bulk inserts. Example
+mapping:
+
+    {
+      "entity": "cases",
+      "fields": {
+        "case_id": {"column": "CaseNo"},
+        "title": {"column": "Title"},
+        "description": {"column": "Narrative", "default": ""},
+        "violation_types": {"column": "Violations", "split": ";",
+                            "map": {"Torture": "torture"}},
+        "status": {"value": "closed"},
+        "priority": {"column": "Priority", "default": "medium"},
+        "location.country": {"column": "Country"},
+        "location.region": {"column": "Region"},
+        "date_occurred": {"column": "Date", "format": "%d/%m/%Y"},
+        "date_reported": {"column": "Reported", "format": "%d/%m/%Y"}
+      }
+    }
+
+Progress is checkpointed before the first insert and after every batch
+(default `<file>.checkpoint.json`); rerunning the same command resumes after
+the last checkpointed row without inserting anything twice. Rejected rows,
+including malformed JSON rows, are written to `<file>.errors.jsonl` with
+their row number and errors.
+
+Mapping `case_id` keeps the source system's case IDs (a taken one rejects
+the row), so reports and victims imported afterwards can refer to the cases
+through `case_id` and `cases_involved`. Without it cases get new IDs.
+
+Imported cases are not added to the perpetrator graph; run
+`python -m app.cli.rebuild_perpetrator_graph` afterwards.
+
+Usage (from the backend directory):
+    python -m app.cli.import_records FILE --mapping MAPPING.json [--workers N] [--dry-run]
+"""
+import argparse
+import os
+import time
+
+from app.core.database import mongodb
+from app.core.importer import (
+    FORMATS, Checkpoint, CheckpointMismatch, MappingError, detect_format, import_file, load_mapping, openpyxl,
+    source_fingerprint,
+)
+from app.core.indexes import ensure_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file")
+    parser.add_argument("--mapping", required=True)
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--sheet", help="Worksheet of an .xlsx file (default: the active one)")
+    parser.add_argument("--workers", type=int, default=0, help="Validation processes (default: one per CPU core)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--checkpoint", help="Default: FILE.checkpoint.json")
+    parser.add_argument("--errors", help="Default: FILE.errors.jsonl")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and write the error file only")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.file):
+        parser.error(f"{args.file} does not exist")
+    file_format = args.format or detect_format(args.file)
+    if file_format not in FORMATS:
+        parser.error(f"Cannot tell the format of {args.file}; pass --format")
+    if file_format == "xlsx" and openpyxl is None:
+        parser.error("Reading .xlsx files requires openpyxl (pip install openpyxl)")
+    try:
+        mapping = load_mapping(args.mapping)
+    except MappingError as e:
+        parser.error(str(e))
+
+    checkpoint = Checkpoint(args.checkpoint or f"{args.file}.checkpoint.json", source_fingerprint(args.file, mapping))
+    if not args.restart and not args.dry_run:
+        try:
+            if checkpoint.load() and checkpoint.rows:
+                print(f"Resuming after row {checkpoint.rows}")
+        except CheckpointMismatch as e:
+            parser.error(str(e))
+
+    if not args.dry_run:
+        mongodb.connect_to_mongodb()
+    try:
+        if not args.dry_run:
+            ensure_indexes()
+        started = time.perf_counter()
+        counts = import_file(
+            args.file,
+            mapping,
+            file_format,
+            checkpoint,
+            args.errors or f"{args.file}.errors.jsonl",
+            sheet=args.sheet,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+            resume=checkpoint.rows > 0,
+            on_batch=lambda rows, counts: print(
+                f"\r{rows} rows, {counts['inserted']} inserted, {counts['rejected']} rejected", end="", flush=True
+            ),
+        )
+        verb = "Would import" if args.dry_run else "Imported"
+        print(
+            f"\r{verb} {counts['inserted']} {mapping['entity']} in {time.perf_counter() - started:.1f}s; "
+            f"{counts['existing']} already present, {counts['rejected']} rejected"
+        )
+    finally:
+        if not args.dry_run:
+            mongodb.close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    main()
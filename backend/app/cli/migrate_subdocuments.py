@@ -0,0 +1,115 @@
+"""
+Prepare stored records for the sub-document endpoints.
+
+Evidence items of cases and reports get an `evidence_id`, and victims'
+support services a `service_id`, so they can be updated and removed one by
+one. Records created through the API already have them.
+
+With --move-case-evidence, embedded case evidence is moved into the
+`evidence` collection and replaced by `evidence_count`; run it when
+switching to EVIDENCE_STORAGE=collection.
+
+Rewritten records get a new `version` and `updated_at`, so ETags change and
+sync clients receive them. A record whose array changed while being
+migrated is skipped; rerun the command to catch up.
+
+Usage (from the backend directory):
+    python -m app.cli.migrate_subdocuments [--move-case-evidence] [--dry-run]
+"""
+import argparse
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from app.core.archive import ARCHIVES
+from app.core.database import mongodb
+from app.core.ids import new_evidence_id, new_service_id
+from app.core.indexes import ensure_indexes
+from app.core.subdocuments import EVIDENCE, assign_ids
+
+# (collection, array field, id field, id generator)
+ARRAYS = [
+    ("cases", "evidence", "evidence_id", new_evidence_id),
+    ("incident_reports", "evidence", "evidence_id", new_evidence_id),
+    ("victims", "support_services", "service_id", new_service_id),
+]
+
+
+def _flush(collection, operations, dry_run):
+    if operations and not dry_run:
+        collection.bulk_write(operations, ordered=False)
+
+
+def assign_missing_ids(collection_name, field, id_field, new_id, batch_size, dry_run) -> int:
+    collection = mongodb.get_collection(collection_name)
+    query = {field: {"$elemMatch": {id_field: {"$exists": False}}}}
+    updated = 0
+    operations = []
+    for doc in collection.find(query, {field: 1}):
+        original = [dict(item) for item in doc[field]]
+        operations.append(UpdateOne(
+            {"_id": doc["_id"], field: original},  # Skipped if the array changed meanwhile; rerun to catch up
+            {"$set": {field: assign_ids(doc[field], id_field, new_id), "updated_at": datetime.utcnow()}, "$inc": {"version": 1}}
+        ))
+        updated += 1
+        if len(operations) >= batch_size:
+            _flush(collection, operations, dry_run)
+            operations = []
+    _flush(collection, operations, dry_run)
+    return updated
+
+
+def move_case_evidence(collection_name, batch_size, dry_run) -> int:
+    cases = mongodb.get_collection(collection_name)
+    evidence = mongodb.get_collection(EVIDENCE)
+    moved = 0
+    for doc in cases.find({"evidence.0": {"$exists": True}}, {"case_id": 1, "evidence": 1}).batch_size(batch_size):
+        original = [dict(item) for item in doc["evidence"]]
+        items = assign_ids(doc["evidence"], "evidence_id", new_evidence_id)
+        if dry_run:
+            moved += len(items)
+            continue
+        now = datetime.utcnow()
+        evidence.bulk_write([
+            UpdateOne(
+                {"_id": item["evidence_id"]},
+                {"$setOnInsert": {**item, "case_id": doc["case_id"], "created_at": now}},
+                upsert=True,
+            )
+            for item in items
+        ], ordered=False)
+        result = cases.update_one(
+            {"_id": doc["_id"], "evidence": original},
+            {"$set": {"evidence": [], "updated_at": now}, "$inc": {"evidence_count": len(items), "version": 1}}
+        )
+        if result.matched_count:
+            moved += len(items)
+        else:
+            # Evidence was added or changed meanwhile; the case keeps its items and a rerun moves them
+            evidence.delete_many({"_id": {"$in": [item["evidence_id"] for item in items]}, "case_id": doc["case_id"]})
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--move-case-evidence", action="store_true")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    mongodb.connect_to_mongodb()
+    try:
+        for collection_name, field, id_field, new_id in ARRAYS:
+            for name in (collection_name, ARCHIVES[collection_name]):
+                count = assign_missing_ids(name, field, id_field, new_id, args.batch_size, args.dry_run)
+                print(f"{name}: {count} documents with {field} items given IDs")
+        if args.move_case_evidence:
+            ensure_indexes()
+            for name in ("cases", ARCHIVES["cases"]):
+                print(f"{name}: {move_case_evidence(name, args.batch_size, args.dry_run)} evidence items moved")
+    finally:
+        mongodb.close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Convert stored case and incident report coordinates to valid GeoJSON Points.
+
+Reports written before coordinates were normalized may hold free-form
+dictionaries such as {"lat": .., "lng": ..}, and cases created before their
+coordinates were validated may hold empty or out-of-range points. Both would
+stop the 2dsphere indexes from being built or make later writes to the
+record fail. Interpretable values are rewritten as GeoJSON; values that
+cannot be interpreted are moved to `raw_coordinates` next to them for
+manual review.
+
+Usage (from the backend directory):
+    python -m app.cli.normalize_coordinates [--dry-run]
+"""
+import argparse
+
+from pymongo import UpdateOne
+
+from app.core.database import mongodb
+from app.core.geo import geojson_point
+from app.core.indexes import ensure_indexes
+
+# Collection -> location sub-document holding `coordinates`
+LOCATIONS = {
+    "cases": "location",
+    "incident_reports": "incident_details.location",
+}
+
+
+def _get(doc, path):
+    for part in path.split("."):
+        doc = (doc or {}).get(part)
+    return doc
+
+
+def normalize(collection_name: str, location: str, batch_size: int, dry_run: bool):
+    collection = mongodb.get_collection(collection_name)
+    field = f"{location}.coordinates"
+    converted = moved = 0
+    operations = []
+    for doc in collection.find({field: {"$exists": True, "$ne": None}}, {field: 1}):
+        raw = _get(doc, field)
+        point = geojson_point(raw)
+        if point == raw:
+            continue
+        if point:
+            operations.append(UpdateOne({"_id": doc["_id"], field: raw}, {"$set": {field: point}}))
+            converted += 1
+        else:
+            operations.append(UpdateOne(
+                {"_id": doc["_id"], field: raw},
+                {"$set": {f"{location}.raw_coordinates": raw}, "$unset": {field: ""}}
+            ))
+            moved += 1
+        if len(operations) >= batch_size:
+            if not dry_run:
+                collection.bulk_write(operations, ordered=False)
+            operations = []
+    if operations and not dry_run:
+        collection.bulk_write(operations, ordered=False)
+    return converted, moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    mongodb.connect_to_mongodb()
+    try:
+        for collection_name, location in LOCATIONS.items():
+            converted, moved = normalize(collection_name, location, args.batch_size, args.dry_run)
+            print(f"{collection_name}: {converted} converted to GeoJSON, {moved} moved to raw_coordinates"
+                  + (" (dry run)" if args.dry_run else ""))
+        if not args.dry_run:
+            ensure_indexes()
+    finally:
+        mongodb.close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Rebuild the perpetrator co-occurrence graph from the embedded case lists.
+
+The graph is maintained incrementally by the case endpoints; run this once
+after deploying it, after bulk imports that bypass the API, or to repair
+drift. Cases are read in one pass and the `perpetrators` and
+`perpetrator_edges` collections are replaced.
+
+Usage (from the backend directory):
+    python -m app.cli.rebuild_perpetrator_graph
+"""
+import argparse
+import time
+
+from app.core import perpetrator_graph
+from app.core.database import mongodb
+from app.core.indexes import ensure_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    mongodb.connect_to_mongodb()
+    try:
+        started = time.perf_counter()
+        cases, entities, edges = perpetrator_graph.rebuild(
+            args.batch_size,
+            on_batch=lambda done: print(f"\r{done} cases", end="", flush=True),
+        )
+        ensure_indexes()
+        print(f"\r{cases} cases: {entities} perpetrators, {edges} edges in {time.perf_counter() - started:.1f}s")
+    finally:
+        mongodb.close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    main()
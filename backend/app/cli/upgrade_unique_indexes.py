@@ -0,0 +1,49 @@
+"""
+Turn plain indexes from older releases into the unique ones the API expects
+(`case_id`, `report_id`).
+
+The API only reports such indexes at startup. This command checks each
+collection for duplicate values first and upgrades an index only when there
+are none; otherwise it lists a sample of the duplicates to resolve, e.g. by
+renaming the older records' IDs, and leaves the plain index in place. The
+index is dropped and rebuilt, so lookups on it are unindexed for the length
+of the build; run it in a quiet period.
+
+Usage (from the backend directory):
+    python -m app.cli.upgrade_unique_indexes [--dry-run]
+"""
+import argparse
+
+from app.core.database import mongodb
+from app.core.indexes import duplicate_values, pending_unique_upgrades, upgrade_to_unique
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only report duplicates")
+    args = parser.parse_args()
+
+    mongodb.connect_to_mongodb()
+    try:
+        pending = pending_unique_upgrades()
+        if not pending:
+            print("All unique indexes are in place")
+        for collection_name, keys in pending:
+            collection = mongodb.get_collection(collection_name)
+            duplicates = duplicate_values(collection, keys)
+            if duplicates:
+                print(f"{collection_name} {keys}: duplicates found, index left as is")
+                for duplicate in duplicates:
+                    print(f"  {duplicate['_id']}: {duplicate['count']} documents")
+                continue
+            if args.dry_run:
+                print(f"{collection_name} {keys}: no duplicates, would upgrade")
+                continue
+            upgrade_to_unique(collection, keys)
+            print(f"{collection_name} {keys}: upgraded to unique")
+    finally:
+        mongodb.close_mongodb_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.security import token_subject
+
+admission_rejected_total = metrics.counter(
+    "admission_rejected_total", "Requests refused by admission control, by route class and reason"
+)
+admission_in_flight = metrics.gauge("admission_in_flight", "Requests being served, by route class")
+admission_queued = metrics.gauge("admission_queued", "Requests waiting for a concurrency slot, by route class")
+admission_queue_wait_seconds = metrics.histogram(
+    "admission_queue_wait_seconds",
+    "Time spent waiting for a concurrency slot",
+    [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+)
+rate_limit_clients = metrics.gauge("rate_limit_clients", "Clients with a tracked token bucket")
+
+# Paths that are never limited: scraping and API docs
+EXEMPT_PATHS = ("/metrics", "/docs", "/redoc", f"{settings.API_V1_STR}/openapi.json")
+
+
+class TokenBuckets:
+    """
+    Per-client token buckets, refilled continuously at `rate` tokens per second.
+
+    The least recently seen clients are dropped beyond `max_clients`; a
+    dropped client simply starts again with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, client: str, cost: float) -> float:
+        """Spend `cost` tokens. Returns 0 on success or the seconds until enough tokens are available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            # Requests costing more than the burst are admitted once the bucket is full
+            needed = min(cost, self.burst)
+            if tokens >= needed:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (needed - tokens) / self.rate
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RouteClass:
+    """Rate limit and concurrency cap shared by a group of routes."""
+
+    def __init__(self, name: str, rate: float, burst: float, concurrency: int, queue_wait_ms: float):
+        self.name = name
+        self.buckets = TokenBuckets(rate, burst, settings.RATE_LIMIT_MAX_CLIENTS)
+        self.concurrency = concurrency
+        self.queue_wait = queue_wait_ms / 1000
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.in_flight = 0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it belongs to the worker's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+
+def _client_key(scope) -> str:
+    """
+    Identify the caller by the subject of a valid bearer token, otherwise by
+    address. Unverified header bytes are never used, or sending a different
+    made-up token on every request would get a fresh bucket each time.
+    """
+    headers = dict(scope.get("headers") or [])
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        subject = token_subject(token.strip())
+        if subject:
+            return "user:" + subject
+    if settings.RATE_LIMIT_TRUST_FORWARDED and b"x-forwarded-for" in headers:
+        return "ip:" + headers[b"x-forwarded-for"].decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+def _request_cost(scope) -> float:
+    """
+    Tokens charged for a request: 1, plus 1 per RATE_LIMIT_ITEMS_PER_TOKEN
+    items asked for through `limit`, so bulk reads pay for their size.
+    """
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    try:
+        limit = int(query.get("limit", ["0"])[0])
+    except ValueError:
+        limit = 0
+    return 1 + max(limit, 0) / settings.RATE_LIMIT_ITEMS_PER_TOKEN
+
+
+class AdmissionControlMiddleware:
+    """
+    Per-client rate limiting and per-route-class concurrency caps.
+
+    Requests are first charged against the client's token bucket for their
+    route class (429 when empty). They then wait for one of the class's
+    concurrency slots; if none frees up within the queue wait budget, or
+    the queue is already long, the request is shed with 503. Both answers
+    carry Retry-After. Report and case submissions have their own class,
+    so analytics load cannot use up the slots they need.
+
+    Limits are enforced per worker process.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        api = settings.API_V1_STR
+        self.classes: Dict[str, RouteClass] = {
+            "intake": RouteClass(
+                "intake", settings.RATE_LIMIT_INTAKE_RPS, settings.RATE_LIMIT_INTAKE_BURST,
+                settings.CONCURRENCY_INTAKE, settings.QUEUE_WAIT_BUDGET_MS,
+            ),
+            "analytics": RouteClass(
+                "analytics", settings.RATE_LIMIT_ANALYTICS_RPS, settings.RATE_LIMIT_ANALYTICS_BURST,
+                settings.CONCURRENCY_ANALYTICS, settings.QUEUE_WAIT_BUDGET_ANALYTICS_MS,
+            ),
+            "default": RouteClass(
+                "default", settings.RATE_LIMIT_RPS, settings.RATE_LIMIT_BURST,
+                settings.CONCURRENCY_DEFAULT, settings.QUEUE_WAIT_BUDGET_MS,
+            ),
+        }
+        self.intake_paths = (f"{api}/reports/", f"{api}/cases/")
+        self.analytics_prefixes = (
+            f"{api}/analytics", f"{api}/export", f"{api}/perpetrators", f"{api}/reports/analytics",
+        )
+        # Long-lived streams are rate limited but do not hold a concurrency slot
+        self.streaming_paths = (f"{api}/analytics/anomalies/stream",)
+
+    def classify(self, method: str, path: str) -> str:
+        if method == "POST" and path in self.intake_paths:
+            return "intake"
+        if path.startswith(self.analytics_prefixes):
+            return "analytics"
+        return "default"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PATHS):
+            return await self.app(scope, receive, send)
+
+        route_class = self.classes[self.classify(scope["method"], scope["path"])]
+        wait = route_class.buckets.take(_client_key(scope), _request_cost(scope))
+        rate_limit_clients.set(len(route_class.buckets), **{"class": route_class.name})
+        if wait:
+            admission_rejected_total.inc(**{"class": route_class.name, "reason": "rate_limited"})
+            return await _reject(send, 429, "Rate limit exceeded", wait)
+
+        if scope["path"] in self.streaming_paths:
+            return await self.app(scope, receive, send)
+
+        if route_class.waiting >= route_class.concurrency * settings.QUEUE_MAX_PER_SLOT:
+            admission_rejected_total.inc(**{"class": route_class.name, "reason": "queue_full"})
+            return await _reject(send, 503, "Server is busy", route_class.queue_wait)
+
+        started = time.perf_counter()
+        route_class.waiting += 1
+        admission_queued.set(route_class.waiting, **{"class": route_class.name})
+        try:
+            if not await _acquire(route_class.semaphore, route_class.queue_wait):
+                admission_rejected_total.inc(**{"class": route_class.name, "reason": "queue_timeout"})
+                return await _reject(send, 503, "Server is busy", route_class.queue_wait)
+        finally:
+            route_class.waiting -= 1
+            admission_queued.set(route_class.waiting, **{"class": route_class.name})
+        admission_queue_wait_seconds.observe(time.perf_counter() - started, **{"class": route_class.name})
+
+        route_class.in_flight += 1
+        admission_in_flight.set(route_class.in_flight, **{"class": route_class.name})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.semaphore.release()
+            route_class.in_flight -= 1
+            admission_in_flight.set(route_class.in_flight, **{"class": route_class.name})
+
+
+async def _acquire(semaphore: asyncio.Semaphore, timeout: float) -> bool:
+    """
+    Wait up to `timeout` seconds for a permit; returns whether one was taken.
+
+    `wait_for(semaphore.acquire())` can lose a permit on Python < 3.12 when
+    the timeout fires just as the acquire completes, shrinking the class for
+    good. Here a permit granted after giving up, or after the request was
+    cancelled, is handed back.
+    """
+    acquire = asyncio.ensure_future(semaphore.acquire())
+    granted = False
+    try:
+        await asyncio.wait({acquire}, timeout=timeout)
+        granted = acquire.done()
+        return granted
+    finally:
+        if not granted:
+            acquire.cancel()
+            acquire.add_done_callback(lambda task: task.cancelled() or semaphore.release())
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
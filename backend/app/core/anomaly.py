@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.database import mongodb
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+anomalies_total = metrics.counter("anomalies_detected_total", "Incident spikes flagged by the streaming detector")
+
+# Decaying more empty buckets than this has no visible effect on the statistics
+MAX_DECAY_STEPS = 64
+
+
+@dataclass
+class SeriesState:
+    bucket: int
+    count: int = 0
+    mean: float = 0.0
+    var: float = 0.0
+    buckets_seen: int = 0
+    flagged_bucket: int = -1
+
+
+class SpikeDetector:
+    """
+    Streaming spike detector over per-(region, violation_type) incident counts.
+
+    The region key is the incident's country (see `location_key`), the finest
+    location cases and reports both carry, so the two sources add up in the
+    same series.
+
+    Events are counted into fixed time buckets. When a bucket closes its count
+    is folded into an exponentially weighted mean and variance; the open
+    bucket is compared against `mean + threshold * stddev` on every event.
+    Each event costs O(1) and history is never rescanned.
+
+    State is kept per worker process, so each worker judges the share of
+    traffic it receives. Flagged spikes are stored in the `anomalies`
+    collection, which every worker reads from.
+    """
+
+    def __init__(self):
+        self.bucket_seconds = settings.ANOMALY_BUCKET_MINUTES * 60
+        self.alpha = settings.ANOMALY_EWMA_ALPHA
+        self.threshold = settings.ANOMALY_THRESHOLD_SIGMA
+        self.min_count = settings.ANOMALY_MIN_COUNT
+        self.warmup = settings.ANOMALY_WARMUP_BUCKETS
+        self.series: Dict[Tuple[str, str], SeriesState] = {}
+        self.subscribers: Set[asyncio.Queue] = set()
+        self._lock = threading.Lock()
+
+    def _fold(self, state: SeriesState, value: float):
+        diff = value - state.mean
+        increment = self.alpha * diff
+        state.mean += increment
+        state.var = (1 - self.alpha) * (state.var + diff * increment)
+        state.buckets_seen += 1
+
+    def _advance(self, state: SeriesState, bucket: int):
+        self._fold(state, state.count)
+        for _ in range(min(bucket - state.bucket - 1, MAX_DECAY_STEPS)):
+            self._fold(state, 0)
+        state.bucket = bucket
+        state.count = 0
+
+    def observe(self, region: str, violation_type: str, when: datetime, source: str) -> Optional[Dict[str, Any]]:
+        """Count one incident and return an anomaly record if it completes a spike."""
+        # Times are naive UTC; timestamp() alone would read them as local time
+        bucket = int(when.replace(tzinfo=timezone.utc).timestamp() // self.bucket_seconds)
+        key = (region, violation_type)
+        with self._lock:
+            state = self.series.get(key)
+            if state is None:
+                state = self.series[key] = SeriesState(bucket=bucket)
+            if bucket > state.bucket:
+                self._advance(state, bucket)
+            elif bucket < state.bucket:
+                return None  # Late event for a closed bucket
+            state.count += 1
+
+            stddev = math.sqrt(state.var)
+            expected = state.mean + self.threshold * max(stddev, 1.0)
+            if (
+                state.buckets_seen < self.warmup
+                or state.count < self.min_count
+                or state.count <= expected
+                or state.flagged_bucket == bucket
+            ):
+                return None
+            state.flagged_bucket = bucket
+            count, mean = state.count, state.mean
+
+        return {
+            "region": region,
+            "violation_type": violation_type,
+            "source": source,
+            "bucket_start": datetime.utcfromtimestamp(bucket * self.bucket_seconds),
+            "bucket_minutes": settings.ANOMALY_BUCKET_MINUTES,
+            "count": count,
+            "expected": round(mean, 3),
+            "stddev": round(stddev, 3),
+            "score": round((count - mean) / max(stddev, 1.0), 3),
+            "detected_at": datetime.utcnow(),
+        }
+
+    def record(self, region: Optional[str], violation_types: Iterable[str], source: str, when: Optional[datetime] = None):
+        """Feed the violation types of one new case or report into the detector."""
+        if not settings.ANOMALY_DETECTION_ENABLED or not region:
+            return
+        when = when or datetime.utcnow()
+        flagged = [
+            # Cases carry ViolationType members, reports plain strings; both count under the value
+            anomaly for anomaly in (
+                self.observe(region, str(getattr(v, "value", v)), when, source) for v in violation_types
+            )
+            if anomaly is not None
+        ]
+        for anomaly in flagged:
+            self._publish(anomaly)
+
+    def _publish(self, anomaly: Dict[str, Any]):
+        anomalies_total.inc(violation_type=anomaly["violation_type"])
+        logger.warning(
+            "Spike in %s reports for %s: %d in the current bucket, expected %.1f",
+            anomaly["violation_type"], anomaly["region"], anomaly["count"], anomaly["expected"],
+        )
+        if settings.STORAGE_BACKEND == "mongo":
+            try:
+                mongodb.get_collection("anomalies").insert_one(dict(anomaly))
+            except Exception as e:
+                logger.warning("Could not store anomaly: %s", e)
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(anomaly)
+            except asyncio.QueueFull:
+                pass  # Slow subscribers miss events rather than block intake
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"region": region, "violation_type": violation_type, **vars(state)}
+                for (region, violation_type), state in self.series.items()
+            ]
+
+    def save_state(self):
+        """
+        Persist the statistics so a restarted worker does not start cold.
+
+        Every worker saves at shutdown, so each series is merged into its
+        stored document rather than replacing the collection: a state for a
+        newer bucket wins, states for the same bucket average their mean and
+        variance, and an older state leaves the stored one alone.
+        """
+        states = self.snapshot()
+        if states:
+            mongodb.get_collection("anomaly_state").bulk_write(
+                [self._merge_operation(state) for state in states], ordered=False
+            )
+
+    @staticmethod
+    def _merge_operation(state: Dict[str, Any]) -> UpdateOne:
+        newer = {"$lt": [{"$ifNull": ["$bucket", -1]}, state["bucket"]]}
+        same = {"$eq": ["$bucket", state["bucket"]]}
+
+        def merged(field: str, combine: str) -> Dict[str, Any]:
+            value = state[field]
+            return {"$cond": [newer, value, {"$cond": [same, {combine: [f"${field}", value]}, f"${field}"]}]}
+
+        return UpdateOne(
+            {"region": state["region"], "violation_type": state["violation_type"]},
+            [{"$set": {
+                "bucket": {"$cond": [newer, state["bucket"], "$bucket"]},
+                "mean": merged("mean", "$avg"),
+                "var": merged("var", "$avg"),
+                "count": merged("count", "$max"),
+                "buckets_seen": merged("buckets_seen", "$max"),
+                "flagged_bucket": merged("flagged_bucket", "$max"),
+            }}],
+            upsert=True,
+        )
+
+    def load_state(self):
+        fields = set(SeriesState.__dataclass_fields__)
+        with self._lock:
+            for doc in mongodb.get_collection("anomaly_state").find({}, {"_id": 0}):
+                key = (doc.pop("region"), doc.pop("violation_type"))
+                self.series[key] = SeriesState(**{k: v for k, v in doc.items() if k in fields})
+
+
+def location_key(location: Dict[str, Any]) -> Optional[str]:
+    """
+    Region key for a case or report location: its country.
+
+    Cases record a region and reports a city, so the country is the only
+    level both share.
+    """
+    if not location or not location.get("country"):
+        return None
+    return location["country"]
+
+
+spike_detector = SpikeDetector()
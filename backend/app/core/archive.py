@@ -0,0 +1,183 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from pymongo import DeleteOne, ReplaceOne, ReturnDocument
+
+from app.core.conditional import conditional_update
+from app.core.database import mongodb
+from app.core.sync import forget_removal, record_removals
+
+logger = logging.getLogger(__name__)
+
+# Hot collection -> archive collection with the same document shape
+ARCHIVES = {
+    "cases": "cases_archive",
+    "victims": "victims_archive",
+    "incident_reports": "incident_reports_archive",
+}
+ARCHIVABLE_STATUSES = ["resolved", "closed"]
+
+
+def find_one(collection_name: str, query: Dict[str, Any], projection=None) -> Optional[Dict[str, Any]]:
+    """Find a document in the hot collection, falling through to its archive."""
+    return (
+        mongodb.get_collection(collection_name).find_one(query, projection)
+        or mongodb.get_collection(ARCHIVES[collection_name]).find_one(query, projection)
+    )
+
+
+def match_stages(collection_name: str, match: Dict[str, Any], include_archived: bool) -> List[Dict[str, Any]]:
+    """Leading `$match` for a pipeline, with the archive's matching documents appended when asked for."""
+    stages: List[Dict[str, Any]] = [{"$match": match}]
+    if include_archived:
+        stages.append({"$unionWith": {"coll": ARCHIVES[collection_name], "pipeline": [{"$match": match}]}})
+    return stages
+
+
+def find(
+    collection_name: str,
+    query: Dict[str, Any],
+    sort: List[Tuple[str, int]],
+    skip: int,
+    limit: int,
+    include_archived: bool,
+) -> List[Dict[str, Any]]:
+    """
+    List documents of a hot collection, optionally together with its archive.
+
+    Without `include_archived` this is a plain indexed find; with it the
+    archive is merged in with `$unionWith` and the combined set is sorted.
+    A `limit` of 0 means no limit.
+    """
+    collection = mongodb.get_collection(collection_name)
+    if not include_archived:
+        return list(collection.find(query).sort(sort).skip(skip).limit(limit))
+    pipeline = match_stages(collection_name, query, True) + [{"$sort": dict(sort)}, {"$skip": skip}]
+    if limit:
+        pipeline.append({"$limit": limit})
+    return list(collection.aggregate(pipeline))
+
+
+def count_documents(collection_name: str, query: Dict[str, Any], include_archived: bool) -> int:
+    """Count matching documents for analytics, optionally including the archive."""
+    total = mongodb.get_analytics_collection(collection_name).count_documents(query)
+    if include_archived:
+        total += mongodb.get_analytics_collection(ARCHIVES[collection_name]).count_documents(query)
+    return total
+
+
+def restore(collection_name: str, query: Dict[str, Any]) -> bool:
+    """Move one archived document back to its hot collection. Returns False if it is not archived."""
+    archive = mongodb.get_collection(ARCHIVES[collection_name])
+    document = archive.find_one(query)
+    if document is None:
+        return False
+    mongodb.get_collection(collection_name).replace_one({"_id": document["_id"]}, document, upsert=True)
+    archive.delete_one({"_id": document["_id"]})
+    forget_removal(collection_name, document)
+    return True
+
+
+def update(
+    collection_name: str,
+    key: Dict[str, Any],
+    changes: Dict[str, Any],
+    if_match: Optional[str],
+    not_found_detail: str,
+    projection: Optional[Dict[str, Any]] = None,
+    return_document: ReturnDocument = ReturnDocument.AFTER,
+) -> Dict[str, Any]:
+    """
+    `conditional_update` on a hot collection; an archived document is first
+    restored, so editing it (e.g. reopening a closed case) makes it hot again.
+    """
+    collection = mongodb.get_collection(collection_name)
+    try:
+        return conditional_update(collection, key, changes, if_match, not_found_detail, projection, return_document)
+    except HTTPException as e:
+        if e.status_code != status.HTTP_404_NOT_FOUND or not restore(collection_name, key):
+            raise
+    return conditional_update(collection, key, changes, if_match, not_found_detail, projection, return_document)
+
+
+def _move(collection_name: str, documents: Sequence[Dict[str, Any]]) -> int:
+    """
+    Copy documents to the archive, then delete them from the hot collection.
+
+    The copy is an idempotent upsert, so an interrupted run is finished by the
+    next one. Deletes only match the version that was copied; documents
+    changed in between stay hot and their stale archive copies are dropped.
+    Moved documents are tombstoned so sync clients drop their copies.
+    """
+    if not documents:
+        return 0
+    hot = mongodb.get_collection(collection_name)
+    archive = mongodb.get_collection(ARCHIVES[collection_name])
+    archive.bulk_write([ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in documents], ordered=False)
+    hot.bulk_write(
+        [DeleteOne({"_id": d["_id"], "updated_at": d.get("updated_at")}) for d in documents], ordered=False
+    )
+    ids = [d["_id"] for d in documents]
+    changed = [d["_id"] for d in hot.find({"_id": {"$in": ids}}, {"_id": 1})]
+    if changed:
+        archive.delete_many({"_id": {"$in": changed}})
+        logger.info("%d %s changed while being archived and stay hot", len(changed), collection_name)
+    kept = set(changed)
+    record_removals(collection_name, [d for d in documents if d["_id"] not in kept])
+    return len(documents) - len(changed)
+
+
+def archive_cases(
+    older_than_days: int,
+    batch_size: int = 500,
+    dry_run: bool = False,
+    on_batch=None,
+) -> Dict[str, int]:
+    """
+    Move resolved and closed cases not updated for `older_than_days` into
+    `cases_archive`, with their reports and the victims linked only to
+    archived cases.
+
+    Reports follow their case through `case_id`; victims through
+    `cases_involved`. Victims still involved in a hot case stay hot.
+    Returns the number of documents moved per collection.
+    """
+    cases = mongodb.get_collection("cases")
+    reports = mongodb.get_collection("incident_reports")
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    query = {"status": {"$in": ARCHIVABLE_STATUSES}, "updated_at": {"$lt": cutoff}}
+    moved = {name: 0 for name in ARCHIVES}
+
+    if dry_run:
+        batch_ids = [doc["case_id"] for doc in cases.find(query, {"case_id": 1})]
+        moved["cases"] = len(batch_ids)
+        moved["incident_reports"] = reports.count_documents({"case_id": {"$in": batch_ids}})
+        moved["victims"] = len(_archivable_victims(batch_ids))
+        return moved
+
+    while True:
+        batch = list(cases.find(query).sort("updated_at", 1).limit(batch_size))
+        if not batch:
+            return moved
+        case_ids = [doc["case_id"] for doc in batch]
+        moved["incident_reports"] += _move("incident_reports", list(reports.find({"case_id": {"$in": case_ids}})))
+        moved["victims"] += _move("victims", _archivable_victims(case_ids))
+        moved["cases"] += _move("cases", batch)
+        if on_batch:
+            on_batch(moved)
+        if len(batch) < batch_size:
+            return moved
+
+
+def _archivable_victims(case_ids: List[str]) -> List[Dict[str, Any]]:
+    """Victims involved in `case_ids` and in no case that stays hot."""
+    batch = set(case_ids)
+    candidates = list(mongodb.get_collection("victims").find({"cases_involved": {"$in": case_ids}}))
+    others = {c for v in candidates for c in v.get("cases_involved") or [] if c not in batch}
+    hot_cases = {
+        doc["case_id"]
+        for doc in mongodb.get_collection("cases").find({"case_id": {"$in": list(others)}}, {"case_id": 1})
+    }
+    return [v for v in candidates if not hot_cases.intersection(v.get("cases_involved") or [])]
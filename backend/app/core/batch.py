@@ -0,0 +1,60 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pymongo.collection import Collection
+
+from app.core.config import settings
+
+
+def resolve_batch_ids(query_ids: Optional[str] = None, body_ids: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Collect the requested IDs from a comma-separated query value or a body list.
+
+    Duplicates are dropped while keeping the first occurrence, so the response
+    order follows the request order.
+    """
+    raw = list(body_ids or []) if body_ids is not None else (query_ids or "").split(",")
+    ids = list(dict.fromkeys(i.strip() for i in raw if i and i.strip()))
+
+    if not ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one ID is required"
+        )
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BATCH_MAX_IDS} IDs can be fetched at once"
+        )
+    return ids
+
+
+def id_query(value: str) -> Dict[str, Any]:
+    """Filter on `_id` for an ID given as a string; documents inserted by the API have ObjectId keys."""
+    return {"_id": {"$in": [value, ObjectId(value)]}} if ObjectId.is_valid(value) else {"_id": value}
+
+
+def _find_in(collection: Collection, field: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    values: List[Any] = list(ids)
+    if field == "_id":
+        # Documents inserted by the API have ObjectId keys
+        values.extend(ObjectId(i) for i in ids if ObjectId.is_valid(i))
+    return {str(doc[field]): doc for doc in collection.find({field: {"$in": values}})}
+
+
+def fetch_many(
+    collection: Collection, field: str, ids: List[str], fallback: Optional[Collection] = None
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Fetch documents whose `field` is one of `ids` with a single $in query.
+
+    IDs not found are looked up in `fallback` (the archive) with one more query.
+    Returns the documents in the requested order and the IDs that were not found.
+    """
+    found = _find_in(collection, field, ids)
+    if fallback is not None and len(found) < len(ids):
+        found.update(_find_in(fallback, field, [i for i in ids if i not in found]))
+    items = [found[i] for i in ids if i in found]
+    missing = [i for i in ids if i not in found]
+    return items, missing
@@ -0,0 +1,320 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import bson
+
+from app.core.conditional import document_etag
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+cache_requests_total = metrics.counter("cache_requests_total", "Cache lookups by cache, tier and result")
+cache_evictions_total = metrics.counter("cache_evictions_total", "Entries evicted to stay within the size bound")
+cache_entries = metrics.gauge("cache_entries", "Entries currently held in the in-process cache")
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry time to live.
+
+    Values are shared with callers and must be treated as read-only.
+    `on_remove(key, value)` is called, outside the lock, for every entry
+    that leaves the cache.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl_seconds: float = 0,
+        on_remove: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.on_remove = on_remove
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _removed(self, entries: List[Tuple[Hashable, Any]]):
+        if self.on_remove:
+            for key, value in entries:
+                self.on_remove(key, value)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (not self.ttl_seconds or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                cache_requests_total.inc(cache=self.name, tier="local", result="hit")
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+        if entry is not None:
+            self._removed([(key, entry[1])])
+        cache_requests_total.inc(cache=self.name, tier="local", result="miss")
+        return None
+
+    def set(self, key: Hashable, value: Any):
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+        evicted = []
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old_key, (_, old_value) = self._entries.popitem(last=False)
+                evicted.append((old_key, old_value))
+                cache_evictions_total.inc(cache=self.name)
+            cache_entries.set(len(self._entries), cache=self.name)
+        self._removed(evicted)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            cache_entries.set(len(self._entries), cache=self.name)
+        if entry is not None:
+            self._removed([(key, entry[1])])
+
+    def clear(self):
+        with self._lock:
+            removed = [(key, entry[1]) for key, entry in self._entries.items()]
+            self._entries.clear()
+            cache_entries.set(0, cache=self.name)
+        self._removed(removed)
+
+
+class SharedCache:
+    """
+    Host-local cache tier shared by all worker processes, stored in SQLite.
+
+    Documents are stored BSON-encoded so ObjectIds and datetimes round-trip,
+    next to `<namespace>:<_id>` so any worker can drop an entry named by a
+    change event.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("DROP TABLE IF EXISTS documents")  # Earlier layout without object keys
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, object_key TEXT, expires_at REAL NOT NULL, body BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_object_key ON entries (object_key)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            row = self._connection().execute(
+                "SELECT body FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Shared cache read failed: %s", e)
+            return None
+        return bson.decode(row[0]) if row else None
+
+    def set(self, key: str, document: Dict[str, Any], object_key: Optional[str] = None):
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO entries (key, object_key, expires_at, body) VALUES (?, ?, ?, ?)",
+                (key, object_key, time.time() + self.ttl_seconds, bson.encode(document)),
+            )
+        except sqlite3.Error as e:
+            logger.warning("Shared cache write failed: %s", e)
+
+    def delete(self, key: str):
+        try:
+            self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning("Shared cache delete failed: %s", e)
+
+    def delete_object(self, object_key: str):
+        try:
+            self._connection().execute("DELETE FROM entries WHERE object_key = ?", (object_key,))
+        except sqlite3.Error as e:
+            logger.warning("Shared cache delete failed: %s", e)
+
+
+class DocumentCache:
+    """
+    Read-through cache for single-document lookups (get_case, get_report, get_victim).
+
+    Lookups go to the in-process LRU, then the optional shared tier, then the
+    loader. Update handlers write the new version through with `put`, so a
+    worker never serves a stale copy after its own successful write. Other
+    workers' writes are seen through `invalidate_by_object_id`, driven by the
+    change stream watcher; while no watcher runs, a hit is first checked
+    against the stored revision (`revalidate`), which reads only the version
+    fields instead of the whole document.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        shared_path: str = "",
+        enabled: bool = True,
+        revalidate: bool = True,
+    ):
+        self.enabled = enabled
+        self.revalidate = revalidate
+        self.change_stream_active = False
+        self.local = LRUCache("documents", max_entries, ttl_seconds, on_remove=self._forget)
+        self.shared = SharedCache(shared_path, ttl_seconds) if enabled and shared_path else None
+        # "<namespace>:<_id>" -> cache key of every local entry, kept in step with the LRU
+        self._keys_by_object_id: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
+    @staticmethod
+    def _object_key(namespace: str, document: Dict[str, Any]) -> Optional[str]:
+        return f"{namespace}:{document['_id']}" if "_id" in document else None
+
+    def _remember(self, namespace: str, cache_key: str, document: Dict[str, Any]):
+        object_key = self._object_key(namespace, document)
+        if object_key:
+            with self._lock:
+                self._keys_by_object_id[object_key] = cache_key
+
+    def _forget(self, cache_key: str, document: Dict[str, Any]):
+        object_key = self._object_key(cache_key.split(":", 1)[0], document)
+        with self._lock:
+            if object_key and self._keys_by_object_id.get(object_key) == cache_key:
+                del self._keys_by_object_id[object_key]
+
+    def _current(self, document: Dict[str, Any], revision: Optional[Callable[[], Optional[str]]]) -> bool:
+        if not self.revalidate or self.change_stream_active or revision is None:
+            return True
+        current = revision() == document_etag(document)
+        cache_requests_total.inc(cache="documents", tier="revalidate", result="hit" if current else "stale")
+        return current
+
+    def get_or_load(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Optional[Dict[str, Any]]],
+        revision: Optional[Callable[[], Optional[str]]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Cached document, or the loader's; `revision` returns the stored ETag for revalidation."""
+        if not self.enabled:
+            return loader()
+        cache_key = self._key(namespace, key)
+        document = self.local.get(cache_key)
+        if document is not None:
+            if self._current(document, revision):
+                return document
+            document = None
+
+        if self.shared:
+            document = self.shared.get(cache_key)
+            cache_requests_total.inc(cache="documents", tier="shared", result="hit" if document else "miss")
+            if document is not None and self._current(document, revision):
+                self._remember(namespace, cache_key, document)
+                self.local.set(cache_key, document)
+                return document
+
+        document = loader()
+        if document is not None:
+            self.put(namespace, key, document)
+        return document
+
+    def put(self, namespace: str, key: str, document: Dict[str, Any]):
+        if not self.enabled:
+            return
+        cache_key = self._key(namespace, key)
+        self._remember(namespace, cache_key, document)
+        self.local.set(cache_key, document)
+        if self.shared:
+            self.shared.set(cache_key, document, self._object_key(namespace, document))
+
+    def invalidate(self, namespace: str, key: str):
+        cache_key = self._key(namespace, key)
+        self.local.delete(cache_key)
+        if self.shared:
+            self.shared.delete(cache_key)
+
+    def invalidate_by_object_id(self, namespace: str, object_id: Any):
+        object_key = f"{namespace}:{object_id}"
+        with self._lock:
+            cache_key = self._keys_by_object_id.pop(object_key, None)
+        if cache_key:
+            self.local.delete(cache_key)
+        if self.shared:
+            self.shared.delete_object(object_key)
+
+
+class ChangeStreamInvalidator:
+    """
+    Invalidate cached documents when any worker changes them.
+
+    Watches the database change stream (requires a replica set). While the
+    stream is open, cache hits are served without revalidation; on a
+    standalone server the watcher logs once and exits, and hits are
+    revalidated again.
+    """
+
+    def __init__(self, cache: DocumentCache, namespaces: List[str]):
+        self.cache = cache
+        self.namespaces = namespaces
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, database):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(database,), name="cache-invalidator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, database):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": self.namespaces},
+            "operationType": {"$in": ["update", "replace", "delete"]},
+        }}]
+        try:
+            with database.watch(pipeline, max_await_time_ms=1000) as stream:
+                # Entries cached before the stream opened may have missed changes
+                self.cache.local.clear()
+                self.cache.change_stream_active = True
+                while not self._stop.is_set():
+                    change = stream.try_next()
+                    if change is not None:
+                        self.cache.invalidate_by_object_id(change["ns"]["coll"], change["documentKey"]["_id"])
+        except Exception as e:
+            logger.warning("Cache change stream stopped, revalidating cache hits instead: %s", e)
+        finally:
+            self.cache.change_stream_active = False
+
+
+doc_cache = DocumentCache(
+    settings.DOC_CACHE_MAX_ENTRIES,
+    settings.DOC_CACHE_TTL_SECONDS,
+    settings.DOC_CACHE_SHARED_PATH,
+    settings.DOC_CACHE_ENABLED,
+    settings.DOC_CACHE_REVALIDATE,
+)
+cache_invalidator = ChangeStreamInvalidator(doc_cache, ["cases", "incident_reports", "victims"])
@@ -0,0 +1,142 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+
+
+def _modified_at(doc: Dict[str, Any]) -> Optional[datetime]:
+    return doc.get("updated_at") or doc.get("created_at")
+
+
+def document_etag(doc: Dict[str, Any]) -> str:
+    """
+    Build a strong ETag for a stored document.
+
+    Documents carry a `version` counter that every update increments. Records
+    written before the counter existed fall back to their modification time.
+    """
+    if doc.get("version") is not None:
+        return f'"v{doc["version"]}"'
+    modified = _modified_at(doc)
+    millis = int(modified.replace(tzinfo=timezone.utc).timestamp() * 1000) if modified else 0
+    return f'"t{millis}"'
+
+
+def _etag_filter(etag: str) -> Optional[Dict[str, Any]]:
+    """Translate one of our ETags back into a query that matches that exact revision."""
+    tag = etag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    try:
+        if tag.startswith("v"):
+            return {"version": int(tag[1:])}
+        if tag.startswith("t"):
+            modified = datetime.fromtimestamp(int(tag[1:]) / 1000, tz=timezone.utc).replace(tzinfo=None)
+            return {
+                "version": {"$exists": False},
+                "$or": [{"updated_at": modified}, {"updated_at": None, "created_at": modified}],
+            }
+    except ValueError:
+        pass
+    return None
+
+
+def _split_header(value: str) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def set_cache_headers(response: Response, doc: Dict[str, Any]):
+    """Attach ETag and Last-Modified headers describing `doc` to the response."""
+    response.headers["ETag"] = document_etag(doc)
+    modified = _modified_at(doc)
+    if modified:
+        response.headers["Last-Modified"] = format_datetime(modified.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def not_modified_response(request: Request, response: Response, doc: Dict[str, Any]) -> Optional[Response]:
+    """
+    Evaluate If-None-Match / If-Modified-Since for a GET of `doc`.
+
+    Sets the validators on `response` and returns a 304 response when the
+    client's copy is current, or None when the full document should be sent.
+    """
+    set_cache_headers(response, doc)
+    etag = response.headers["ETag"]
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t[2:] if t.startswith("W/") else t for t in _split_header(if_none_match)]
+        fresh = "*" in tags or etag in tags
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        modified = _modified_at(doc)
+        fresh = False
+        if if_modified_since and modified:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+                fresh = modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+            except (TypeError, ValueError):
+                fresh = False
+
+    if not fresh:
+        return None
+    validators = {k: v for k, v in response.headers.items() if k in ("etag", "last-modified")}
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
+
+def etag_matches(if_match: Optional[str], doc: Dict[str, Any]) -> bool:
+    """Evaluate an If-Match header against a document already read, for stores without conditional writes."""
+    if not if_match or if_match.strip() == "*":
+        return True
+    tags = [t[2:] if t.startswith("W/") else t for t in _split_header(if_match)]
+    return document_etag(doc) in tags
+
+
+def conditional_update(
+    collection: Collection,
+    key: Dict[str, Any],
+    update: Dict[str, Any],
+    if_match: Optional[str],
+    not_found_detail: str,
+    projection: Optional[Dict[str, Any]] = None,
+    return_document: ReturnDocument = ReturnDocument.AFTER,
+) -> Dict[str, Any]:
+    """
+    Apply `update` to the document matching `key` and return the new version,
+    or with `ReturnDocument.BEFORE` the version the update was applied to.
+
+    The version counter is incremented in the same write. With an If-Match
+    header the expected revision is part of the filter, so the precondition
+    check and the update are a single atomic `find_one_and_update`. A
+    `projection` limits the returned fields, e.g. to skip large arrays.
+    """
+    query = dict(key)
+    if if_match and if_match.strip() != "*":
+        revisions = [_etag_filter(tag) for tag in _split_header(if_match)]
+        revisions = [r for r in revisions if r is not None]
+        if not revisions:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="If-Match does not match the current version"
+            )
+        query["$and"] = [{"$or": revisions}]
+
+    update = dict(update)
+    update["$inc"] = {**update.get("$inc", {}), "version": 1}
+    document = collection.find_one_and_update(
+        query, update, projection=projection, return_document=return_document
+    )
+
+    if document is None:
+        # Only failed writes pay for a second lookup to tell 404 from 412
+        if if_match and collection.count_documents(key, limit=1):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="If-Match does not match the current version"
+            )
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+    return document
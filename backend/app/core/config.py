@@ -6,9 +6,51 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "Human Rights Monitor MIS"
     
+    # Server settings (used by `python server.py --mode prod`)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # 0 means one worker per CPU core
+    SERVER_MAX_REQUESTS: int = 10000  # Recycle a worker after this many requests (0 disables)
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # Seconds to drain in-flight requests on SIGTERM
+
+    # Storage backend: "mongo", or "sqlite" for small deployments without a MongoDB server.
+    # With sqlite, endpoints that need MongoDB (geo, graph, sync, jobs, analytics) answer 501.
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "mongo")
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "data/human_rights_monitor.sqlite3")
+
     # MongoDB settings
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     MONGODB_DB_NAME: str = os.getenv("MONGODB_DB_NAME", "human_rights_monitor")
+
+    # MongoDB connection pool
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: int = 300000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 10000  # Max wait for a free pooled connection
+    MONGODB_CONNECT_TIMEOUT_MS: int = 10000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 10000
+    MONGODB_SOCKET_TIMEOUT_MS: int = 0  # 0 means no timeout
+
+    # MongoDB read preference and write concern
+    MONGODB_READ_PREFERENCE: str = "primary"
+    MONGODB_ANALYTICS_READ_PREFERENCE: str = "secondaryPreferred"  # Analytics and exports
+    MONGODB_ANALYTICS_MAX_STALENESS_SECONDS: int = 120  # -1 disables; otherwise at least 90
+    MONGODB_WRITE_CONCERN_W: str = "majority"
+    MONGODB_WRITE_CONCERN_J: bool = True
+    MONGODB_WRITE_CONCERN_WTIMEOUT_MS: int = 10000
+    MONGODB_INTAKE_WRITE_CONCERN_W: str = "1"  # Report intake acknowledges on the primary only
+    MONGODB_INTAKE_WRITE_CONCERN_J: bool = True
+
+    # Report intake: "direct" inserts on submission, "buffered" logs locally and inserts in the background
+    INTAKE_MODE: str = os.getenv("INTAKE_MODE", "direct")
+    INTAKE_LOG_DIR: str = os.getenv("INTAKE_LOG_DIR", "intake")
+    INTAKE_MAX_SLOTS: int = 64  # Upper bound on workers writing intake logs
+    INTAKE_FSYNC: bool = True  # fsync every submission before acknowledging it
+    INTAKE_BATCH_SIZE: int = 500
+    INTAKE_FLUSH_INTERVAL_MS: int = 200
+    INTAKE_MAX_PENDING: int = 50000  # Submissions are rejected with 503 beyond this backlog
+    INTAKE_MAX_LOG_BYTES: int = 64 * 1024 * 1024  # Log is truncated once fully flushed past this size
   
     # Security settings
     SECRET_KEY: str = os.getenv(
@@ -18,8 +60,92 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    # Read-through cache for single case/report/victim lookups
+    DOC_CACHE_ENABLED: bool = True
+    DOC_CACHE_MAX_ENTRIES: int = 5000
+    DOC_CACHE_TTL_SECONDS: float = 30.0
+    DOC_CACHE_SHARED_PATH: str = os.getenv("DOC_CACHE_SHARED_PATH", "")  # SQLite file shared by local workers
+    DOC_CACHE_CHANGE_STREAM: bool = False  # Invalidate across workers via change streams (replica set); on in prod mode
+    DOC_CACHE_REVALIDATE: bool = True  # Check a hit's version against the database while no change stream runs
+
+    # Streaming spike detection on new cases and reports
+    ANOMALY_DETECTION_ENABLED: bool = True
+    ANOMALY_BUCKET_MINUTES: int = 60 * 24
+    ANOMALY_EWMA_ALPHA: float = 0.3
+    ANOMALY_THRESHOLD_SIGMA: float = 3.0
+    ANOMALY_MIN_COUNT: int = 5  # Never flag buckets with fewer incidents than this
+    ANOMALY_WARMUP_BUCKETS: int = 3  # Closed buckets needed before a series can be flagged
+
+    # Hotspot clustering results are cached per filter set
+    HOTSPOT_CACHE_TTL_SECONDS: float = 300.0
+
+    # Perpetrator co-occurrence graph maintained on case writes
+    PERPETRATOR_GRAPH_MAX_PER_CASE: int = 100  # Bounds the n^2 edge updates of one case
+
+    # Delta sync for offline clients
+    SYNC_SAFETY_LAG_SECONDS: float = 5.0  # Changes younger than this wait for the next sync
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 90  # Older sync tokens require a full download
+    SYNC_GZIP_MIN_BYTES: int = 1024
+
+    # Admission control: per-client token buckets and per-route-class concurrency caps (per worker)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_RPS: float = 20.0
+    RATE_LIMIT_BURST: float = 60.0
+    RATE_LIMIT_ANALYTICS_RPS: float = 2.0
+    RATE_LIMIT_ANALYTICS_BURST: float = 10.0
+    RATE_LIMIT_INTAKE_RPS: float = 10.0
+    RATE_LIMIT_INTAKE_BURST: float = 50.0
+    RATE_LIMIT_ITEMS_PER_TOKEN: int = 500  # A request for `limit` items costs 1 + limit / this
+    RATE_LIMIT_MAX_CLIENTS: int = 100000
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # Key anonymous clients by X-Forwarded-For (behind a proxy)
+    CONCURRENCY_DEFAULT: int = 64
+    CONCURRENCY_ANALYTICS: int = 4
+    CONCURRENCY_INTAKE: int = 128
+    QUEUE_WAIT_BUDGET_MS: float = 2000.0  # Shed with 503 when a slot is not free within this time
+    QUEUE_WAIT_BUDGET_ANALYTICS_MS: float = 5000.0
+    QUEUE_MAX_PER_SLOT: int = 4  # Shed immediately when more requests than this per slot are waiting
+
+    # Background jobs (exports, analytics reports, reaggregation)
+    JOBS_WORKERS: int = 2  # Job threads per API worker process; 0 disables job execution here
+    JOBS_RESULT_DIR: str = os.getenv("JOBS_RESULT_DIR", "jobs")
+    JOBS_RESULT_TTL_HOURS: int = 24
+    JOBS_POLL_INTERVAL_SECONDS: float = 2.0
+    JOBS_PROGRESS_INTERVAL_SECONDS: float = 1.0
+    JOBS_SWEEP_INTERVAL_SECONDS: float = 300.0
+    JOBS_STALE_SECONDS: int = 600  # Running jobs without a progress report for this long are failed
+
+    # Archival of old resolved/closed cases into *_archive collections
+    ARCHIVE_AFTER_DAYS: int = 365  # Cases not updated for this long are archived
+    ARCHIVE_BATCH_SIZE: int = 500
+
+    # Case evidence: "embedded" in the case document, or "collection" for one document per item
+    EVIDENCE_STORAGE: str = os.getenv("EVIDENCE_STORAGE", "embedded")
+
+    # Typeahead suggestions for perpetrators, regions and cities, held in memory per worker
+    SUGGEST_ENABLED: bool = True
+    SUGGEST_MAX_RESULTS: int = 10
+    SUGGEST_CACHED_PREFIX_LENGTH: int = 2  # Rankings for prefixes up to this length are precomputed
+    SUGGEST_REFRESH_INTERVAL_SECONDS: float = 600.0  # Full rebuild; picks up other workers' writes and removals
+
+    # Maximum number of IDs accepted by the batch fetch endpoints
+    BATCH_MAX_IDS: int = 200
+
     # CORS settings
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
+
+    # Profiling settings
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0  # Fraction of requests to profile (0.0 - 1.0)
+    PROFILING_INTERVAL_MS: float = 5.0  # Stack sampling interval
+    PROFILING_MAX_CONCURRENT: int = 2
+    PROFILING_DIR: str = os.getenv("PROFILING_DIR", "profiles")
+    PROFILING_HEADER: str = "X-Profile-Request"
+    PROFILING_ADMIN_TOKEN: str = os.getenv("PROFILING_ADMIN_TOKEN", "")
+
+    # Event loop monitoring
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_MS: float = 50.0
+    LOOP_STALL_THRESHOLD_MS: float = 250.0
     
     class Config:
         case_sensitive = True
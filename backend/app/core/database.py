@@ -1,18 +1,63 @@
+import os
+
 from pymongo import MongoClient
 from pymongo.database import Database
 from pymongo.collection import Collection
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
 
 from app.core.config import settings
 
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def _read_preference(mode: str, max_staleness: int = -1):
+    """Build a pymongo read preference from its mode name."""
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown MongoDB read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+
+def _write_concern(w: str, j: bool) -> WriteConcern:
+    """Build a write concern; numeric `w` values are passed as integers."""
+    return WriteConcern(
+        w=int(w) if w.isdigit() else w,
+        j=j,
+        wtimeout=settings.MONGODB_WRITE_CONCERN_WTIMEOUT_MS or None,
+    )
+
 
 class MongoDB:
     client: MongoClient = None
     db: Database = None
+    pid: int = None
 
     def connect_to_mongodb(self):
         """Connect to MongoDB database."""
-        self.client = MongoClient(settings.MONGODB_URL)
-        self.db = self.client[settings.MONGODB_DB_NAME]
+        self.client = MongoClient(
+            settings.MONGODB_URL,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS or None,
+            waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS or None,
+            connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS or None,
+        )
+        self.db = self.client.get_database(
+            settings.MONGODB_DB_NAME,
+            read_preference=_read_preference(settings.MONGODB_READ_PREFERENCE),
+            write_concern=_write_concern(settings.MONGODB_WRITE_CONCERN_W, settings.MONGODB_WRITE_CONCERN_J),
+        )
+        self.pid = os.getpid()
         print(f"Connected to MongoDB: {settings.MONGODB_URL}/{settings.MONGODB_DB_NAME}")
         return self.db
 
@@ -24,7 +69,35 @@ class MongoDB:
 
     def get_collection(self, collection_name: str) -> Collection:
         """Get MongoDB collection by name."""
+        if self.pid != os.getpid():
+            # MongoClient is not fork-safe: a forked worker gets its own client
+            self.connect_to_mongodb()
         return self.db[collection_name]
 
+    def get_analytics_collection(self, collection_name: str) -> Collection:
+        """
+        Get a collection for long-running reads (analytics pipelines, exports).
+
+        Reads are routed to secondaries when available, bounded by
+        MONGODB_ANALYTICS_MAX_STALENESS_SECONDS, so scans do not compete with
+        intake writes on the primary.
+        """
+        return self.get_collection(collection_name).with_options(
+            read_preference=_read_preference(
+                settings.MONGODB_ANALYTICS_READ_PREFERENCE,
+                settings.MONGODB_ANALYTICS_MAX_STALENESS_SECONDS,
+            )
+        )
+
+    def get_intake_collection(self, collection_name: str) -> Collection:
+        """Get a collection for intake writes: primary reads, intake write concern."""
+        return self.get_collection(collection_name).with_options(
+            read_preference=Primary(),
+            write_concern=_write_concern(
+                settings.MONGODB_INTAKE_WRITE_CONCERN_W,
+                settings.MONGODB_INTAKE_WRITE_CONCERN_J,
+            ),
+        )
+
 
 mongodb = MongoDB()
@@ -0,0 +1,260 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.core.database import mongodb
+from app.core.geo import lon_lat
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def _point(value: Any) -> Dict[str, Optional[float]]:
+    point = lon_lat(value)
+    return {"lon": point[0], "lat": point[1]} if point else {"lon": None, "lat": None}
+
+
+def _explode(row: Dict[str, Any], column: str, values: List[Any]) -> List[Dict[str, Any]]:
+    """One row per list value, or a single row with a null value for empty lists."""
+    return [{**row, column: value} for value in values] if values else [{**row, column: None}]
+
+
+def _case_rows(doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    location = doc.get("location") or {}
+    row = {
+        "case_id": doc.get("case_id"),
+        "title": doc.get("title"),
+        "status": doc.get("status"),
+        "priority": doc.get("priority"),
+        "country": location.get("country"),
+        "region": location.get("region"),
+        **_point(location.get("coordinates")),
+        "date_occurred": doc.get("date_occurred"),
+        "date_reported": doc.get("date_reported"),
+        "victim_count": len(doc.get("victims") or []),
+        "perpetrator_count": len(doc.get("perpetrators") or []),
+        # Cases whose evidence lives in the evidence collection only carry the count
+        "evidence_count": doc.get("evidence_count") or len(doc.get("evidence") or []),
+        "created_at": doc.get("created_at"),
+        "updated_at": doc.get("updated_at"),
+    }
+    return _explode(row, "violation_type", doc.get("violation_types") or [])
+
+
+def _report_rows(doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    details = doc.get("incident_details") or {}
+    location = details.get("location") or {}
+    row = {
+        "report_id": doc.get("report_id"),
+        "reporter_type": doc.get("reporter_type"),
+        "anonymous": doc.get("anonymous"),
+        "status": doc.get("status"),
+        "case_id": doc.get("case_id"),
+        "incident_date": details.get("date"),
+        "country": location.get("country"),
+        "city": location.get("city"),
+        **_point(location.get("coordinates")),
+        "evidence_count": len(doc.get("evidence") or []),
+        "created_at": doc.get("created_at"),
+        "updated_at": doc.get("updated_at"),
+    }
+    return _explode(row, "violation_type", details.get("violation_types") or [])
+
+
+def _victim_rows(doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+    demographics = doc.get("demographics") or {}
+    risk = doc.get("risk_assessment") or {}
+    row = {
+        "victim_id": str(doc.get("_id")),
+        "type": doc.get("type"),
+        "anonymous": doc.get("anonymous"),
+        "gender": demographics.get("gender"),
+        "age": demographics.get("age"),
+        "ethnicity": demographics.get("ethnicity"),
+        "occupation": demographics.get("occupation"),
+        "risk_level": risk.get("level"),
+        "protection_needed": risk.get("protection_needed"),
+        "support_service_count": len(doc.get("support_services") or []),
+        "created_at": doc.get("created_at"),
+        "updated_at": doc.get("updated_at"),
+    }
+    return _explode(row, "case_id", doc.get("cases_involved") or [])
+
+
+# Schemas are built lazily so the module imports without pyarrow installed
+ENTITIES: Dict[str, Dict[str, Any]] = {
+    "cases": {
+        "collection": "cases",
+        "rows": _case_rows,
+        "country_field": "location.country",
+        "date_field": "date_occurred",
+        "schema": lambda: pa.schema([
+            ("case_id", pa.string()), ("title", pa.string()), ("status", pa.string()),
+            ("priority", pa.string()), ("country", pa.string()), ("region", pa.string()),
+            ("lon", pa.float64()), ("lat", pa.float64()),
+            ("date_occurred", pa.timestamp("ms")), ("date_reported", pa.timestamp("ms")),
+            ("victim_count", pa.int32()), ("perpetrator_count", pa.int32()), ("evidence_count", pa.int32()),
+            ("created_at", pa.timestamp("ms")), ("updated_at", pa.timestamp("ms")), ("violation_type", pa.string()),
+        ]),
+    },
+    "reports": {
+        "collection": "incident_reports",
+        "rows": _report_rows,
+        "country_field": "incident_details.location.country",
+        "date_field": "incident_details.date",
+        "schema": lambda: pa.schema([
+            ("report_id", pa.string()), ("reporter_type", pa.string()), ("anonymous", pa.bool_()),
+            ("status", pa.string()), ("case_id", pa.string()), ("incident_date", pa.timestamp("ms")),
+            ("country", pa.string()), ("city", pa.string()), ("lon", pa.float64()), ("lat", pa.float64()),
+            ("evidence_count", pa.int32()), ("created_at", pa.timestamp("ms")), ("updated_at", pa.timestamp("ms")),
+            ("violation_type", pa.string()),
+        ]),
+    },
+    "victims": {
+        "collection": "victims",
+        "rows": _victim_rows,
+        "country_field": None,
+        "date_field": "created_at",
+        "schema": lambda: pa.schema([
+            ("victim_id", pa.string()), ("type", pa.string()), ("anonymous", pa.bool_()),
+            ("gender", pa.string()), ("age", pa.int32()), ("ethnicity", pa.string()),
+            ("occupation", pa.string()), ("risk_level", pa.string()), ("protection_needed", pa.bool_()),
+            ("support_service_count", pa.int32()), ("created_at", pa.timestamp("ms")), ("updated_at", pa.timestamp("ms")),
+            ("case_id", pa.string()),
+        ]),
+    },
+}
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Columnar export requires pyarrow: pip install pyarrow")
+
+
+def build_query(
+    entity: str,
+    country: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Translate the common export filters to a query on the entity's collection."""
+    spec = ENTITIES[entity]
+    query: Dict[str, Any] = {}
+    if country and spec["country_field"]:
+        query[spec["country_field"]] = country
+    date_query = {}
+    if start_date:
+        date_query["$gte"] = start_date
+    if end_date:
+        date_query["$lte"] = end_date
+    if date_query:
+        query[spec["date_field"]] = date_query
+    return query
+
+
+def iter_record_batches(
+    entity: str,
+    query: Optional[Dict[str, Any]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> Iterator["pa.RecordBatch"]:
+    """
+    Stream an entity as flattened Arrow record batches.
+
+    Documents are read with a cursor and converted `batch_size` rows at a time,
+    so memory use is bounded by one batch regardless of the extract size.
+    `on_batch` is called with the number of source documents after each batch.
+    """
+    require_pyarrow()
+    spec = ENTITIES[entity]
+    schema = spec["schema"]()
+    collection = mongodb.get_analytics_collection(spec["collection"])
+    cursor = collection.find(query or {}).batch_size(batch_size)
+
+    rows: List[Dict[str, Any]] = []
+    documents = 0
+    for doc in cursor:
+        rows.extend(spec["rows"](doc))
+        documents += 1
+        if len(rows) >= batch_size:
+            yield pa.RecordBatch.from_pylist(rows, schema=schema)
+            rows = []
+            if on_batch:
+                on_batch(documents)
+    if rows:
+        yield pa.RecordBatch.from_pylist(rows, schema=schema)
+    if on_batch:
+        on_batch(documents)
+
+
+class _ChunkSink:
+    """Write-only file object that collects bytes until they are drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def arrow_ipc_stream(entity: str, query: Optional[Dict[str, Any]] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    """Yield an Arrow IPC stream for the entity, one chunk per record batch."""
+    require_pyarrow()
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, ENTITIES[entity]["schema"]()) as writer:
+        for batch in iter_record_batches(entity, query, batch_size):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def write_parquet(
+    entity: str,
+    path: str,
+    query: Optional[Dict[str, Any]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Write the entity to a Parquet file batch by batch and return the row count."""
+    require_pyarrow()
+    rows = 0
+    with pq.ParquetWriter(path, ENTITIES[entity]["schema"](), compression="zstd") as writer:
+        for batch in iter_record_batches(entity, query, batch_size, on_batch):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def write_arrow_file(
+    entity: str,
+    path: str,
+    query: Optional[Dict[str, Any]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Write the entity to an Arrow IPC stream file and return the row count."""
+    require_pyarrow()
+    rows = 0
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_stream(sink, ENTITIES[entity]["schema"]()) as writer:
+        for batch in iter_record_batches(entity, query, batch_size, on_batch):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
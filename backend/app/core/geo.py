@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def lon_lat(value: Any) -> Optional[Tuple[float, float]]:
+    """
+    Extract (longitude, latitude) from a stored coordinates value.
+
+    Accepts GeoJSON points ({"type": "Point", "coordinates": [lon, lat]}),
+    bare [lon, lat] pairs and the free-form {"lat": .., "lon"/"lng": ..}
+    dictionaries found on older incident reports.
+    """
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        if "coordinates" in value:
+            return lon_lat(value["coordinates"])
+        lat = value.get("lat", value.get("latitude"))
+        lon = value.get("lon", value.get("lng", value.get("longitude")))
+        if lat is None or lon is None:
+            return None
+        value = [lon, lat]
+    if isinstance(value, (list, tuple)) and len(value) >= 2:
+        try:
+            lon, lat = float(value[0]), float(value[1])
+        except (TypeError, ValueError):
+            return None
+        if -180 <= lon <= 180 and -90 <= lat <= 90:
+            return lon, lat
+    return None
+
+
+def geojson_point(value: Any) -> Optional[Dict[str, Any]]:
+    """Normalize any supported coordinates value to a GeoJSON Point, or None."""
+    point = lon_lat(value)
+    return {"type": "Point", "coordinates": [point[0], point[1]]} if point else None
+
+
+def bbox_polygon(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> Dict[str, Any]:
+    """GeoJSON polygon for a lon/lat bounding box, for $geoWithin on 2dsphere indexes."""
+    return {
+        "type": "Polygon",
+        "coordinates": [[
+            [min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]
+        ]],
+    }
+
+
+def near_pipeline(
+    key: str,
+    lon: float,
+    lat: float,
+    radius_km: float,
+    date_field: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    query: Optional[Dict[str, Any]] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """
+    Build a $geoNear pipeline for documents within `radius_km` of a point.
+
+    The date window is pushed into $geoNear's query so the compound 2dsphere
+    index answers both conditions. Results carry `distance_m` and are sorted
+    nearest first.
+    """
+    geo_query = dict(query or {})
+    if start_date or end_date:
+        geo_query[date_field] = {
+            **({"$gte": start_date} if start_date else {}),
+            **({"$lte": end_date} if end_date else {}),
+        }
+    return [
+        {"$geoNear": {
+            "near": {"type": "Point", "coordinates": [lon, lat]},
+            "key": key,
+            "distanceField": "distance_m",
+            "maxDistance": radius_km * 1000,
+            "spherical": True,
+            "query": geo_query,
+        }},
+        {"$limit": limit},
+    ]
@@ -0,0 +1,308 @@
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.core.database import mongodb
+from app.core.geo import lon_lat
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON = 111.320
+EPOCH = datetime(1970, 1, 1)
+
+# Grid cells are packed into one int64: 20 bits per axis, offset to stay positive
+_AXIS_BITS = 20
+_AXIS_OFFSET = 1 << (_AXIS_BITS - 1)
+# Spatial cells are eps / sqrt(2) wide, so neighbours can be up to two cells away
+_NEIGHBOR_OFFSETS = [(dx, dy, dt) for dx in range(-2, 3) for dy in range(-2, 3) for dt in (-1, 0, 1)]
+_PAIR_CHUNK = 1 << 22  # Candidate pairs checked per vectorized step
+
+SOURCES = {
+    "cases": {
+        "collection": "cases",
+        "country_field": "location.country",
+        "date_field": "date_occurred",
+        "violation_field": "violation_types",
+        "projection": {"location.coordinates": 1, "date_occurred": 1, "violation_types": 1},
+        "coordinates": lambda doc: (doc.get("location") or {}).get("coordinates"),
+        "date": lambda doc: doc.get("date_occurred"),
+        "violations": lambda doc: doc.get("violation_types") or [],
+    },
+    "reports": {
+        "collection": "incident_reports",
+        "country_field": "incident_details.location.country",
+        "date_field": "incident_details.date",
+        "violation_field": "incident_details.violation_types",
+        "projection": {
+            "incident_details.location.coordinates": 1,
+            "incident_details.date": 1,
+            "incident_details.violation_types": 1,
+        },
+        "coordinates": lambda doc: ((doc.get("incident_details") or {}).get("location") or {}).get("coordinates"),
+        "date": lambda doc: (doc.get("incident_details") or {}).get("date"),
+        "violations": lambda doc: (doc.get("incident_details") or {}).get("violation_types") or [],
+    },
+}
+
+
+def _pack(cx, cy, ct):
+    return (
+        ((cx + _AXIS_OFFSET) << (2 * _AXIS_BITS))
+        | ((cy + _AXIS_OFFSET) << _AXIS_BITS)
+        | (ct + _AXIS_OFFSET)
+    )
+
+
+def load_points(
+    sources: List[str],
+    country: Optional[str] = None,
+    violation_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Read geolocated, dated incidents into flat NumPy arrays.
+
+    Violation types are kept as (point index, type code) pairs so per-cluster
+    counts can be computed with a single bincount.
+    """
+    lon, lat, days, source_codes = [], [], [], []
+    violation_point, violation_code = [], []
+    type_codes: Dict[str, int] = {}
+
+    for source_code, name in enumerate(sources):
+        spec = SOURCES[name]
+        query: Dict[str, Any] = {spec["date_field"]: {"$ne": None}}
+        if country:
+            query[spec["country_field"]] = country
+        if violation_type:
+            query[spec["violation_field"]] = violation_type
+        if start_date or end_date:
+            query[spec["date_field"]] = {
+                **({"$gte": start_date} if start_date else {}),
+                **({"$lte": end_date} if end_date else {}),
+            }
+
+        collection = mongodb.get_analytics_collection(spec["collection"])
+        for doc in collection.find(query, spec["projection"]).batch_size(10000):
+            point = lon_lat(spec["coordinates"](doc))
+            when = spec["date"](doc)
+            if point is None or not isinstance(when, datetime):
+                continue
+            index = len(lon)
+            lon.append(point[0])
+            lat.append(point[1])
+            days.append((when - EPOCH).total_seconds() / 86400.0)
+            source_codes.append(source_code)
+            for violation in spec["violations"](doc):
+                violation_point.append(index)
+                violation_code.append(type_codes.setdefault(str(violation), len(type_codes)))
+
+    return {
+        "lon": np.asarray(lon, dtype=np.float64),
+        "lat": np.asarray(lat, dtype=np.float64),
+        "days": np.asarray(days, dtype=np.float64),
+        "source": np.asarray(source_codes, dtype=np.int8),
+        "violation_point": np.asarray(violation_point, dtype=np.int64),
+        "violation_code": np.asarray(violation_code, dtype=np.int64),
+        "violation_types": sorted(type_codes, key=type_codes.get),
+        "sources": sources,
+    }
+
+
+def _cell_index(keys, points):
+    """Points sorted by cell, with the distinct cells, their start offsets and sizes."""
+    order = points[np.argsort(keys[points], kind="stable")]
+    cells, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    return order, cells, starts, counts
+
+
+def _candidate_pairs(keys, source, target):
+    """
+    Yield (i, j) arrays pairing every point of `source` with every point of
+    `target` in the same or a neighboring cell, at most about _PAIR_CHUNK
+    pairs at a time.
+    """
+    if not len(source) or not len(target):
+        return
+    s_order, s_cells, s_starts, s_counts = _cell_index(keys, source)
+    t_order, t_cells, t_starts, t_counts = _cell_index(keys, target)
+    for dx, dy, dt in _NEIGHBOR_OFFSETS:
+        wanted = s_cells + (dx << (2 * _AXIS_BITS)) + (dy << _AXIS_BITS) + dt
+        index = np.minimum(np.searchsorted(t_cells, wanted), len(t_cells) - 1)
+        source_cells = np.nonzero(t_cells[index] == wanted)[0]
+        target_cells = index[source_cells]
+        sizes = s_counts[source_cells] * t_counts[target_cells]
+        ends = np.cumsum(sizes)
+        first = 0
+        while first < len(sizes):
+            done = ends[first - 1] if first else 0
+            last = max(int(np.searchsorted(ends, done + _PAIR_CHUNK, side="right")), first + 1)
+            a, b, n = source_cells[first:last], target_cells[first:last], sizes[first:last]
+            pair_cell = np.repeat(np.arange(len(n)), n)
+            within = np.arange(int(n.sum())) - np.repeat(np.cumsum(n) - n, n)
+            width = t_counts[b][pair_cell]
+            yield (
+                s_order[s_starts[a][pair_cell] + within // width],
+                t_order[t_starts[b][pair_cell] + within % width],
+            )
+            first = last
+
+
+def _neighbor_pairs(x, y, days, keys, source, target, eps_km: float, eps_days: float):
+    """Candidate pairs filtered to those within eps_km and eps_days of each other."""
+    for i, j in _candidate_pairs(keys, source, target):
+        near = ((x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 <= eps_km ** 2) & (np.abs(days[i] - days[j]) <= eps_days)
+        yield i[near], j[near]
+
+
+def cluster_points(lon, lat, days, eps_km: float, eps_days: float, min_samples: int):
+    """
+    DBSCAN over (x km, y km, time) and return a label per point (-1 = noise).
+
+    Two points are neighbors when they are within `eps_km` and `eps_days`
+    of each other; a point with at least `min_samples` neighbors (itself
+    included) is core. Points are binned into cells eps_km / sqrt(2) wide and
+    eps_days long, whose diagonal is eps: points sharing a cell are always
+    neighbors, so a cell holding `min_samples` points is core as a whole and
+    its core points are connected. Only candidate pairs from nearby cells are
+    measured, in vectorized chunks, to count the remaining points' neighbors,
+    to link core points across cells and to attach border points.
+    """
+    n_points = len(lon)
+    if n_points == 0:
+        return np.empty(0, dtype=np.int64)
+
+    x = lon * KM_PER_DEGREE_LON * np.cos(np.radians(lat))
+    y = lat * KM_PER_DEGREE_LAT
+    size = eps_km / math.sqrt(2)
+    keys = _pack(
+        np.floor(x / size).astype(np.int64),
+        np.floor(y / size).astype(np.int64),
+        np.floor(days / eps_days).astype(np.int64),
+    )
+    cells, point_cell, cell_counts = np.unique(keys, return_inverse=True, return_counts=True)
+    point_cell = point_cell.ravel()
+    n_cells = len(cells)
+    everyone = np.arange(n_points)
+
+    def pairs(source, target):
+        return _neighbor_pairs(x, y, days, keys, source, target, eps_km, eps_days)
+
+    core = cell_counts[point_cell] >= min_samples
+    sparse = np.nonzero(~core)[0]
+    if len(sparse):
+        counts = np.zeros(n_points, dtype=np.int64)
+        for i, _ in pairs(sparse, everyone):
+            counts += np.bincount(i, minlength=n_points)
+        core |= counts >= min_samples
+    core_points = np.nonzero(core)[0]
+
+    # Connected components of cells linked by a pair of core points within eps
+    links = []
+    for i, j in pairs(core_points, core_points):
+        a, b = point_cell[i], point_cell[j]
+        across = a != b
+        links.append(np.unique(a[across] * n_cells + b[across]))
+    labels = np.arange(n_cells)
+    if links:
+        linked = np.unique(np.concatenate(links))
+        source, target = linked // n_cells, linked % n_cells
+        while True:
+            previous = labels.copy()
+            np.minimum.at(labels, source, labels[target])
+            labels = labels[labels]
+            if np.array_equal(labels, previous):
+                break
+
+    point_labels = np.full(n_points, -1, dtype=np.int64)
+    point_labels[core] = labels[point_cell[core]]
+    # Border points join the lowest-labelled cluster with a core point within eps
+    border_labels = np.full(n_points, np.iinfo(np.int64).max)
+    for i, j in pairs(np.nonzero(~core)[0], core_points):
+        np.minimum.at(border_labels, i, point_labels[j])
+    is_border = border_labels != np.iinfo(np.int64).max
+    point_labels[is_border] = border_labels[is_border]
+    return point_labels
+
+
+def summarize_clusters(points: Dict[str, Any], labels, min_cluster_size: int, limit: int) -> List[Dict[str, Any]]:
+    """Aggregate per-cluster size, centroid, extent and violation counts with NumPy reductions."""
+    clustered = labels >= 0
+    if not clustered.any():
+        return []
+
+    cluster_ids, dense = np.unique(labels[clustered], return_inverse=True)
+    dense = dense.ravel()
+    n_clusters = len(cluster_ids)
+    lon, lat, days = points["lon"][clustered], points["lat"][clustered], points["days"][clustered]
+
+    sizes = np.bincount(dense, minlength=n_clusters)
+    mean_lon = np.bincount(dense, weights=lon, minlength=n_clusters) / sizes
+    mean_lat = np.bincount(dense, weights=lat, minlength=n_clusters) / sizes
+
+    def extreme(values, reducer, initial):
+        out = np.full(n_clusters, initial)
+        reducer.at(out, dense, values)
+        return out
+
+    min_lon, max_lon = extreme(lon, np.minimum, np.inf), extreme(lon, np.maximum, -np.inf)
+    min_lat, max_lat = extreme(lat, np.minimum, np.inf), extreme(lat, np.maximum, -np.inf)
+    first_day, last_day = extreme(days, np.minimum, np.inf), extreme(days, np.maximum, -np.inf)
+
+    source_counts = np.zeros((n_clusters, len(points["sources"])), dtype=np.int64)
+    np.add.at(source_counts, (dense, points["source"][clustered]), 1)
+
+    # Violation type counts per cluster from the exploded (point, type) pairs
+    n_types = len(points["violation_types"])
+    type_counts = np.zeros((n_clusters, max(n_types, 1)), dtype=np.int64)
+    if n_types:
+        dense_by_point = np.full(len(labels), -1)
+        dense_by_point[clustered] = dense
+        pair_cluster = dense_by_point[points["violation_point"]]
+        keep = pair_cluster >= 0
+        np.add.at(type_counts, (pair_cluster[keep], points["violation_code"][keep]), 1)
+
+    order = np.argsort(-sizes, kind="stable")
+    hotspots = []
+    for rank, cluster in enumerate(order[sizes[order] >= min_cluster_size][:limit]):
+        hotspots.append({
+            "cluster_id": rank + 1,
+            "size": int(sizes[cluster]),
+            "counts_by_source": {
+                name: int(source_counts[cluster, code]) for code, name in enumerate(points["sources"])
+            },
+            "centroid": [round(float(mean_lon[cluster]), 6), round(float(mean_lat[cluster]), 6)],
+            "bbox": [float(min_lon[cluster]), float(min_lat[cluster]), float(max_lon[cluster]), float(max_lat[cluster])],
+            "start_date": EPOCH + timedelta(days=float(first_day[cluster])),
+            "end_date": EPOCH + timedelta(days=float(last_day[cluster])),
+            "violation_types": {
+                points["violation_types"][code]: int(count)
+                for code, count in enumerate(type_counts[cluster][:n_types]) if count
+            },
+        })
+    return hotspots
+
+
+def find_hotspots(
+    sources: List[str],
+    eps_km: float,
+    eps_days: float,
+    min_samples: int,
+    min_cluster_size: int,
+    limit: int,
+    country: Optional[str] = None,
+    violation_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Load the matching incidents, cluster them and summarize the largest clusters."""
+    if np is None:
+        raise RuntimeError("Hotspot clustering requires numpy: pip install numpy")
+    points = load_points(sources, country, violation_type, start_date, end_date)
+    labels = cluster_points(points["lon"], points["lat"], points["days"], eps_km, eps_days, min_samples)
+    return summarize_clusters(points, labels, min_cluster_size, limit)
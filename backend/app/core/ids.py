@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+# Crockford base32: no I, L, O or U, so IDs survive being read out or typed
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+class UlidGenerator:
+    """
+    Monotonic ULID generator: 48-bit millisecond timestamp + 80 random bits,
+    encoded as 26 Crockford base32 characters.
+
+    IDs sort lexically by creation time. Within one millisecond the random
+    part is incremented instead of redrawn, so IDs from one process are
+    strictly increasing; IDs from different processes differ in their random
+    bits. New IDs therefore land at the right edge of the index.
+    """
+
+    def __init__(self):
+        self._last_ms = -1
+        self._last_random = 0
+        self._lock = threading.Lock()
+
+    def new(self, now_ms: Optional[int] = None) -> str:
+        with self._lock:
+            millis = now_ms if now_ms is not None else int(time.time() * 1000)
+            if millis <= self._last_ms:
+                # Same millisecond (or the clock stepped back): keep ordering
+                millis = self._last_ms
+                random = self._last_random + 1
+                if random >> _RANDOM_BITS:
+                    millis += 1
+                    random = int.from_bytes(os.urandom(10), "big")
+            else:
+                random = int.from_bytes(os.urandom(10), "big")
+            self._last_ms, self._last_random = millis, random
+        return _encode(millis, 10) + _encode(random, 16)
+
+
+ulid = UlidGenerator()
+
+
+def new_case_id(now: Optional[datetime] = None) -> str:
+    """Case ID such as HRM-2024-01HZX3M8Q6W0R5K8T2J9YQ4B7C."""
+    return f"HRM-{(now or datetime.now()).year}-{ulid.new()}"
+
+
+def new_report_id(now: Optional[datetime] = None) -> str:
+    """Report ID such as IR-2024-01HZX3M8Q6W0R5K8T2J9YQ4B7C."""
+    return f"IR-{(now or datetime.now()).year}-{ulid.new()}"
+
+
+def new_evidence_id() -> str:
+    """ID of an evidence item within a case or report, such as EV-01HZX3M8Q6W0R5K8T2J9YQ4B7C."""
+    return f"EV-{ulid.new()}"
+
+
+def new_service_id() -> str:
+    """ID of a support service entry of a victim, such as SVC-01HZX3M8Q6W0R5K8T2J9YQ4B7C."""
+    return f"SVC-{ulid.new()}"
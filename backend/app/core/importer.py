@@ -0,0 +1,523 @@
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from bson import ObjectId
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.core.database import mongodb
+from app.core.ids import new_case_id, new_evidence_id, new_report_id, new_service_id
+from app.core.intake import DUPLICATE_KEY
+from app.core.perpetrator_graph import case_perpetrator_keys
+from app.core.subdocuments import assign_ids
+from app.schemas.case import CaseCreate
+from app.schemas.report import ReportCreate, ReportStatus
+from app.schemas.victim import VictimCreate
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - optional dependency
+    openpyxl = None
+
+FORMATS = ["csv", "jsonl", "json", "xlsx"]
+_READ_CHUNK_BYTES = 1 << 20
+
+Row = Tuple[int, Dict[str, Any]]
+
+
+class MappingError(ValueError):
+    """Raised for a mapping file that cannot be applied."""
+
+
+class CheckpointMismatch(Exception):
+    """Raised when a checkpoint was written for another input file or mapping."""
+
+
+class InvalidRow(NamedTuple):
+    """Stands in for an input row that could not be decoded, so it is rejected like any other."""
+    error: str
+    text: str
+
+
+def _timestamps(data: Dict[str, Any]) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    data.update({"created_at": now, "updated_at": now, "version": 1})
+    return data
+
+
+def _case_document(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Evidence stays embedded; `migrate_subdocuments --move-case-evidence` moves it afterwards
+    assign_ids(data["evidence"], "evidence_id", new_evidence_id, keep_existing=False)
+    if not data.get("case_id"):
+        data["case_id"] = new_case_id()
+    data.update({
+        "created_by": "import",
+        "perpetrator_keys": case_perpetrator_keys(data["perpetrators"]),
+    })
+    return _timestamps(data)
+
+
+def _report_document(data: Dict[str, Any]) -> Dict[str, Any]:
+    if not data.get("report_id"):
+        data["report_id"] = new_report_id()
+    assign_ids(data["evidence"], "evidence_id", new_evidence_id, keep_existing=False)
+    data["status"] = data.get("status") or ReportStatus.NEW
+    return _timestamps(data)
+
+
+def _victim_document(data: Dict[str, Any]) -> Dict[str, Any]:
+    assign_ids(data["support_services"], "service_id", new_service_id, keep_existing=False)
+    return _timestamps(data)
+
+
+class Entity(NamedTuple):
+    collection: str
+    model: Type[BaseModel]
+    build: Callable[[Dict[str, Any]], Dict[str, Any]]  # Adds the fields the API assigns on create
+    kept: Tuple[str, ...] = ()  # Fields outside the create schema a mapping may fill, such as source IDs
+
+
+ENTITIES = {
+    "cases": Entity("cases", CaseCreate, _case_document, ("case_id",)),
+    "reports": Entity("incident_reports", ReportCreate, _report_document, ("case_id",)),
+    "victims": Entity("victims", VictimCreate, _victim_document),
+}
+
+
+def load_mapping(path: str) -> Dict[str, Any]:
+    """
+    Read and check a mapping file.
+
+    A mapping names the `entity` to create and, under `fields`, how to fill
+    each (dotted) field of its create schema from a row:
+
+        {"column": "Country"}                  value of one column
+        {"columns": ["Lon", "Lat"]}            list of several columns
+        {"value": "closed"}                    constant
+        "split": ";"                           split a text cell into a list
+        "map": {"Torture": "torture"}          translate values (each list item)
+        "format": "%d/%m/%Y"                   parse text dates with strptime
+        "default": "unknown"                   used when the cell is empty
+
+    Columns of JSON rows may be dotted paths into nested objects. Besides
+    the schema fields, `case_id` can be mapped for cases and reports: cases
+    keep the source system's IDs instead of getting new ones, so reports
+    (`case_id`) and victims (`cases_involved`) imported afterwards can
+    reference them.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            mapping = json.load(f)
+    except (OSError, ValueError) as e:
+        raise MappingError(f"Cannot read mapping {path}: {e}")
+    if not isinstance(mapping, dict) or mapping.get("entity") not in ENTITIES:
+        raise MappingError(f"Mapping needs an entity, one of: {', '.join(ENTITIES)}")
+    fields = mapping.get("fields")
+    if not isinstance(fields, dict) or not fields:
+        raise MappingError("Mapping needs a non-empty `fields` object")
+    for target, spec in fields.items():
+        if not isinstance(spec, dict) or len({"column", "columns", "value"} & set(spec)) != 1:
+            raise MappingError(f"Field {target}: give exactly one of column, columns or value")
+        if "columns" in spec and not isinstance(spec["columns"], list):
+            raise MappingError(f"Field {target}: columns must be a list")
+        if "map" in spec and not isinstance(spec["map"], dict):
+            raise MappingError(f"Field {target}: map must be an object")
+    return mapping
+
+
+def _source_value(row: Dict[str, Any], column: str) -> Any:
+    if column in row:
+        return row[column]
+    value: Any = row
+    for part in column.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip()) or value == []
+
+
+def _convert(value: Any, spec: Dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        if "split" in spec:
+            value = [part.strip() for part in value.split(spec["split"]) if part.strip()]
+    if isinstance(value, list):
+        return [_convert(item, {k: v for k, v in spec.items() if k != "split"}) for item in value]
+    if isinstance(value, str) and "map" in spec:
+        value = spec["map"].get(value, value)
+    if isinstance(value, str) and "format" in spec:
+        value = datetime.strptime(value, spec["format"])
+    return value
+
+
+def _set_path(data: Dict[str, Any], path: str, value: Any):
+    *parents, leaf = path.split(".")
+    for part in parents:
+        data = data.setdefault(part, {})
+    data[leaf] = value
+
+
+def apply_mapping(fields: Dict[str, Dict[str, Any]], row: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+    """Build the create payload for one row; empty cells are left out so the schema decides."""
+    data: Dict[str, Any] = {}
+    errors = []
+    for target, spec in fields.items():
+        if "value" in spec:
+            value = spec["value"]
+        elif "columns" in spec:
+            value = [_source_value(row, column) for column in spec["columns"]]
+            if any(_blank(item) for item in value):
+                value = None
+        else:
+            value = _source_value(row, spec["column"])
+        if not _blank(value):
+            try:
+                value = _convert(value, spec)
+            except ValueError as e:
+                errors.append({"field": target, "message": str(e)})
+                continue
+        if _blank(value):
+            if "default" not in spec:
+                continue
+            value = spec["default"]
+        _set_path(data, target, value)
+    return data, errors
+
+
+# Set in each validation process by the pool initializer
+_worker_entity: Optional[Entity] = None
+_worker_fields: Dict[str, Dict[str, Any]] = {}
+
+
+def _init_worker(entity: str, fields: Dict[str, Dict[str, Any]]):
+    global _worker_entity, _worker_fields
+    _worker_entity, _worker_fields = ENTITIES[entity], fields
+
+
+def validate_rows(rows: List[Row]) -> Tuple[List[Row], List[Dict[str, Any]]]:
+    """Map and validate a chunk of rows into (row number, document) pairs and rejections."""
+    documents, rejected = [], []
+    for number, row in rows:
+        if isinstance(row, InvalidRow):
+            rejected.append({"row": number, "errors": [{"field": "", "message": f"Invalid JSON: {row.error}"}], "data": row.text})
+            continue
+        if not isinstance(row, dict):
+            rejected.append({"row": number, "errors": [{"field": "", "message": "Row is not an object"}], "data": row})
+            continue
+        data, errors = apply_mapping(_worker_fields, row)
+        kept = {field: str(data.pop(field)) for field in _worker_entity.kept if field in data}
+        if not errors:
+            try:
+                model = _worker_entity.model(**data)
+            except ValidationError as e:
+                errors = [
+                    {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+                    for error in e.errors()
+                ]
+        if errors:
+            rejected.append({"row": number, "errors": errors, "data": row})
+        else:
+            documents.append((number, _worker_entity.build({**model.dict(), **kept})))
+    return documents, rejected
+
+
+def _read_csv(path: str, sheet: Optional[str]) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+
+def _read_jsonl(path: str, sheet: Optional[str]) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield InvalidRow(str(e), line.strip())
+
+
+def _value_end(text: str, start: int) -> Optional[int]:
+    """
+    End of the array item starting at `start`, found by matching brackets
+    outside strings without parsing it; None if it runs past `text`.
+    """
+    depth, in_string, escaped = 0, False, False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "[{":
+            depth += 1
+        elif char in "]}":
+            if depth == 0:
+                return index
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        elif char == "," and depth == 0:
+            return index
+    return None
+
+
+def _read_json(path: str, sheet: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Objects of a top-level JSON array, decoded one at a time instead of
+    loading the whole file. A malformed item becomes an InvalidRow and
+    reading resumes after its closing bracket.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buffer, position, started, eof = "", 0, False, False
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != "[":
+                    raise ValueError(f"{path} does not contain a JSON array")
+                started, position = True, position + 1
+                continue
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                # Only an item that is complete in the buffer is malformed; otherwise read on
+                end = _value_end(buffer, position)
+                if end is None and not eof:
+                    chunk = f.read(_READ_CHUNK_BYTES)
+                    eof = not chunk
+                    buffer, position = buffer[position:] + chunk, 0
+                    continue
+                yield InvalidRow(f"{e.msg} at character {e.pos - position + 1}", buffer[position:end].strip())
+                if end is None:
+                    return
+                position = end
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(buffer) and not eof and not isinstance(item, (dict, list)):
+                chunk = f.read(_READ_CHUNK_BYTES)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            yield item
+            position = end
+
+
+def _read_xlsx(path: str, sheet: Optional[str]) -> Iterator[Dict[str, Any]]:
+    if openpyxl is None:
+        raise RuntimeError("Reading .xlsx files requires openpyxl (pip install openpyxl)")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = (workbook[sheet] if sheet else workbook.active).iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, [])]
+        for values in rows:
+            if any(value is not None for value in values):
+                yield {column: value for column, value in zip(header, values) if column}
+    finally:
+        workbook.close()
+
+
+READERS = {"csv": _read_csv, "jsonl": _read_jsonl, "json": _read_json, "xlsx": _read_xlsx}
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return {"ndjson": "jsonl"}.get(extension, extension)
+
+
+def read_rows(path: str, file_format: str, sheet: Optional[str] = None, skip: int = 0) -> Iterator[Row]:
+    """Stream (row number, row) pairs, numbered from 1 in file order, after the first `skip`."""
+    for number, row in enumerate(READERS[file_format](path, sheet), start=1):
+        if number > skip:
+            yield number, row
+
+
+class Checkpoint:
+    """
+    Progress of one import, written atomically before the first insert and
+    after every batch.
+
+    `rows` is the number of leading input rows that are fully handled:
+    inserted, already present, or written to the error file, which is cut
+    back to `errors_offset` on resume. Each document's
+    _id is derived from the import run and its row number, so rows of a
+    batch that was inserted but not yet checkpointed are recognised as
+    duplicates when the import resumes. The first save records the run
+    before anything is inserted, so even a crash during the first batch is
+    resumed with the same _ids.
+    """
+
+    def __init__(self, path: str, source: Dict[str, Any]):
+        self.path = path
+        self.source = source
+        self.run = ObjectId().binary[:8]
+        self.rows = 0
+        self.errors_offset = 0
+        self.counts = {"inserted": 0, "existing": 0, "rejected": 0}
+
+    def load(self) -> bool:
+        """Resume from the file if there is one; False when starting fresh."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            state = json.load(f)
+        if state["source"] != self.source:
+            raise CheckpointMismatch(
+                f"{self.path} belongs to another input file or mapping; remove it or pass --restart"
+            )
+        self.run = bytes.fromhex(state["run"])
+        self.rows = state["rows"]
+        self.errors_offset = state["errors_offset"]
+        self.counts = state["counts"]
+        return True
+
+    def document_id(self, row: int) -> ObjectId:
+        # 4-byte timestamp and 4 random bytes of the run, then the row number
+        return ObjectId(self.run + row.to_bytes(4, "big"))
+
+    def save(self):
+        state = {"source": self.source, "run": self.run.hex(), "rows": self.rows, "errors_offset": self.errors_offset, "counts": self.counts}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+def insert_unordered(collection_name: str, documents: List[Dict[str, Any]]) -> Tuple[int, int, Dict[int, str]]:
+    """
+    Insert a batch in one unordered bulk write.
+
+    Returns (inserted, already present, {batch index: error}); documents
+    whose _id exists are from an earlier attempt, other duplicate keys
+    (a report_id already taken) are conflicts.
+    """
+    if not documents:
+        return 0, 0, {}
+    try:
+        result = mongodb.get_collection(collection_name).insert_many(documents, ordered=False)
+        return len(result.inserted_ids), 0, {}
+    except BulkWriteError as e:
+        if e.details.get("writeConcernErrors"):
+            raise
+        existing, conflicts = 0, {}
+        for error in e.details.get("writeErrors", []):
+            if error.get("code") != DUPLICATE_KEY:
+                raise
+            if "_id" in (error.get("keyPattern") or {"_id": 1}):
+                existing += 1
+            else:
+                conflicts[error["index"]] = error.get("errmsg", "Duplicate key")
+        return e.details.get("nInserted", 0), existing, conflicts
+
+
+def _chunks(rows: Iterator[Row], size: int) -> Iterator[List[Row]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_file(
+    path: str,
+    mapping: Dict[str, Any],
+    file_format: str,
+    checkpoint: Checkpoint,
+    errors_path: str,
+    sheet: Optional[str] = None,
+    workers: int = 0,
+    batch_size: int = 1000,
+    dry_run: bool = False,
+    resume: bool = False,
+    on_batch: Optional[Callable[[int, Dict[str, int]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Stream `path` through the mapping and insert the valid rows.
+
+    Chunks of `batch_size` rows are validated in a process pool while the
+    previous ones are written, each as one unordered bulk insert; results
+    are written in input order, so the checkpoint always covers a prefix of
+    the file. Rejected rows go to `errors_path` as JSON lines with their row
+    number, errors and original cells. A dry run validates without writing
+    anything but the error file. With `resume` the rows covered by the
+    checkpoint are skipped and the error file is appended to.
+    """
+    entity = ENTITIES[mapping["entity"]]
+    workers = workers or os.cpu_count() or 1
+    rows = read_rows(path, file_format, sheet, skip=checkpoint.rows if resume else 0)
+
+    with open(errors_path, "a" if resume else "w", encoding="utf-8") as errors_file, ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(mapping["entity"], mapping["fields"])
+    ) as pool:
+        if resume:
+            # Drop rejections of rows after the checkpoint; they are rewritten below
+            errors_file.truncate(checkpoint.errors_offset)
+        elif not dry_run:
+            checkpoint.save()
+
+        def write(last_row: int, documents: List[Row], rejected: List[Dict[str, Any]]):
+            if not dry_run:
+                batch = [{**document, "_id": checkpoint.document_id(number)} for number, document in documents]
+                inserted, existing, conflicts = insert_unordered(entity.collection, batch)
+                for index, message in conflicts.items():
+                    number, document = documents[index]
+                    rejected.append({"row": number, "errors": [{"field": "", "message": message}], "data": document})
+                checkpoint.counts["inserted"] += inserted
+                checkpoint.counts["existing"] += existing
+            else:
+                checkpoint.counts["inserted"] += len(documents)
+            for rejection in sorted(rejected, key=lambda r: r["row"]):
+                errors_file.write(json.dumps(rejection, default=str) + "\n")
+            errors_file.flush()
+            checkpoint.counts["rejected"] += len(rejected)
+            checkpoint.rows = last_row
+            checkpoint.errors_offset = errors_file.tell()
+            if not dry_run:
+                os.fsync(errors_file.fileno())
+                checkpoint.save()
+            if on_batch:
+                on_batch(checkpoint.rows, checkpoint.counts)
+
+        # Keep a couple of chunks per worker queued; bounded so memory stays flat
+        in_flight = deque()
+        for chunk in _chunks(rows, batch_size):
+            in_flight.append((chunk[-1][0], pool.submit(validate_rows, chunk)))
+            if len(in_flight) >= 2 * workers:
+                last_row, future = in_flight.popleft()
+                write(last_row, *future.result())
+        while in_flight:
+            last_row, future = in_flight.popleft()
+            write(last_row, *future.result())
+    return checkpoint.counts
+
+
+def source_fingerprint(path: str, mapping: Dict[str, Any]) -> Dict[str, Any]:
+    """Identifies an input file revision and mapping, so a checkpoint is only resumed against the same ones."""
+    stat = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime": int(stat.st_mtime),
+        "mapping": mapping,
+    }
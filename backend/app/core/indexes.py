@@ -0,0 +1,120 @@
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.config import settings
+from app.core.database import mongodb
+
+# (collection, keys, options) for every index the API relies on
+INDEXES = [
+    ("cases", [("case_id", ASCENDING)], {"unique": True}),
+    ("cases", [("location.coordinates", GEOSPHERE), ("date_occurred", ASCENDING)], {}),
+    ("cases", [("perpetrator_keys", ASCENDING), ("date_occurred", DESCENDING)], {}),
+    ("cases", [("updated_at", ASCENDING), ("_id", ASCENDING)], {}),
+    ("cases", [("status", ASCENDING), ("updated_at", ASCENDING)], {}),
+    ("cases", [("created_at", DESCENDING), ("case_id", DESCENDING)], {}),
+
+    # Archives only serve fall-through lookups and include_archived queries
+    ("cases_archive", [("case_id", ASCENDING)], {"unique": True}),
+    ("cases_archive", [("perpetrator_keys", ASCENDING), ("date_occurred", DESCENDING)], {}),
+    ("victims_archive", [("cases_involved", ASCENDING)], {}),
+    ("incident_reports_archive", [("report_id", ASCENDING)], {"unique": True}),
+    ("incident_reports_archive", [("case_id", ASCENDING)], {"sparse": True}),
+
+    ("perpetrators", [("case_count", DESCENDING)], {}),
+    ("perpetrator_edges", [("a", ASCENDING), ("weight", DESCENDING)], {}),
+    ("perpetrator_edges", [("b", ASCENDING), ("weight", DESCENDING)], {}),
+    ("perpetrator_edges", [("weight", DESCENDING)], {}),
+
+    ("evidence", [("case_id", ASCENDING), ("_id", ASCENDING)], {}),
+
+    ("victims", [("cases_involved", ASCENDING)], {}),
+    ("victims", [("updated_at", ASCENDING), ("_id", ASCENDING)], {}),
+
+    ("incident_reports", [("report_id", ASCENDING)], {"unique": True}),
+    ("incident_reports", [("case_id", ASCENDING)], {"sparse": True}),
+    ("incident_reports", [("updated_at", ASCENDING), ("_id", ASCENDING)], {}),
+    ("incident_reports", [("created_at", DESCENDING), ("report_id", DESCENDING)], {}),
+    ("incident_reports", [("incident_details.location.coordinates", GEOSPHERE), ("incident_details.date", ASCENDING)], {}),
+
+    ("users", [("username", ASCENDING)], {"unique": True}),
+
+    ("tombstones", [("deleted_at", ASCENDING), ("_id", ASCENDING)], {}),
+    ("tombstones", [("entity", ASCENDING), ("key", ASCENDING)], {}),
+    ("tombstones", [("deleted_at", ASCENDING)], {"expireAfterSeconds": settings.SYNC_TOMBSTONE_RETENTION_DAYS * 86400}),
+
+    ("jobs", [("status", ASCENDING), ("priority", DESCENDING), ("created_at", ASCENDING)], {}),
+    ("jobs", [("created_at", DESCENDING)], {}),
+    ("jobs", [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+
+    ("anomalies", [("detected_at", DESCENDING)], {}),
+    ("anomalies", [("region", ASCENDING), ("violation_type", ASCENDING), ("detected_at", DESCENDING)], {}),
+    ("anomaly_state", [("region", ASCENDING), ("violation_type", ASCENDING)], {"unique": True}),
+]
+
+
+# Server error codes for an existing index with the same keys but other options
+INDEX_CONFLICT_CODES = (85, 86)
+
+
+def pending_unique_upgrades() -> List[Tuple[str, List[Tuple[str, int]]]]:
+    """(collection, keys) of unique indexes that exist as plain indexes from an older release."""
+    pending = []
+    for collection_name, keys, options in INDEXES:
+        if not options.get("unique"):
+            continue
+        key = dict(keys)
+        for index in mongodb.get_collection(collection_name).list_indexes():
+            if dict(index["key"]) == key and not index.get("unique"):
+                pending.append((collection_name, keys))
+    return pending
+
+
+def duplicate_values(collection, keys, limit: int = 10) -> List[Dict[str, Any]]:
+    """Up to `limit` key values stored more than once, with their counts."""
+    group_id = {field.replace(".", "_"): f"${field}" for field, _ in keys}
+    return list(collection.aggregate([
+        {"$group": {"_id": group_id, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit},
+    ], allowDiskUse=True))
+
+
+def upgrade_to_unique(collection, keys):
+    """
+    Replace an existing non-unique index on `keys` with a unique one.
+
+    Callers check for duplicates first. If the unique build still fails
+    (a duplicate written meanwhile), the plain index is restored.
+    """
+    collection.drop_index(keys)
+    try:
+        collection.create_index(keys, unique=True)
+    except PyMongoError:
+        collection.create_index(keys)
+        raise
+
+
+def ensure_indexes():
+    """
+    Create the indexes the API relies on. Safe to run on every startup.
+
+    A unique index that exists as a plain one is left alone and reported;
+    `python -m app.cli.upgrade_unique_indexes` checks for duplicates and
+    upgrades it once, instead of every worker rebuilding it on each start.
+    """
+    for collection_name, keys, options in INDEXES:
+        collection = mongodb.get_collection(collection_name)
+        try:
+            collection.create_index(keys, **options)
+        except OperationFailure as e:
+            if e.code in INDEX_CONFLICT_CODES and options.get("unique"):
+                print(
+                    f"Index {keys} on {collection_name} is not unique yet; "
+                    "run python -m app.cli.upgrade_unique_indexes"
+                )
+            else:
+                print(f"Could not create index {keys} on {collection_name}: {e}")
+        except PyMongoError as e:
+            print(f"Could not create index {keys} on {collection_name}: {e}")
@@ -0,0 +1,347 @@
+import glob
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from bson import json_util
+from bson.errors import InvalidDocument
+from pymongo.errors import BulkWriteError, DocumentTooLarge, PyMongoError
+
+from app.core.config import settings
+from app.core.database import mongodb
+from app.core.metrics import metrics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+intake_pending = metrics.gauge("intake_pending_reports", "Reports logged locally and not yet inserted")
+intake_flushed_total = metrics.counter("intake_flushed_total", "Reports inserted by the write-behind flusher")
+intake_rejected_total = metrics.counter("intake_rejected_total", "Report submissions rejected because the queue was full")
+intake_conflicts_total = metrics.counter("intake_conflicts_total", "Buffered reports dead-lettered because their report_id was taken")
+intake_flush_errors_total = metrics.counter("intake_flush_errors_total", "Failed flush attempts, retried with backoff")
+intake_dead_letters_total = metrics.counter(
+    "intake_dead_letters_total", "Buffered reports the server refused for good, moved to the dead letter file"
+)
+
+DUPLICATE_KEY = 11000
+# Per-document write errors from failovers and shutdowns, which succeed when the batch is retried
+RETRYABLE_WRITE_CODES = frozenset({6, 7, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436})
+DEAD_LETTER_FILE = "dead-letters.jsonl"
+_JSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS
+
+
+def _lock_slot(directory: str, slot: int):
+    """Take the exclusive lock of a slot; returns the open lock file, or None if held elsewhere."""
+    lock_file = open(os.path.join(directory, f"slot-{slot}.lock"), "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+    return lock_file
+
+
+def _dead_letter(rejected: List[Tuple[Dict[str, Any], Dict[str, Any]]]):
+    """Append (report, write error) pairs to the shared dead letter file for manual review."""
+    if not rejected:
+        return
+    lines = []
+    for document, error in rejected:
+        logger.error("Moving report %s to the dead letter file: %s", document.get("report_id"), error.get("errmsg"))
+        lines.append(json_util.dumps(
+            {"failed_at": datetime.utcnow(), "code": error.get("code"), "error": error.get("errmsg"), "report": document},
+            json_options=_JSON_OPTIONS, default=str,
+        ))
+    with open(os.path.join(settings.INTAKE_LOG_DIR, DEAD_LETTER_FILE), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)  # Workers share the file; released on close
+        f.write("\n".join(lines) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    intake_dead_letters_total.inc(len(rejected))
+
+
+def _insert_idempotent(documents: List[Dict[str, Any]]):
+    """
+    Insert documents with preassigned _ids; ones already stored are skipped.
+
+    Only failures that can succeed on retry are raised, so the flusher
+    retries the batch: connection and write concern errors, and per-document
+    errors with a transient code. A report the server refuses for good (a
+    client-chosen report_id that is already taken, a failed validation, a
+    geo index key it cannot extract) is moved to the dead letter file instead
+    of blocking every later report behind it.
+
+    `updated_at` is stamped here rather than at submission: a report can sit
+    in the queue, or in a log awaiting replay, for longer than the sync
+    safety lag, and sync clients past its submission time would never see it.
+    """
+    now = datetime.utcnow()
+    for document in documents:
+        document["updated_at"] = now
+    try:
+        mongodb.get_intake_collection("incident_reports").insert_many(documents, ordered=False)
+    except (InvalidDocument, DocumentTooLarge) as e:
+        # Raised before anything is sent; isolate the offending reports
+        if len(documents) == 1:
+            _dead_letter([(documents[0], {"errmsg": str(e)})])
+            return
+        for document in documents:
+            _insert_idempotent([document])
+    except BulkWriteError as e:
+        if e.details.get("writeConcernErrors"):
+            raise
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") in RETRYABLE_WRITE_CODES for error in errors):
+            raise
+        rejected = []
+        for error in errors:
+            if error.get("code") == DUPLICATE_KEY:
+                if "_id" in (error.get("keyPattern") or {"_id": 1}):
+                    continue  # Stored by an earlier attempt
+                intake_conflicts_total.inc()
+            rejected.append((documents[error["index"]], error))
+        _dead_letter(rejected)
+
+
+class IntakeFull(Exception):
+    """Raised when the number of unflushed reports reaches INTAKE_MAX_PENDING."""
+
+
+class IntakeLog:
+    """
+    Append-only JSON-lines log of one worker's accepted reports.
+
+    Each worker owns a numbered slot, held with an exclusive file lock, so a
+    restarted worker picks up exactly one slot and replays what was not
+    flushed. `<slot>.offset` stores the byte offset up to which the log has
+    been inserted into MongoDB.
+    """
+
+    def __init__(self, directory: str, slot: int, lock_file):
+        self.directory = directory
+        self.slot = slot
+        self.path = os.path.join(directory, f"slot-{slot}.jsonl")
+        self.checkpoint_path = os.path.join(directory, f"slot-{slot}.offset")
+        self._lock_file = lock_file
+        self._file = open(self.path, "ab")
+
+    @classmethod
+    def acquire(cls, directory: str, max_slots: int) -> Optional["IntakeLog"]:
+        """Lock the lowest free slot, or return None when every slot is taken."""
+        os.makedirs(directory, exist_ok=True)
+        for slot in range(max_slots):
+            lock_file = _lock_slot(directory, slot)
+            if lock_file is not None:
+                return cls(directory, slot, lock_file)
+        return None
+
+    def read_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path) as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def write_checkpoint(self, offset: int):
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint_path)
+
+    def replay(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Read the entries written after the checkpoint as (end offset, document).
+
+        A torn last line from a crash during a write is cut off; the client
+        of that request never received a report ID.
+        """
+        size = os.path.getsize(self.path)
+        start = self.read_checkpoint()
+        if start > size:
+            start = 0  # The log was truncated after a full flush
+        entries = []
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    self._file.truncate(offset)
+                    break
+                offset += len(line)
+                entries.append((offset, json_util.loads(line, json_options=_JSON_OPTIONS)))
+        return entries
+
+    def append(self, document: Dict[str, Any]) -> int:
+        """Write one document, optionally fsync it, and return the new end offset."""
+        self._file.write(json_util.dumps(document, json_options=_JSON_OPTIONS).encode() + b"\n")
+        self._file.flush()
+        if settings.INTAKE_FSYNC:
+            os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def truncate(self):
+        self._file.truncate(0)
+        self._file.seek(0)
+        self.write_checkpoint(0)
+
+    def size(self) -> int:
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self):
+        self._file.close()
+        self._lock_file.close()  # Releases the slot lock
+
+
+class IntakeQueue:
+    """
+    Write-behind queue for report submissions.
+
+    `submit` makes a report durable in the worker's local log and returns
+    without touching MongoDB. A background thread inserts pending reports
+    with unordered `insert_many` batches and advances the checkpoint once a
+    batch is acknowledged. Reports carry their `_id` from submission, so a
+    batch replayed after a crash is idempotent: duplicate key errors mean the
+    document is already stored.
+    """
+
+    def __init__(self):
+        self.log: Optional[IntakeLog] = None
+        self.pending: Deque[Tuple[int, Dict[str, Any]]] = deque()
+        self.by_report_id: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.log is not None
+
+    def start(self):
+        self.log = IntakeLog.acquire(settings.INTAKE_LOG_DIR, settings.INTAKE_MAX_SLOTS)
+        if self.log is None:
+            logger.warning("No free intake slot in %s, reports are inserted directly", settings.INTAKE_LOG_DIR)
+            return
+        self._drain_orphaned_slots()
+        for entry in self.log.replay():
+            self._enqueue(*entry)
+        if self.pending:
+            logger.info("Replaying %d unflushed reports from %s", len(self.pending), self.log.path)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="intake-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the flusher after a final flush attempt; anything left is replayed on restart."""
+        if not self.enabled:
+            return
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                # Still inside a batch; it exits after it, and the log closes with the process
+                logger.warning("Intake flusher did not stop within %.0fs, leaving its log open", timeout)
+                return
+        self.log.close()
+        self.log = None
+
+    def _enqueue(self, offset: int, document: Dict[str, Any]):
+        self.pending.append((offset, document))
+        self.by_report_id[document["report_id"]] = document
+        intake_pending.set(len(self.pending))
+
+    def submit(self, document: Dict[str, Any]):
+        """Durably log a report for insertion. Raises IntakeFull under backpressure."""
+        with self._lock:
+            if len(self.pending) >= settings.INTAKE_MAX_PENDING:
+                intake_rejected_total.inc()
+                raise IntakeFull()
+            self._enqueue(self.log.append(document), document)
+        if len(self.pending) >= settings.INTAKE_BATCH_SIZE:
+            self._wake.set()
+
+    def get_pending(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """A report accepted by this worker that has not reached MongoDB yet."""
+        return self.by_report_id.get(report_id)
+
+    def retry_after_seconds(self) -> int:
+        """Rough time to work off the backlog at one batch per flush interval."""
+        batches = len(self.pending) / max(settings.INTAKE_BATCH_SIZE, 1)
+        return max(1, int(batches * settings.INTAKE_FLUSH_INTERVAL_MS / 1000))
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            self._wake.wait(backoff or settings.INTAKE_FLUSH_INTERVAL_MS / 1000)
+            self._wake.clear()
+            try:
+                while self.flush_batch():
+                    pass
+                backoff = 0.0
+            except Exception as e:
+                intake_flush_errors_total.inc()
+                backoff = min(max(backoff * 2, 0.5), 30.0)
+                logger.warning("Intake flush failed, retrying in %.1fs: %s", backoff, e)
+            if self._stop.is_set():
+                break
+
+    def flush_batch(self) -> bool:
+        """Insert the oldest pending batch. Returns True if a full batch was flushed."""
+        with self._lock:
+            batch = list(islice(self.pending, settings.INTAKE_BATCH_SIZE))
+        if not batch:
+            return False
+
+        _insert_idempotent([doc for _, doc in batch])
+
+        with self._lock:
+            for _ in batch:
+                _, document = self.pending.popleft()
+                self.by_report_id.pop(document["report_id"], None)
+            intake_pending.set(len(self.pending))
+            intake_flushed_total.inc(len(batch))
+            self.log.write_checkpoint(batch[-1][0])
+            if not self.pending and self.log.size() >= settings.INTAKE_MAX_LOG_BYTES:
+                self.log.truncate()
+        return len(batch) == settings.INTAKE_BATCH_SIZE
+
+    def _drain_orphaned_slots(self):
+        """
+        Flush logs of slots no running worker holds, e.g. after the worker
+        count was reduced. A slot is drained under its lock, so a worker
+        starting at the same time cannot claim it half-flushed.
+        """
+        directory = settings.INTAKE_LOG_DIR
+        for path in glob.glob(os.path.join(directory, "slot-*.jsonl")):
+            slot = int(os.path.basename(path)[len("slot-"):-len(".jsonl")])
+            lock_file = None if slot == self.log.slot else _lock_slot(directory, slot)
+            if lock_file is None:
+                continue
+            orphan = IntakeLog(directory, slot, lock_file)
+            try:
+                entries = orphan.replay()
+                if entries:
+                    _insert_idempotent([doc for _, doc in entries])
+                    logger.info("Flushed %d reports from intake slot %d", len(entries), slot)
+                orphan.truncate()
+            except PyMongoError as e:
+                logger.warning("Could not flush intake slot %d, it is retried on the next start: %s", slot, e)
+            finally:
+                orphan.close()
+
+
+intake_queue = IntakeQueue()
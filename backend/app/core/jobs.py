@@ -0,0 +1,420 @@
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from app.core import archive, perpetrator_graph
+from app.core.config import settings
+from app.core.database import mongodb
+from app.core.export import ENTITIES, build_query, write_arrow_file, write_parquet
+from app.core.ids import ulid
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+jobs_total = metrics.counter("jobs_total", "Finished background jobs by type and status")
+jobs_running = metrics.gauge("jobs_running", "Background jobs running in this worker")
+job_duration_seconds = metrics.histogram(
+    "job_duration_seconds", "Run time of background jobs", [1, 5, 15, 60, 300, 900, 3600]
+)
+
+JOBS = "jobs"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    """Handed to job handlers to report progress, check for cancellation and place output files."""
+
+    def __init__(self, job: Dict[str, Any]):
+        self.job = job
+        self._last_report = 0.0
+
+    def progress(self, fraction: float, message: Optional[str] = None, force: bool = False):
+        """
+        Record progress (0..1). Raises JobCancelled when cancellation was requested.
+
+        Writes are throttled to one per JOBS_PROGRESS_INTERVAL_SECONDS, which
+        also bounds how long a cancellation takes to be noticed.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_report < settings.JOBS_PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_report = now
+        update: Dict[str, Any] = {"progress": round(min(max(fraction, 0.0), 1.0), 4), "heartbeat_at": datetime.utcnow()}
+        if message:
+            update["message"] = message
+        job = mongodb.get_collection(JOBS).find_one_and_update(
+            {"_id": self.job["_id"]}, {"$set": update}, projection={"cancel_requested": 1}
+        )
+        if job and job.get("cancel_requested"):
+            raise JobCancelled()
+
+    def output_path(self, extension: str) -> str:
+        os.makedirs(settings.JOBS_RESULT_DIR, exist_ok=True)
+        return os.path.join(settings.JOBS_RESULT_DIR, f"{self.job['_id']}.{extension}")
+
+
+# Job type name -> handler(params, context) returning (path, media type)
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], JobContext], tuple]] = {}
+
+
+def job_handler(name: str):
+    def register(function):
+        JOB_HANDLERS[name] = function
+        return function
+    return register
+
+
+def submit_job(job_type: str, params: Dict[str, Any], priority: int, submitted_by: Optional[str] = None) -> Dict[str, Any]:
+    """Queue a job; any worker with free capacity picks it up, highest priority first."""
+    now = datetime.utcnow()
+    job = {
+        "_id": f"JOB-{ulid.new()}",
+        "type": job_type,
+        "params": params,
+        "priority": priority,
+        "status": "queued",
+        "progress": 0.0,
+        "message": None,
+        "submitted_by": submitted_by,
+        "created_at": now,
+        "started_at": None,
+        "finished_at": None,
+        "cancel_requested": False,
+        # Jobs that never finish are removed with everything else at expiry
+        "expires_at": now + timedelta(hours=settings.JOBS_RESULT_TTL_HOURS),
+    }
+    mongodb.get_collection(JOBS).insert_one(job)
+    job_runner.wake()
+    return job
+
+
+def cancel_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Cancel a job. Queued jobs are cancelled at once; running jobs stop at
+    their next progress report.
+    """
+    jobs = mongodb.get_collection(JOBS)
+    job = jobs.find_one_and_update(
+        {"_id": job_id, "status": "queued"},
+        {"$set": {"status": "cancelled", "finished_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if job:
+        return job
+    return jobs.find_one_and_update(
+        {"_id": job_id, "status": "running"},
+        {"$set": {"cancel_requested": True}},
+        return_document=ReturnDocument.AFTER,
+    ) or jobs.find_one({"_id": job_id})
+
+
+class JobRunner:
+    """
+    Pool of worker threads executing jobs from the `jobs` collection.
+
+    Jobs are claimed atomically with `find_one_and_update`, so every API
+    worker process can run a pool and each job runs exactly once. Result
+    files go to JOBS_RESULT_DIR on the local host and are removed after
+    JOBS_RESULT_TTL_HOURS.
+    """
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Condition()
+        self._stop = threading.Event()
+
+    def start(self, workers: int):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop.clear()
+        for n in range(workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if workers:
+            sweeper = threading.Thread(target=self._sweep, name="job-sweeper", daemon=True)
+            sweeper.start()
+            self._threads.append(sweeper)
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop the pool, giving running jobs up to `timeout` seconds to finish.
+
+        Jobs this worker still holds afterwards are marked failed right away
+        instead of staying "running" until the sweep notices the missing
+        heartbeat.
+        """
+        self._stop.set()
+        self.wake(all_workers=True)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        self._threads = []
+        try:
+            abandoned = mongodb.get_collection(JOBS).update_many(
+                {"status": "running", "owner": self.owner},
+                {"$set": {"status": "failed", "error": "Worker shut down", "finished_at": datetime.utcnow()}},
+            )
+        except Exception as e:
+            logger.warning("Could not fail jobs left running at shutdown: %s", e)
+            return
+        if abandoned.modified_count:
+            logger.warning("Marked %d jobs failed that were still running at shutdown", abandoned.modified_count)
+
+    def wake(self, all_workers: bool = False):
+        with self._wake:
+            self._wake.notify_all() if all_workers else self._wake.notify()
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return mongodb.get_collection(JOBS).find_one_and_update(
+            {"status": "queued", "type": {"$in": list(JOB_HANDLERS)}},
+            {"$set": {"status": "running", "started_at": now, "heartbeat_at": now, "owner": self.owner}},
+            sort=[("priority", -1), ("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = self.claim()
+            except Exception as e:
+                logger.warning("Could not claim a job: %s", e)
+                job = None
+            if job is None:
+                with self._wake:
+                    self._wake.wait(settings.JOBS_POLL_INTERVAL_SECONDS)
+                continue
+            try:
+                self.run(job)
+            except Exception:
+                # Keep the thread alive; the sweep fails the job once its heartbeat stops
+                logger.exception("Job runner crashed on job %s", job["_id"])
+
+    def run(self, job: Dict[str, Any]):
+        context = JobContext(job)
+        started = time.perf_counter()
+        update: Dict[str, Any]
+        jobs_running.inc()
+        try:
+            path, media_type = JOB_HANDLERS[job["type"]](job.get("params") or {}, context)
+            update = {
+                "status": "succeeded",
+                "progress": 1.0,
+                "result": {
+                    "path": path,
+                    "filename": os.path.basename(path),
+                    "media_type": media_type,
+                    "size": os.path.getsize(path),
+                },
+            }
+        except JobCancelled:
+            update = {"status": "cancelled"}
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job["_id"], job["type"])
+            update = {"status": "failed", "error": str(e)}
+        finally:
+            jobs_running.dec()
+        if update["status"] != "succeeded":
+            self._remove_outputs(job["_id"])
+
+        now = datetime.utcnow()
+        update.update({"finished_at": now, "expires_at": now + timedelta(hours=settings.JOBS_RESULT_TTL_HOURS)})
+        self._finish(job["_id"], update)
+        jobs_total.inc(type=job["type"], status=update["status"])
+        job_duration_seconds.observe(time.perf_counter() - started, type=job["type"])
+
+    def _finish(self, job_id: str, update: Dict[str, Any], attempts: int = 5):
+        """Record a job's final status, retrying with backoff while MongoDB is unavailable."""
+        for attempt in range(attempts):
+            try:
+                mongodb.get_collection(JOBS).update_one({"_id": job_id}, {"$set": update})
+                return
+            except PyMongoError as e:
+                logger.warning("Could not record the end of job %s (attempt %d): %s", job_id, attempt + 1, e)
+                if attempt + 1 < attempts and self._stop.wait(min(2 ** attempt, 30)):
+                    break
+        logger.error("Gave up recording the end of job %s; the sweep marks it failed", job_id)
+
+    @staticmethod
+    def _remove_outputs(job_id: str):
+        """Delete partial files left by a failed or cancelled job."""
+        for path in glob.glob(os.path.join(settings.JOBS_RESULT_DIR, f"{job_id}.*")):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Could not remove %s: %s", path, e)
+
+    def _sweep(self):
+        """Delete expired result files and fail jobs whose worker stopped heartbeating."""
+        while not self._stop.wait(settings.JOBS_SWEEP_INTERVAL_SECONDS):
+            try:
+                cutoff = time.time() - settings.JOBS_RESULT_TTL_HOURS * 3600
+                if os.path.isdir(settings.JOBS_RESULT_DIR):
+                    for entry in os.scandir(settings.JOBS_RESULT_DIR):
+                        if entry.is_file() and entry.stat().st_mtime < cutoff:
+                            os.remove(entry.path)
+                stale = datetime.utcnow() - timedelta(seconds=settings.JOBS_STALE_SECONDS)
+                mongodb.get_collection(JOBS).update_many(
+                    {"status": "running", "heartbeat_at": {"$lt": stale}},
+                    {"$set": {"status": "failed", "error": "Worker stopped responding", "finished_at": datetime.utcnow()}},
+                )
+            except Exception as e:
+                logger.warning("Job sweep failed: %s", e)
+
+
+job_runner = JobRunner()
+
+
+def _date_range(params: Dict[str, Any]):
+    start = datetime.fromisoformat(params["start_date"]) if params.get("start_date") else None
+    end = datetime.fromisoformat(params["end_date"]) if params.get("end_date") else None
+    if params.get("year"):
+        year = int(params["year"])
+        start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1) - timedelta(milliseconds=1)
+    return start, end
+
+
+@job_handler("export")
+def run_export(params: Dict[str, Any], context: JobContext):
+    """Write an entity to Parquet or an Arrow stream file."""
+    entity = params.get("entity", "cases")
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown entity {entity}")
+    file_format = params.get("format", "parquet")
+    start, end = _date_range(params)
+    query = build_query(entity, params.get("country"), start, end)
+    total = mongodb.get_analytics_collection(ENTITIES[entity]["collection"]).count_documents(query) or 1
+
+    writer, extension, media_type = (
+        (write_parquet, "parquet", "application/vnd.apache.parquet") if file_format == "parquet"
+        else (write_arrow_file, "arrows", "application/vnd.apache.arrow.stream")
+    )
+    path = context.output_path(extension)
+    writer(entity, path, query, on_batch=lambda done: context.progress(done / total, f"{done} of {total} {entity}"))
+    return path, media_type
+
+
+@job_handler("analytics_report")
+def run_analytics_report(params: Dict[str, Any], context: JobContext):
+    """
+    Build a JSON analytics report for a period and optional country: totals,
+    counts by violation type, status and region, a monthly timeline and the
+    most frequently named perpetrators. Archived cases are included unless
+    `include_archived` is false, since reports usually cover past periods.
+    """
+    start, end = _date_range(params)
+    country = params.get("country")
+    include_archived = params.get("include_archived", True)
+    cases = mongodb.get_analytics_collection("cases")
+    reports = mongodb.get_analytics_collection("incident_reports")
+
+    case_match: Dict[str, Any] = {}
+    report_match: Dict[str, Any] = {}
+    if start or end:
+        dates = {**({"$gte": start} if start else {}), **({"$lte": end} if end else {})}
+        case_match["date_occurred"] = dates
+        report_match["incident_details.date"] = dates
+    if country:
+        case_match["location.country"] = country
+        report_match["incident_details.location.country"] = country
+
+    def grouped(collection, match, field, unwind=False):
+        pipeline = archive.match_stages(collection.name, match, include_archived)
+        if unwind:
+            pipeline.append({"$unwind": f"${field}"})
+        pipeline += [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}, {"$sort": {"count": -1}}]
+        return {str(item["_id"]): item["count"] for item in collection.aggregate(pipeline, allowDiskUse=True)}
+
+    steps = [
+        ("total_cases", lambda: archive.count_documents("cases", case_match, include_archived)),
+        ("total_reports", lambda: archive.count_documents("incident_reports", report_match, include_archived)),
+        ("cases_by_violation_type", lambda: grouped(cases, case_match, "violation_types", unwind=True)),
+        ("cases_by_status", lambda: grouped(cases, case_match, "status")),
+        ("cases_by_region", lambda: grouped(cases, case_match, "location.region")),
+        ("reports_by_violation_type", lambda: grouped(reports, report_match, "incident_details.violation_types", unwind=True)),
+        ("monthly_timeline", lambda: [
+            {"month": item["_id"]["month"].date().isoformat(), "violation_type": item["_id"]["type"], "count": item["count"]}
+            for item in cases.aggregate(archive.match_stages("cases", case_match, include_archived) + [
+                {"$unwind": "$violation_types"},
+                {"$group": {
+                    "_id": {"month": {"$dateTrunc": {"date": "$date_occurred", "unit": "month"}}, "type": "$violation_types"},
+                    "count": {"$sum": 1},
+                }},
+                {"$sort": {"_id.month": 1}},
+            ], allowDiskUse=True)
+        ]),
+        ("top_perpetrators", lambda: [
+            {"key": item["_id"], "cases": item["count"]}
+            for item in cases.aggregate(archive.match_stages("cases", case_match, include_archived) + [
+                {"$unwind": "$perpetrator_keys"},
+                {"$group": {"_id": "$perpetrator_keys", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}},
+                {"$limit": 25},
+            ], allowDiskUse=True)
+        ]),
+    ]
+
+    report: Dict[str, Any] = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "filters": {
+            "country": country,
+            "start_date": start and start.isoformat(),
+            "end_date": end and end.isoformat(),
+            "include_archived": include_archived,
+        },
+    }
+    for index, (name, compute) in enumerate(steps):
+        context.progress(index / len(steps), f"Computing {name}", force=True)
+        report[name] = compute()
+
+    path = context.output_path("json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    return path, "application/json"
+
+
+@job_handler("reaggregate")
+def run_reaggregate(params: Dict[str, Any], context: JobContext):
+    """Recompute derived data. Targets: perpetrator_graph."""
+    target = params.get("target", "perpetrator_graph")
+    if target != "perpetrator_graph":
+        raise ValueError(f"Unknown reaggregation target {target}")
+    total = mongodb.get_collection("cases").estimated_document_count() or 1
+    cases, entities, edges = perpetrator_graph.rebuild(
+        on_batch=lambda done: context.progress(done / total, f"{done} of ~{total} cases")
+    )
+    path = context.output_path("json")
+    with open(path, "w") as f:
+        json.dump({"target": target, "cases": cases, "perpetrators": entities, "edges": edges}, f)
+    return path, "application/json"
+
+
+@job_handler("archive")
+def run_archive(params: Dict[str, Any], context: JobContext):
+    """Move old resolved and closed cases to the archive collections."""
+    older_than_days = int(params.get("older_than_days", settings.ARCHIVE_AFTER_DAYS))
+    dry_run = bool(params.get("dry_run", False))
+    context.progress(0.0, "Archiving" if not dry_run else "Counting archivable cases", force=True)
+    moved = archive.archive_cases(
+        older_than_days,
+        settings.ARCHIVE_BATCH_SIZE,
+        dry_run=dry_run,
+        on_batch=lambda counts: context.progress(0.0, f"{counts['cases']} cases archived"),
+    )
+    path = context.output_path("json")
+    with open(path, "w") as f:
+        json.dump({"older_than_days": older_than_days, "dry_run": dry_run, "moved": moved}, f)
+    return path, "application/json"
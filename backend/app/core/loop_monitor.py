@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+loop_lag_seconds = metrics.histogram(
+    "event_loop_lag_seconds",
+    "Delay between a scheduled event loop wake-up and the time it actually ran",
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+)
+loop_lag_current = metrics.gauge("event_loop_lag_current_seconds", "Most recently measured event loop lag")
+loop_stalls_total = metrics.counter("event_loop_stalls_total", "Event loop stalls above the threshold, by route")
+
+
+class LoopMonitor:
+    """
+    Measure event loop lag and report blocking calls.
+
+    A coroutine on the loop sleeps for a fixed interval and records how late it
+    wakes up. A watchdog thread checks the coroutine's heartbeat; when it is
+    older than the stall threshold the loop is blocked right now, so the
+    watchdog captures the loop thread's stack and logs it together with the
+    route of the task that is currently running.
+    """
+
+    def __init__(self):
+        self.interval = settings.LOOP_MONITOR_INTERVAL_MS / 1000.0
+        self.threshold = settings.LOOP_STALL_THRESHOLD_MS / 1000.0
+        self.active_requests: Dict[asyncio.Task, Dict[str, Any]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start monitoring the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """Stop the lag coroutine and the watchdog thread."""
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - scheduled - self.interval)
+            self._heartbeat = time.monotonic()
+            loop_lag_seconds.observe(lag)
+            loop_lag_current.set(lag)
+
+    def _watch(self):
+        reported_heartbeat = None
+        while not self._stop.wait(self.interval):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat - self.interval
+            if stalled_for < self.threshold or heartbeat == reported_heartbeat:
+                continue
+            # Report each stall once, while it is still in progress
+            reported_heartbeat = heartbeat
+            self._report_stall(stalled_for)
+
+    def _report_stall(self, stalled_for: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        task = asyncio.current_task(self._loop)
+        scope = self.active_requests.get(task) if task else None
+        route = _route_name(scope) if scope else "<no request>"
+        stack = "".join(traceback.format_stack(frame)) if frame else "<stack unavailable>"
+        loop_stalls_total.inc(route=route)
+        logger.warning(
+            "Event loop blocked for %.0f ms (and counting) in %s; blocking call stack:\n%s",
+            stalled_for * 1000, route, stack,
+        )
+
+
+def _route_name(scope: Dict[str, Any]) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path_format', None) or scope['path']}"
+
+
+class RouteTrackingMiddleware:
+    """Record which route each running task is serving, for stall attribution."""
+
+    def __init__(self, app, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        task = asyncio.current_task()
+        # The router fills in scope["route"] once matched, so keep the scope itself
+        self.monitor.active_requests[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.active_requests.pop(task, None)
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,127 @@
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+LabelValues = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> LabelValues:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: LabelValues, extra: LabelValues = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Monotonically increasing value, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Cumulative bucketed distribution of observed values."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float]):
+        self.name = name
+        self.description = description
+        self.buckets = sorted(buckets)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(k, list(v), self._sums[k]) for k, v in self._counts.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + [float("inf")], counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-local registry rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._register(Counter(name, description))
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._register(Gauge(name, description))
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float]) -> Histogram:
+        return self._register(Histogram(name, description, buckets))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
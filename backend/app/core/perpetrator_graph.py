@@ -0,0 +1,270 @@
+import re
+from collections import Counter
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from pymongo import UpdateOne
+
+from app.core.archive import ARCHIVES
+from app.core.config import settings
+from app.core.database import mongodb
+
+ENTITIES = "perpetrators"
+EDGES = "perpetrator_edges"
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def perpetrator_key(name: str, type: str) -> str:
+    """
+    Normalized identity of a perpetrator: "<type>:<slugified name>".
+
+    Case, punctuation and spacing differences between case files map to the
+    same entity, e.g. "4th Armored Division" and "4th armored-division".
+    """
+    slug = lambda value: _NON_WORD.sub("-", (value or "").casefold()).strip("-")
+    return f"{slug(type) or 'unknown'}:{slug(name)}"
+
+
+def case_perpetrator_keys(perpetrators: Iterable[Dict[str, Any]]) -> List[str]:
+    """Distinct perpetrator keys of a case, in first-seen order."""
+    keys = (perpetrator_key(p.get("name"), p.get("type")) for p in perpetrators or [] if p.get("name"))
+    return list(dict.fromkeys(keys))
+
+
+def graph_keys(keys: Iterable[str]) -> List[str]:
+    """
+    The keys of a case that take part in the graph: the first
+    PERPETRATOR_GRAPH_MAX_PER_CASE. A case stores all its keys, so lookups
+    and duplicate checks work past the cap.
+    """
+    return list(keys)[:settings.PERPETRATOR_GRAPH_MAX_PER_CASE]
+
+
+def edge_id(a: str, b: str) -> str:
+    return f"{a}|{b}" if a < b else f"{b}|{a}"
+
+
+def _pairs(keys: Iterable[str]) -> Set[Tuple[str, str]]:
+    return {tuple(sorted(pair)) for pair in combinations(set(keys), 2)}
+
+
+def graph_operations(
+    old_keys: Iterable[str],
+    new_keys: Iterable[str],
+    perpetrators: Iterable[Dict[str, Any]] = (),
+) -> Tuple[List[UpdateOne], List[UpdateOne]]:
+    """
+    Entity and edge writes that move one case from `old_keys` to `new_keys`.
+
+    Only the difference is written: an unchanged perpetrator list costs
+    nothing, and adding one perpetrator to a case with n others touches
+    one entity and n edges.
+    """
+    old, new = set(old_keys), set(new_keys)
+    now = datetime.utcnow()
+    names = {perpetrator_key(p.get("name"), p.get("type")): p for p in perpetrators or [] if p.get("name")}
+
+    entity_ops = []
+    for key in new - old:
+        source = names.get(key, {})
+        entity_ops.append(UpdateOne(
+            {"_id": key},
+            {
+                "$inc": {"case_count": 1},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"name": source.get("name"), "type": source.get("type")},
+            },
+            upsert=True,
+        ))
+    for key in old - new:
+        entity_ops.append(UpdateOne({"_id": key}, {"$inc": {"case_count": -1}, "$set": {"updated_at": now}}))
+
+    old_pairs, new_pairs = _pairs(old), _pairs(new)
+    edge_ops = [
+        UpdateOne({"_id": edge_id(a, b)}, {"$inc": {"weight": 1}, "$setOnInsert": {"a": a, "b": b}}, upsert=True)
+        for a, b in new_pairs - old_pairs
+    ]
+    edge_ops.extend(
+        UpdateOne({"_id": edge_id(a, b)}, {"$inc": {"weight": -1}})
+        for a, b in old_pairs - new_pairs
+    )
+    return entity_ops, edge_ops
+
+
+def update_case_graph(old_keys: Iterable[str], new_keys: Iterable[str], perpetrators: Iterable[Dict[str, Any]] = ()):
+    """Apply the graph change for one case and drop edges whose weight fell to zero."""
+    old_keys, new_keys = graph_keys(old_keys), graph_keys(new_keys)
+    entity_ops, edge_ops = graph_operations(old_keys, new_keys, perpetrators)
+    if entity_ops:
+        mongodb.get_collection(ENTITIES).bulk_write(entity_ops, ordered=False)
+    if edge_ops:
+        edges = mongodb.get_collection(EDGES)
+        edges.bulk_write(edge_ops, ordered=False)
+        removed = [edge_id(a, b) for a, b in _pairs(old_keys) - _pairs(new_keys)]
+        if removed:
+            edges.delete_many({"_id": {"$in": removed}, "weight": {"$lte": 0}})
+
+
+def neighbors(key: str, limit: int, min_weight: int = 1) -> List[Dict[str, Any]]:
+    """Perpetrators that share the most cases with `key`, strongest first."""
+    edges = mongodb.get_analytics_collection(EDGES)
+    weights: Dict[str, int] = {}
+    # Edges are stored once per pair; each side is an indexed, pre-sorted scan
+    for side, other in (("a", "b"), ("b", "a")):
+        cursor = edges.find({side: key, "weight": {"$gte": min_weight}}, {other: 1, "weight": 1})
+        for edge in cursor.sort("weight", -1).limit(limit):
+            weights[edge[other]] = edge["weight"]
+
+    ranked = sorted(weights.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    entities = _entities([k for k, _ in ranked])
+    return [{**entities.get(k, {"key": k}), "weight": weight} for k, weight in ranked]
+
+
+def expand(
+    key: str,
+    depth: int,
+    min_weight: int = 1,
+    max_nodes: int = 200,
+    per_node: int = 25,
+) -> Dict[str, Any]:
+    """
+    Breadth-first k-hop neighborhood of a perpetrator.
+
+    Each frontier node reads its strongest `per_node` edges from the
+    (a, weight) and (b, weight) indexes with a limit, so a hub costs no more
+    than any other node. The edges of a hop are followed strongest first
+    and expansion stops once `max_nodes` perpetrators have been reached.
+    """
+    edges_collection = mongodb.get_analytics_collection(EDGES)
+    depths = {key: 0}
+    edges: Dict[str, Dict[str, Any]] = {}
+    frontier = [key]
+
+    for hop in range(1, depth + 1):
+        if not frontier or len(depths) >= max_nodes:
+            break
+        hop_edges: Dict[str, Dict[str, Any]] = {}
+        for node in frontier:
+            strongest = []
+            for side in ("a", "b"):
+                cursor = edges_collection.find({side: node, "weight": {"$gte": min_weight}})
+                strongest.extend(cursor.sort("weight", -1).limit(per_node))
+            strongest.sort(key=lambda edge: -edge["weight"])
+            for edge in strongest[:per_node]:
+                hop_edges[edge["_id"]] = edge
+        next_frontier = []
+        for edge in sorted(hop_edges.values(), key=lambda edge: -edge["weight"]):
+            a, b = edge["a"], edge["b"]
+            edges[edge["_id"]] = {"source": a, "target": b, "weight": edge["weight"]}
+            for node in (a, b):
+                if node not in depths and len(depths) < max_nodes:
+                    depths[node] = hop
+                    next_frontier.append(node)
+        frontier = next_frontier
+
+    # Keep only edges between nodes that made it into the result
+    edge_list = [e for e in edges.values() if e["source"] in depths and e["target"] in depths]
+    entities = _entities(list(depths))
+    nodes = [{**entities.get(k, {"key": k}), "depth": d} for k, d in sorted(depths.items(), key=lambda i: i[1])]
+    return {"nodes": nodes, "edges": edge_list}
+
+
+def linked_case_ids(keys: List[str], limit: int) -> List[str]:
+    """IDs of cases, active or archived, naming any of the perpetrators, newest first."""
+    match = {"perpetrator_keys": {"$in": keys}}
+    cursor = mongodb.get_analytics_collection("cases").aggregate([
+        {"$match": match},
+        {"$unionWith": {"coll": ARCHIVES["cases"], "pipeline": [{"$match": match}]}},
+        {"$sort": {"date_occurred": -1}},
+        {"$limit": limit},
+        {"$project": {"case_id": 1, "_id": 0}},
+    ])
+    return [doc["case_id"] for doc in cursor]
+
+
+def top_pairs(limit: int, min_weight: int = 1) -> List[Dict[str, Any]]:
+    """The most frequently co-occurring perpetrator pairs."""
+    cursor = mongodb.get_analytics_collection(EDGES).find({"weight": {"$gte": min_weight}})
+    pairs = list(cursor.sort("weight", -1).limit(limit))
+    entities = _entities(list({k for edge in pairs for k in (edge["a"], edge["b"])}))
+    return [
+        {
+            "source": entities.get(edge["a"], {"key": edge["a"]}),
+            "target": entities.get(edge["b"], {"key": edge["b"]}),
+            "weight": edge["weight"],
+        }
+        for edge in pairs
+    ]
+
+
+def _entities(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    if not keys:
+        return {}
+    cursor = mongodb.get_analytics_collection(ENTITIES).find({"_id": {"$in": keys}})
+    return {
+        doc["_id"]: {"key": doc["_id"], "name": doc.get("name"), "type": doc.get("type"), "case_count": doc.get("case_count", 0)}
+        for doc in cursor
+    }
+
+
+def rebuild(batch_size: int = 1000, on_batch=None) -> Tuple[int, int, int]:
+    """
+    Recompute the graph from every case, active and archived, and store
+    `perpetrator_keys` on each case.
+
+    Returns (cases, perpetrators, edges).
+    """
+    entity_counts: Counter = Counter()
+    edge_counts: Counter = Counter()
+    first_seen: Dict[str, Dict[str, Any]] = {}
+    case_ops: List[UpdateOne] = []
+    total = 0
+
+    for cases in (mongodb.get_collection("cases"), mongodb.get_collection(ARCHIVES["cases"])):
+        for doc in cases.find({}, {"perpetrators": 1, "perpetrator_keys": 1}).batch_size(batch_size):
+            perpetrators = doc.get("perpetrators") or []
+            keys = case_perpetrator_keys(perpetrators)
+            for p in perpetrators:
+                if p.get("name"):
+                    first_seen.setdefault(perpetrator_key(p.get("name"), p.get("type")), p)
+            entity_counts.update(graph_keys(keys))
+            edge_counts.update(_pairs(graph_keys(keys)))
+            if doc.get("perpetrator_keys") != keys:
+                case_ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"perpetrator_keys": keys}}))
+            if len(case_ops) >= batch_size:
+                cases.bulk_write(case_ops, ordered=False)
+                case_ops = []
+            total += 1
+            if on_batch and total % batch_size == 0:
+                on_batch(total)
+        if case_ops:
+            cases.bulk_write(case_ops, ordered=False)
+            case_ops = []
+
+    now = datetime.utcnow()
+    entities, edges = mongodb.get_collection(ENTITIES), mongodb.get_collection(EDGES)
+    entities.delete_many({})
+    edges.delete_many({})
+    _insert_chunked(entities, (
+        {"_id": key, "name": first_seen[key].get("name"), "type": first_seen[key].get("type"),
+         "case_count": count, "updated_at": now}
+        for key, count in entity_counts.items()
+    ), batch_size)
+    _insert_chunked(edges, (
+        {"_id": edge_id(a, b), "a": a, "b": b, "weight": weight}
+        for (a, b), weight in edge_counts.items()
+    ), batch_size)
+    return total, len(entity_counts), len(edge_counts)
+
+
+def _insert_chunked(collection, documents: Iterable[Dict[str, Any]], batch_size: int):
+    chunk = []
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) >= batch_size:
+            collection.insert_many(chunk, ordered=False)
+            chunk = []
+    if chunk:
+        collection.insert_many(chunk, ordered=False)
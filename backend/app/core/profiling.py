@@ -0,0 +1,126 @@
+import asyncio
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from app.core.config import settings
+
+
+class StackSampler:
+    """
+    Low-overhead sampling profiler for a single thread.
+
+    A daemon thread periodically captures the stack of the target thread via
+    sys._current_frames() and aggregates identical stacks. Nothing is traced,
+    so the profiled code runs at full speed between samples.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self):
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def to_folded(self) -> str:
+        """Render samples in the collapsed-stack format used by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _route_slug(route_path: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", route_path).strip("_")
+    return slug or "root"
+
+
+class ProfilingMiddleware:
+    """
+    Profile a random sample of requests, or any request that carries the admin
+    profiling header, and write one .folded file per request to
+    PROFILING_DIR/<METHOD>_<route>/.
+
+    Concurrent profiles are capped by PROFILING_MAX_CONCURRENT; requests that
+    would exceed the cap are served without profiling.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._slots = threading.BoundedSemaphore(settings.PROFILING_MAX_CONCURRENT)
+        self._header = settings.PROFILING_HEADER.lower().encode()
+
+    def _requested(self, scope) -> bool:
+        if not settings.PROFILING_ADMIN_TOKEN:
+            return False
+        for name, value in scope.get("headers", []):
+            if name == self._header:
+                return hmac.compare_digest(value.decode("latin-1"), settings.PROFILING_ADMIN_TOKEN)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        wanted = self._requested(scope) or random.random() < settings.PROFILING_SAMPLE_RATE
+        if not wanted or not self._slots.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL_MS / 1000.0)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - started
+            sampler.stop()
+            self._slots.release()
+            # Joining the sampler and writing the file happen off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self._write, scope, sampler, elapsed)
+
+    def _write(self, scope, sampler: StackSampler, elapsed: float):
+        sampler.join()
+        if not sampler.samples:
+            return
+        route = scope.get("route")
+        route_path = getattr(route, "path_format", None) or scope.get("path", "/")
+        directory = os.path.join(settings.PROFILING_DIR, f"{scope['method']}_{_route_slug(route_path)}")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+            filename = os.path.join(directory, f"{stamp}_{int(elapsed * 1000)}ms.folded")
+            with open(filename, "w") as f:
+                f.write(sampler.to_folded())
+        except OSError as e:
+            print(f"Could not write profile for {route_path}: {e}")
+
+
+def profiling_enabled() -> bool:
+    """Return True if the profiling middleware should be installed."""
+    return settings.PROFILING_ENABLED and (
+        settings.PROFILING_SAMPLE_RATE > 0 or bool(settings.PROFILING_ADMIN_TOKEN)
+    )
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional, Union
 
-from jose import jwt
+from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
@@ -30,6 +30,24 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
     return encoded_jwt
 
 
+def token_subject(token: str) -> Optional[str]:
+    """
+    Verify a JWT access token.
+    
+    Args:
+        token: Encoded token, without the "Bearer " prefix
+        
+    Returns:
+        The token's subject, or None if the token is invalid or expired
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    return str(subject) if subject else None
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a password against a hash.
@@ -0,0 +1,109 @@
+import threading
+from typing import Dict, NamedTuple, Optional, Sequence
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.repositories.base import Repository
+from app.repositories.mongo import MongoRepository
+from app.repositories.sqlite import SQLiteRepository, SQLiteStore
+
+BACKENDS = ("mongo", "sqlite")
+
+
+class RecordType(NamedTuple):
+    key: str
+    archived: bool = False
+    intake: bool = False
+    # Only the SQLite backend needs these; MongoDB indexes are in app.core.indexes
+    array_fields: Sequence[str] = ()
+    date_fields: Sequence[str] = ()
+    indexed: Sequence[str] = ()
+
+
+# Records served through repositories, by collection/table name
+RECORDS: Dict[str, RecordType] = {
+    "cases": RecordType(
+        key="case_id",
+        archived=True,
+        array_fields=("violation_types", "victims", "perpetrators", "perpetrator_keys"),
+        date_fields=("date_occurred", "date_reported", "created_at", "updated_at"),
+        indexed=("status", "location.country", "date_occurred", "created_at", "updated_at"),
+    ),
+    "incident_reports": RecordType(
+        key="report_id",
+        archived=True,
+        intake=True,
+        array_fields=("incident_details.violation_types",),
+        date_fields=("incident_details.date", "created_at", "updated_at"),
+        indexed=("status", "case_id", "incident_details.location.country", "incident_details.date", "created_at", "updated_at"),
+    ),
+    "victims": RecordType(
+        key="_id",
+        archived=True,
+        array_fields=("cases_involved",),
+        date_fields=("created_at", "updated_at"),
+        indexed=("type", "updated_at"),
+    ),
+    "users": RecordType(key="username", date_fields=("created_at",)),
+}
+
+
+def build_repositories(backend: str, sqlite_path: Optional[str] = None) -> Dict[str, Repository]:
+    """One repository per record type on `backend`; SQLite tables and indexes are created if missing."""
+    if backend == "mongo":
+        return {
+            name: MongoRepository(name, record.key, archived=record.archived, intake=record.intake)
+            for name, record in RECORDS.items()
+        }
+    if backend == "sqlite":
+        store = SQLiteStore(sqlite_path or settings.SQLITE_PATH)
+        repositories = {
+            name: SQLiteRepository(
+                store, name, record.key,
+                array_fields=record.array_fields, date_fields=record.date_fields, indexed=record.indexed,
+            )
+            for name, record in RECORDS.items()
+        }
+        for repository in repositories.values():
+            repository.create_schema()
+        return repositories
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+
+class Storage:
+    """The repositories of the configured STORAGE_BACKEND, created on first use."""
+
+    def __init__(self):
+        self._repositories: Optional[Dict[str, Repository]] = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            if self._repositories is None:
+                self._repositories = build_repositories(settings.STORAGE_BACKEND)
+
+    def repository(self, name: str) -> Repository:
+        if self._repositories is None:
+            self.connect()
+        return self._repositories[name]
+
+
+storage = Storage()
+
+
+def repository(name: str) -> Repository:
+    return storage.repository(name)
+
+
+def uses_mongodb() -> bool:
+    return settings.STORAGE_BACKEND == "mongo"
+
+
+def require_mongodb():
+    """Dependency for endpoints built on MongoDB features (geo queries, graphs, sync, jobs) the embedded backend lacks."""
+    if not uses_mongodb():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Not available with STORAGE_BACKEND={settings.STORAGE_BACKEND}"
+        )
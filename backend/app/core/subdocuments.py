@@ -0,0 +1,223 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+
+from app.core import archive
+from app.core.config import settings
+from app.core.database import mongodb
+from app.core.ids import new_evidence_id
+
+EVIDENCE = "evidence"
+
+# Fields returned by evidence writes; the evidence array itself is not read back
+WITHOUT_EVIDENCE = {"evidence": 0}
+
+
+def assign_ids(
+    items: List[Dict[str, Any]], id_field: str, new_id: Callable[[], str], keep_existing: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Give array items server-generated IDs, so they can be addressed later.
+
+    New records pass `keep_existing=False` and every item gets a fresh ID.
+    Otherwise an item keeps its ID (e.g. a client sending back the array it
+    read) unless an earlier item already has it; item endpoints address
+    exactly one item per ID.
+    """
+    seen = set()
+    for item in items:
+        if not keep_existing or not item.get(id_field) or item[id_field] in seen:
+            item[id_field] = new_id()
+        seen.add(item[id_field])
+    return items
+
+
+def push_item(
+    collection_name: str,
+    key: Dict[str, Any],
+    field: str,
+    item: Dict[str, Any],
+    if_match: Optional[str],
+    not_found_detail: str,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Append one item to an embedded array with `$push`; concurrent appends do not overwrite each other."""
+    return archive.update(
+        collection_name, key,
+        {"$push": {field: item}, "$set": {"updated_at": datetime.utcnow()}},
+        if_match, not_found_detail, projection,
+    )
+
+
+def set_item_fields(
+    collection_name: str,
+    key: Dict[str, Any],
+    field: str,
+    id_field: str,
+    item_id: str,
+    changes: Dict[str, Any],
+    if_match: Optional[str],
+    not_found_detail: str,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Update fields of one array item in place with the positional `$` operator."""
+    update = {f"{field}.$.{name}": value for name, value in changes.items()}
+    update["updated_at"] = datetime.utcnow()
+    return archive.update(
+        collection_name, {**key, f"{field}.{id_field}": item_id}, {"$set": update},
+        if_match, not_found_detail, projection,
+    )
+
+
+def pull_item(
+    collection_name: str,
+    key: Dict[str, Any],
+    field: str,
+    id_field: str,
+    item_id: str,
+    if_match: Optional[str],
+    not_found_detail: str,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Remove one array item by ID with `$pull`."""
+    return archive.update(
+        collection_name, {**key, f"{field}.{id_field}": item_id},
+        {"$pull": {field: {id_field: item_id}}, "$set": {"updated_at": datetime.utcnow()}},
+        if_match, not_found_detail, projection,
+    )
+
+
+def find_item(document: Dict[str, Any], field: str, id_field: str, item_id: str) -> Optional[Dict[str, Any]]:
+    return next((item for item in document.get(field) or [] if item.get(id_field) == item_id), None)
+
+
+# Case evidence is embedded in the case document by default. With
+# EVIDENCE_STORAGE=collection each item is a document of its own in the
+# `evidence` collection and the case only keeps `evidence_count`, so cases
+# with thousands of items stay small and evidence is read page by page.
+
+def evidence_in_collection() -> bool:
+    # The embedded storage backend always keeps evidence in the case record
+    return settings.EVIDENCE_STORAGE == "collection" and settings.STORAGE_BACKEND == "mongo"
+
+
+def _evidence_document(case_id: str, item: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return {**item, "_id": item["evidence_id"], "case_id": case_id, "created_at": now}
+
+
+def _evidence_not_found(case_id: str, evidence_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Evidence {evidence_id} not found in case {case_id}"
+    )
+
+
+def insert_case_evidence(case_id: str, items: List[Dict[str, Any]]):
+    """Store the evidence of a new case in the evidence collection."""
+    if items:
+        now = datetime.utcnow()
+        mongodb.get_collection(EVIDENCE).insert_many([_evidence_document(case_id, item, now) for item in items])
+
+
+def list_case_evidence(case_id: str, skip: int, limit: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+    """One page of a case's evidence and the total count, or None if the case does not exist."""
+    if evidence_in_collection():
+        if not archive.find_one("cases", {"case_id": case_id}, {"_id": 1}):
+            return None
+        evidence = mongodb.get_collection(EVIDENCE)
+        query = {"case_id": case_id}
+        return list(evidence.find(query).sort("_id", 1).skip(skip).limit(limit)), evidence.count_documents(query)
+
+    pipeline = [
+        {"$match": {"case_id": case_id}},
+        {"$project": {
+            "items": {"$slice": [{"$ifNull": ["$evidence", []]}, skip, limit]},
+            "total": {"$size": {"$ifNull": ["$evidence", []]}},
+        }},
+    ]
+    for collection_name in ("cases", archive.ARCHIVES["cases"]):
+        pages = list(mongodb.get_collection(collection_name).aggregate(pipeline))
+        if pages:
+            return pages[0]["items"], pages[0]["total"]
+    return None
+
+
+def add_case_evidence(
+    case_id: str, item: Dict[str, Any], if_match: Optional[str]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Append an evidence item; returns (item, case summary)."""
+    item["evidence_id"] = new_evidence_id()
+    not_found = f"Case with ID {case_id} not found"
+    if not evidence_in_collection():
+        case = push_item("cases", {"case_id": case_id}, "evidence", item, if_match, not_found, WITHOUT_EVIDENCE)
+        return item, case
+
+    # The item is stored first and the count only raised once it is in;
+    # a refused case update (404, 412) takes the item out again
+    now = datetime.utcnow()
+    evidence = mongodb.get_collection(EVIDENCE)
+    evidence.insert_one(_evidence_document(case_id, item, now))
+    try:
+        case = archive.update(
+            "cases", {"case_id": case_id},
+            {"$inc": {"evidence_count": 1}, "$set": {"updated_at": now}},
+            if_match, not_found, WITHOUT_EVIDENCE,
+        )
+    except HTTPException:
+        evidence.delete_one({"_id": item["evidence_id"]})
+        raise
+    return item, case
+
+
+def update_case_evidence(
+    case_id: str, evidence_id: str, changes: Dict[str, Any], if_match: Optional[str]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Change fields of one evidence item; returns (item, case summary)."""
+    if not evidence_in_collection():
+        projection = {"evidence": {"$elemMatch": {"evidence_id": evidence_id}}, "version": 1, "updated_at": 1}
+        case = set_item_fields(
+            "cases", {"case_id": case_id}, "evidence", "evidence_id", evidence_id, changes,
+            if_match, f"Evidence {evidence_id} not found in case {case_id}", projection,
+        )
+        return case["evidence"][0], case
+
+    evidence = mongodb.get_collection(EVIDENCE)
+    if not evidence.count_documents({"_id": evidence_id, "case_id": case_id}, limit=1):
+        raise _evidence_not_found(case_id, evidence_id)
+    case = archive.update(
+        "cases", {"case_id": case_id}, {"$set": {"updated_at": datetime.utcnow()}},
+        if_match, f"Case with ID {case_id} not found", WITHOUT_EVIDENCE,
+    )
+    item = evidence.find_one_and_update(
+        {"_id": evidence_id, "case_id": case_id}, {"$set": changes}, return_document=ReturnDocument.AFTER
+    )
+    if item is None:
+        raise _evidence_not_found(case_id, evidence_id)
+    return item, case
+
+
+def remove_case_evidence(case_id: str, evidence_id: str, if_match: Optional[str]) -> Dict[str, Any]:
+    """Delete one evidence item; returns the case summary."""
+    if not evidence_in_collection():
+        return pull_item(
+            "cases", {"case_id": case_id}, "evidence", "evidence_id", evidence_id,
+            if_match, f"Evidence {evidence_id} not found in case {case_id}", WITHOUT_EVIDENCE,
+        )
+
+    # Only the request that actually deleted the item lowers the count; a
+    # refused case update (404, 412) puts the item back
+    evidence = mongodb.get_collection(EVIDENCE)
+    item = evidence.find_one_and_delete({"_id": evidence_id, "case_id": case_id})
+    if item is None:
+        raise _evidence_not_found(case_id, evidence_id)
+    try:
+        return archive.update(
+            "cases", {"case_id": case_id},
+            {"$inc": {"evidence_count": -1}, "$set": {"updated_at": datetime.utcnow()}},
+            if_match, f"Case with ID {case_id} not found", WITHOUT_EVIDENCE,
+        )
+    except HTTPException:
+        evidence.insert_one(item)
+        raise
@@ -0,0 +1,209 @@
+import bisect
+import heapq
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.storage import repository
+
+logger = logging.getLogger(__name__)
+
+suggest_terms = metrics.gauge("suggest_terms", "Distinct values in the typeahead index, by field")
+suggest_rebuild_seconds = metrics.histogram(
+    "suggest_rebuild_seconds", "Time to rebuild the typeahead index", [0.1, 0.5, 1, 5, 15, 60]
+)
+
+# Suggestable field -> (repository, field path)
+FIELDS = {
+    "perpetrator": ("cases", "perpetrators.name"),
+    "region": ("cases", "location.region"),
+    "city": ("incident_reports", "incident_details.location.city"),
+}
+
+
+def normalize(value: str) -> str:
+    """Match key of a value: case-folded, with runs of whitespace collapsed."""
+    return " ".join(value.split()).casefold()
+
+
+class PrefixIndex:
+    """
+    Frequency-ranked prefix lookups over the distinct values of one field.
+
+    Normalized values are kept in a sorted array, so the values starting
+    with a prefix are one bisect range. Short prefixes cover much of the
+    array, so their best-ranked values are precomputed and kept current as
+    counts grow; a longer prefix ranks its small range on the fly.
+    """
+
+    def __init__(self, size: int, cached_length: int):
+        self.size = size
+        self.cached_length = cached_length
+        self._keys: List[str] = []
+        self._counts: Dict[str, int] = {}
+        self._labels: Dict[str, str] = {}
+        self._top: Dict[str, List[str]] = {}
+
+    @classmethod
+    def from_counts(cls, counts: Dict[Any, int], size: int, cached_length: int) -> "PrefixIndex":
+        """Build from value counts in one sort; spellings that normalize alike are merged."""
+        index = cls(size, cached_length)
+        label_counts: Dict[str, int] = {}
+        for value, count in counts.items():
+            if not isinstance(value, str) or not normalize(value):
+                continue
+            key = normalize(value)
+            index._counts[key] = index._counts.get(key, 0) + count
+            if count > label_counts.get(key, -1):
+                index._labels[key], label_counts[key] = " ".join(value.split()), count
+        index._keys = sorted(index._counts)
+
+        candidates: Dict[str, List[str]] = {}
+        for key in index._keys:
+            for n in range(min(len(key), cached_length) + 1):
+                candidates.setdefault(key[:n], []).append(key)
+        index._top = {
+            prefix: heapq.nsmallest(size, keys, key=index._rank) for prefix, keys in candidates.items()
+        }
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _rank(self, key: str) -> Tuple[int, str]:
+        return -self._counts[key], key
+
+    def add(self, value: str, count: int = 1):
+        """Count `count` more uses of `value`; a count of 0 only makes a new value suggestible."""
+        key = normalize(value)
+        if not key:
+            return
+        if key not in self._counts:
+            # Lock-free readers look keys up in _counts and _labels, so fill those first
+            self._counts[key] = 0
+            self._labels[key] = " ".join(value.split())
+            bisect.insort(self._keys, key)
+        elif not count:
+            return
+        self._counts[key] += count
+        for n in range(min(len(key), self.cached_length) + 1):
+            top = self._top.setdefault(key[:n], [])
+            if key in top:
+                top.remove(key)
+            bisect.insort(top, key, key=self._rank)
+            del top[self.size:]
+
+    def suggest(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """Up to `limit` (value, count) pairs starting with `prefix`, most frequent first."""
+        key = normalize(prefix)
+        if len(key) <= self.cached_length:
+            keys = self._top.get(key, [])[:limit]
+        else:
+            lo = bisect.bisect_left(self._keys, key)
+            hi = bisect.bisect_left(self._keys, key[:-1] + chr(ord(key[-1]) + 1), lo)
+            keys = heapq.nsmallest(limit, (self._keys[i] for i in range(lo, hi)), key=self._rank)
+        return [(self._labels[k], self._counts[k]) for k in keys]
+
+
+class Suggester:
+    """
+    Typeahead indexes of all suggestable fields in this worker.
+
+    Built from per-value counts at startup and rebuilt every
+    SUGGEST_REFRESH_INTERVAL_SECONDS in a background thread; between
+    rebuilds the API's own writes are added as they happen. Writes made
+    while a rebuild runs are replayed onto the new indexes before the swap.
+    """
+
+    def __init__(self):
+        self._indexes: Optional[Dict[str, PrefixIndex]] = None
+        self._pending: Optional[List[Tuple[str, str, int]]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._indexes is not None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="suggest-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        interval = settings.SUGGEST_REFRESH_INTERVAL_SECONDS
+        while True:
+            try:
+                self.rebuild()
+            except Exception as e:
+                logger.warning("Could not build the typeahead index: %s", e)
+            if self._stop.wait(interval if self.ready else min(interval, 30.0)):
+                return
+
+    def rebuild(self):
+        started = time.perf_counter()
+        with self._lock:
+            self._pending = []
+        try:
+            indexes = {
+                field: PrefixIndex.from_counts(
+                    repository(name).count_values(path, {}, include_archived=True),
+                    settings.SUGGEST_MAX_RESULTS, settings.SUGGEST_CACHED_PREFIX_LENGTH,
+                )
+                for field, (name, path) in FIELDS.items()
+            }
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for field, value, count in self._pending:
+                indexes[field].add(value, count)
+            self._pending = None
+            self._indexes = indexes
+        for field, index in indexes.items():
+            suggest_terms.set(len(index), field=field)
+        suggest_rebuild_seconds.observe(time.perf_counter() - started)
+
+    def record(self, field: str, values: Iterable[Optional[str]], count: int = 1):
+        """Add values written by this worker to the index of `field`."""
+        if not settings.SUGGEST_ENABLED:
+            return
+        values = [v for v in values if isinstance(v, str) and v.strip()]
+        if not values:
+            return
+        with self._lock:
+            for value in values:
+                if self._pending is not None:
+                    self._pending.append((field, value, count))
+                if self._indexes is not None:
+                    self._indexes[field].add(value, count)
+
+    def suggest(self, field: str, prefix: str, limit: int) -> Optional[List[Tuple[str, int]]]:
+        """Ranked suggestions, or None while the first build is still running."""
+        indexes = self._indexes
+        if indexes is None:
+            return None
+        return indexes[field].suggest(prefix, limit)
+
+
+suggester = Suggester()
+
+
+def record_case(case: Dict[str, Any], count: int = 1):
+    """Feed the perpetrator names and region of a case (or of a case update, with count 0)."""
+    suggester.record("perpetrator", [p.get("name") for p in case.get("perpetrators") or []], count)
+    suggester.record("region", [(case.get("location") or {}).get("region")], count)
+
+
+def record_report(report: Dict[str, Any], count: int = 1):
+    """Feed the city of a report (or of a report update, with count 0)."""
+    location = (report.get("incident_details") or {}).get("location") or {}
+    suggester.record("city", [location.get("city")], count)
@@ -0,0 +1,165 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.core.config import settings
+from app.core.database import mongodb
+
+SYNC_ENTITIES = {
+    "cases": {"collection": "cases", "key": "case_id"},
+    "reports": {"collection": "incident_reports", "key": "report_id"},
+    "victims": {"collection": "victims", "key": "_id"},
+}
+TOMBSTONES = "tombstones"
+
+# A keyset position: (timestamp in ms, _id as string); None id means "from the start of that ms"
+Position = Tuple[int, Optional[str]]
+START: Position = (0, None)
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+class ExpiredToken(ValueError):
+    pass
+
+
+def _millis(value: datetime) -> int:
+    return int(value.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _datetime(millis: int) -> datetime:
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+
+def encode_token(positions: Dict[str, Position], issued: datetime) -> str:
+    payload = {"v": 1, "issued": _millis(issued), "pos": {name: list(pos) for name, pos in positions.items()}}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token: Optional[str]) -> Dict[str, Position]:
+    """
+    Read the per-collection positions from a sync token.
+
+    Raises InvalidToken for malformed tokens and ExpiredToken when the token is
+    older than the tombstone retention, since deletions may have been missed.
+    """
+    if not token:
+        return {}
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        positions = {name: (int(pos[0]), pos[1]) for name, pos in payload["pos"].items()}
+        issued = _datetime(int(payload["issued"]))
+    except (ValueError, KeyError, TypeError, IndexError):
+        raise InvalidToken("Malformed sync token")
+    if issued < datetime.utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+        raise ExpiredToken("Sync token is older than the tombstone retention")
+    return positions
+
+
+def _after(field: str, position: Position, horizon: datetime) -> Dict[str, Any]:
+    """Filter for documents strictly after `position` in (field, _id) order, up to `horizon`."""
+    millis, last_id = position
+    since = _datetime(millis)
+    if last_id is None:
+        return {field: {"$gte": since, "$lte": horizon}}
+    last_id = ObjectId(last_id) if ObjectId.is_valid(last_id) else last_id
+    return {
+        field: {"$lte": horizon},
+        "$or": [{field: {"$gt": since}}, {field: since, "_id": {"$gt": last_id}}],
+    }
+
+
+def _page(collection_name: str, field: str, position: Position, horizon: datetime, limit: int, query=None):
+    cursor = mongodb.get_analytics_collection(collection_name).find({**_after(field, position, horizon), **(query or {})})
+    documents = list(cursor.sort([(field, 1), ("_id", 1)]).limit(limit))
+    if documents:
+        last = documents[-1]
+        position = (_millis(last[field]), str(last["_id"]))
+    return documents, position
+
+
+def changes_since(token: Optional[str], entities: Iterable[str], limit: int) -> Dict[str, Any]:
+    """
+    Collect documents changed and keys deleted after the token's positions.
+
+    Each collection is read in (updated_at, _id) order from its own position,
+    at most `limit` documents per collection. A token should be reused with
+    the same entity list it was issued for. Only changes older than
+    SYNC_SAFETY_LAG_SECONDS are returned, so writes that commit slightly out
+    of timestamp order are not skipped; they show up on the next sync.
+    """
+    positions = decode_token(token)
+    now = datetime.utcnow()
+    horizon = now - timedelta(seconds=settings.SYNC_SAFETY_LAG_SECONDS)
+    result: Dict[str, Any] = {"deleted": {}}
+    has_more = False
+
+    for name in entities:
+        spec = SYNC_ENTITIES[name]
+        documents, positions[name] = _page(spec["collection"], "updated_at", positions.get(name, START), horizon, limit)
+        has_more = has_more or len(documents) == limit
+        for document in documents:
+            document["_id"] = str(document["_id"])
+        result[name] = documents
+
+    tombstones, positions[TOMBSTONES] = _page(
+        TOMBSTONES, "deleted_at", positions.get(TOMBSTONES, START), horizon, limit, {"entity": {"$in": list(entities)}}
+    )
+    has_more = has_more or len(tombstones) == limit
+    for tombstone in tombstones:
+        result["deleted"].setdefault(tombstone["entity"], []).append(tombstone["key"])
+
+    result["token"] = encode_token(positions, now)
+    result["has_more"] = has_more
+    return result
+
+
+def record_tombstones(entity: str, keys: List[str]):
+    """Remember deleted documents so offline clients can remove their copies."""
+    if keys:
+        now = datetime.utcnow()
+        mongodb.get_collection(TOMBSTONES).insert_many(
+            [{"entity": entity, "key": key, "deleted_at": now} for key in keys]
+        )
+
+
+def _entity(collection_name: str) -> Optional[Tuple[str, str]]:
+    for name, spec in SYNC_ENTITIES.items():
+        if spec["collection"] == collection_name:
+            return name, spec["key"]
+    return None
+
+
+def record_removals(collection_name: str, documents: Iterable[Dict[str, Any]]):
+    """Tombstone documents removed from a synced hot collection, e.g. by archival."""
+    entity = _entity(collection_name)
+    if entity is not None:
+        name, key = entity
+        record_tombstones(name, [str(d[key]) for d in documents])
+
+
+def forget_removal(collection_name: str, document: Dict[str, Any]):
+    """
+    Drop the tombstones of a document that is back in its hot collection.
+    Clients that already applied the deletion get the document again once it
+    is updated.
+    """
+    entity = _entity(collection_name)
+    if entity is not None:
+        name, key = entity
+        mongodb.get_collection(TOMBSTONES).delete_many({"entity": name, "key": str(document[key])})
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
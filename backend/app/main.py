@@ -1,10 +1,22 @@
 
 from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 
+from app.core.admission import AdmissionControlMiddleware
+from app.core.anomaly import spike_detector
+from app.core.cache import cache_invalidator
 from app.core.config import settings
 from app.core.database import mongodb
+from app.core.indexes import ensure_indexes
+from app.core.intake import intake_queue
+from app.core.jobs import job_runner
+from app.core.loop_monitor import RouteTrackingMiddleware, loop_monitor
+from app.core.metrics import metrics
+from app.core.profiling import ProfilingMiddleware, profiling_enabled
+from app.core.storage import require_mongodb, storage, uses_mongodb
+from app.core.suggest import suggester
 
 # Import routers
 from app.routes.cases import router as cases_router
@@ -12,6 +24,11 @@ from app.routes.reports import router as reports_router
 from app.routes.victims import router as victims_router
 from app.routes.analytics import router as analytics_router
 from app.routes.auth import router as auth_router
+from app.routes.export import router as export_router
+from app.routes.perpetrators import router as perpetrators_router
+from app.routes.sync import router as sync_router
+from app.routes.jobs import router as jobs_router
+from app.routes.suggest import router as suggest_router
 
 # Initialize OAuth2 password bearer for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -22,6 +39,10 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
+# Rate limits and concurrency caps; added first so CORS headers wrap its 429/503 answers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
 # Set up CORS middleware
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -32,15 +53,61 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+# Sample requests with the stack profiler (see PROFILING_* settings)
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Attribute event loop stalls to the route being served
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(RouteTrackingMiddleware, monitor=loop_monitor)
+
 # Connect to MongoDB on startup and store the instance in app state
 @app.on_event("startup")
 async def startup_db_client():
+    if not uses_mongodb():
+        # Embedded storage: open the database file and create missing tables
+        storage.connect()
+        if settings.SUGGEST_ENABLED:
+            suggester.start()
+        if settings.LOOP_MONITOR_ENABLED:
+            loop_monitor.start()
+        return
     mongodb.connect_to_mongodb()
     app.state.mongodb = mongodb  # <-- FIX ADDED HERE
+    try:
+        ensure_indexes()
+    except Exception as e:
+        print(f"Could not ensure MongoDB indexes: {e}")
+    if settings.ANOMALY_DETECTION_ENABLED:
+        try:
+            spike_detector.load_state()
+        except Exception as e:
+            print(f"Could not load anomaly detector state: {e}")
+    if settings.DOC_CACHE_ENABLED and settings.DOC_CACHE_CHANGE_STREAM:
+        cache_invalidator.start(mongodb.db)
+    if settings.INTAKE_MODE == "buffered":
+        intake_queue.start()
+    job_runner.start(settings.JOBS_WORKERS)
+    if settings.SUGGEST_ENABLED:
+        suggester.start()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
 
 # Close MongoDB connection on shutdown
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    loop_monitor.stop()
+    suggester.stop()
+    if not uses_mongodb():
+        return
+    cache_invalidator.stop()
+    intake_queue.stop()
+    job_runner.stop()
+    if settings.ANOMALY_DETECTION_ENABLED:
+        try:
+            spike_detector.save_state()
+        except Exception as e:
+            print(f"Could not save anomaly detector state: {e}")
     mongodb.close_mongodb_connection()
 
 # Root endpoint
@@ -48,11 +115,24 @@ async def shutdown_db_client():
 async def root():
     return {"message": "Welcome to Human Rights Monitor MIS API"}
 
+# Prometheus-compatible metrics for this worker process
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return metrics.render()
+
 # Include API routers
 app.include_router(auth_router, prefix=f"{settings.API_V1_STR}/auth", tags=["authentication"])
 app.include_router(cases_router, prefix=f"{settings.API_V1_STR}/cases", tags=["cases"])
 app.include_router(reports_router, prefix=f"{settings.API_V1_STR}/reports", tags=["reports"])
 app.include_router(victims_router, prefix=f"{settings.API_V1_STR}/victims", tags=["victims"])
-app.include_router(analytics_router, prefix=f"{settings.API_V1_STR}/analytics", tags=["analytics"])
+app.include_router(suggest_router, prefix=f"{settings.API_V1_STR}/suggest", tags=["suggest"])
+
+# Routers built on MongoDB pipelines; they answer 501 with STORAGE_BACKEND=sqlite
+mongodb_only = [Depends(require_mongodb)]
+app.include_router(analytics_router, prefix=f"{settings.API_V1_STR}/analytics", tags=["analytics"], dependencies=mongodb_only)
+app.include_router(export_router, prefix=f"{settings.API_V1_STR}/export", tags=["export"], dependencies=mongodb_only)
+app.include_router(perpetrators_router, prefix=f"{settings.API_V1_STR}/perpetrators", tags=["perpetrators"], dependencies=mongodb_only)
+app.include_router(sync_router, prefix=f"{settings.API_V1_STR}/sync", tags=["sync"], dependencies=mongodb_only)
+app.include_router(jobs_router, prefix=f"{settings.API_V1_STR}/jobs", tags=["jobs"], dependencies=mongodb_only)
 
 
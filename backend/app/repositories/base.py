@@ -0,0 +1,122 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.conditional import document_etag
+
+# Queries passed to repositories are MongoDB-style filter documents limited
+# to a portable subset: `{"field.path": value}` for equality (an array field
+# matches if any element is equal) and `{"field.path": {op: value}}` with
+# op one of $lt, $lte, $gt, $gte, $ne and $in. Every backend supports it.
+QUERY_OPERATORS = ("$lt", "$lte", "$gt", "$gte", "$ne", "$in")
+
+Document = Dict[str, Any]
+Sort = Sequence[Tuple[str, int]]
+
+
+class DuplicateRecord(Exception):
+    """Raised when an insert would store a second record with the same key."""
+
+
+class Repository(ABC):
+    """
+    Storage operations the API needs for one kind of record.
+
+    Records are addressed by `key`, their public ID field (`case_id`,
+    `report_id`, `_id` or `username`). Writes that change a record
+    increment its `version`, and `update` honours If-Match exactly like
+    `conditional_update`, so ETags are the same whatever the backend.
+    """
+
+    name: str
+    key: str
+
+    @abstractmethod
+    def insert(self, document: Document) -> Document:
+        """Store a new record and return it as stored, with its `_id`."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Document]:
+        """The record with this key, including archived ones, or None."""
+
+    def revision(self, key: str) -> Optional[str]:
+        """ETag of the stored record, or None; lets caches check an entry without reading it all."""
+        document = self.get(key)
+        return document_etag(document) if document else None
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Tuple[List[Document], List[str]]:
+        """Records for `keys` in the requested order, and the keys that were not found."""
+
+    @abstractmethod
+    def find(
+        self,
+        query: Document,
+        sort: Sort,
+        skip: int = 0,
+        limit: int = 100,
+        include_archived: bool = False,
+    ) -> List[Document]:
+        """One page of the records matching `query`; a `limit` of 0 means no limit."""
+
+    def find_newest(
+        self,
+        query: Document,
+        before: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        include_archived: bool = False,
+    ) -> List[Document]:
+        """
+        One page of matching records newest first, in (created_at, key) order.
+
+        `before` is the key of the last record of the previous page (a keyset
+        cursor); an unknown key raises 400. IDs alone do not sort by age
+        (legacy and client-chosen IDs), so the page continues behind that
+        record's creation time with the key breaking ties, read as two range
+        queries.
+        """
+        sort = [("created_at", -1), (self.key, -1)]
+        if before is None:
+            return self.find(query, sort, skip, limit, include_archived)
+        after = self.get(before)
+        if after is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown cursor {before}")
+        window = skip + limit if limit else 0
+        page = self.find(
+            {**query, "created_at": after.get("created_at"), self.key: {"$lt": after[self.key]}},
+            sort, 0, window, include_archived,
+        )
+        if not window or len(page) < window:
+            page += self.find(
+                {**query, "created_at": {"$lt": after.get("created_at")}},
+                sort, 0, window - len(page) if window else 0, include_archived,
+            )
+        return page[skip:window] if window else page[skip:]
+
+    @abstractmethod
+    def count(self, query: Document, include_archived: bool = False) -> int:
+        """Number of records matching `query`."""
+
+    @abstractmethod
+    def count_values(self, field: str, query: Document, include_archived: bool = False) -> Dict[Any, int]:
+        """
+        Number of matching records per value of `field`, most frequent first.
+
+        Array fields are counted per element, like `$unwind` + `$group`, and so
+        are fields of documents in an array, such as `perpetrators.name`.
+        """
+
+    @abstractmethod
+    def update(
+        self,
+        key: str,
+        changes: Document,
+        if_match: Optional[str],
+        not_found_detail: str,
+    ) -> Document:
+        """
+        Set the fields in `changes` (dotted paths allowed) and return the new
+        version. Raises 404 for an unknown key and 412 on an If-Match mismatch.
+        """
@@ -0,0 +1,98 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError
+
+from app.core import archive
+from app.core.batch import fetch_many, id_query
+from app.core.conditional import conditional_update, document_etag
+from app.core.database import mongodb
+from app.repositories.base import Document, DuplicateRecord, Repository, Sort
+
+# Fields `document_etag` is computed from
+_REVISION_FIELDS = {"version": 1, "updated_at": 1, "created_at": 1}
+
+
+class MongoRepository(Repository):
+    """
+    Repository over one MongoDB collection.
+
+    With `archived` the collection has an archive (see `app.core.archive`):
+    lookups fall through to it, lists and counts include it on request and
+    updating an archived record restores it. `intake` routes inserts through
+    the intake write concern.
+    """
+
+    def __init__(self, name: str, key: str, archived: bool = False, intake: bool = False):
+        self.name = name
+        self.key = key
+        self.archived = archived
+        self.intake = intake
+
+    def _collection(self) -> Collection:
+        return mongodb.get_collection(self.name)
+
+    def _key_query(self, key: str) -> Document:
+        return id_query(key) if self.key == "_id" else {self.key: key}
+
+    def insert(self, document: Document) -> Document:
+        collection = mongodb.get_intake_collection(self.name) if self.intake else self._collection()
+        try:
+            result = collection.insert_one(document)
+        except DuplicateKeyError as e:
+            raise DuplicateRecord(document.get(self.key)) from e
+        return collection.find_one({"_id": result.inserted_id})
+
+    def get(self, key: str) -> Optional[Document]:
+        if self.archived:
+            return archive.find_one(self.name, self._key_query(key))
+        return self._collection().find_one(self._key_query(key))
+
+    def revision(self, key: str) -> Optional[str]:
+        if self.archived:
+            document = archive.find_one(self.name, self._key_query(key), _REVISION_FIELDS)
+        else:
+            document = self._collection().find_one(self._key_query(key), _REVISION_FIELDS)
+        return document_etag(document) if document else None
+
+    def get_many(self, keys: List[str]) -> Tuple[List[Document], List[str]]:
+        fallback = mongodb.get_collection(archive.ARCHIVES[self.name]) if self.archived else None
+        return fetch_many(self._collection(), self.key, keys, fallback=fallback)
+
+    def find(
+        self,
+        query: Document,
+        sort: Sort,
+        skip: int = 0,
+        limit: int = 100,
+        include_archived: bool = False,
+    ) -> List[Document]:
+        return archive.find(self.name, query, list(sort), skip, limit, include_archived and self.archived)
+
+    def count(self, query: Document, include_archived: bool = False) -> int:
+        if self.archived:
+            return archive.count_documents(self.name, query, include_archived)
+        return mongodb.get_analytics_collection(self.name).count_documents(query)
+
+    def count_values(self, field: str, query: Document, include_archived: bool = False) -> Dict[Any, int]:
+        # Unwind every level of the path, so arrays of documents are counted per
+        # element; $unwind passes scalars and subdocuments through unchanged
+        parts = field.split(".")
+        unwinds = [{"$unwind": "$" + ".".join(parts[:n])} for n in range(1, len(parts) + 1)]
+        pipeline = archive.match_stages(self.name, query, include_archived and self.archived) + unwinds + [
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+        ]
+        groups = mongodb.get_analytics_collection(self.name).aggregate(pipeline)
+        return {group["_id"]: group["count"] for group in groups if group["_id"] is not None}
+
+    def update(
+        self,
+        key: str,
+        changes: Document,
+        if_match: Optional[str],
+        not_found_detail: str,
+    ) -> Document:
+        if self.archived:
+            return archive.update(self.name, self._key_query(key), {"$set": changes}, if_match, not_found_detail)
+        return conditional_update(self._collection(), self._key_query(key), {"$set": changes}, if_match, not_found_detail)
@@ -0,0 +1,284 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+from app.core.conditional import etag_matches
+from app.repositories.base import QUERY_OPERATORS, Document, DuplicateRecord, Repository, Sort
+
+# Fixed width, so stored dates compare and sort correctly as strings
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+_COMPARISONS = {"$lt": "<", "$lte": "<=", "$gt": ">", "$gte": ">="}
+
+
+def _default(value: Any) -> Any:
+    """JSON encoding of the BSON types records contain; dates are tagged so they decode as datetimes."""
+    if isinstance(value, datetime):
+        return {"$date": _date_string(value)}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    raise TypeError(f"Cannot store {type(value).__name__} in a JSON document")
+
+
+def _object_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "$date" in obj:
+            return datetime.strptime(obj["$date"], DATE_FORMAT)
+        if "$oid" in obj:
+            return ObjectId(obj["$oid"])
+    return obj
+
+
+def _date_string(value: datetime) -> str:
+    # Stored like MongoDB stores dates: naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime(DATE_FORMAT)
+
+
+def dumps(document: Document) -> str:
+    return json.dumps(document, default=_default, separators=(",", ":"))
+
+
+def loads(text: str) -> Document:
+    return json.loads(text, object_hook=_object_hook)
+
+
+def _param(value: Any) -> Any:
+    """A query value as bound to a statement, in the form json_extract returns it."""
+    if isinstance(value, datetime):
+        return _date_string(value)
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _set_path(document: Document, path: str, value: Any):
+    """Apply one `$set` change; intermediate documents are created as needed."""
+    *parents, name = path.split(".")
+    for part in parents:
+        document = document.setdefault(part, {})
+    document[name] = value
+
+
+class SQLiteStore:
+    """
+    Embedded storage in one SQLite file, for deployments without a MongoDB
+    server. Each repository is a table of JSON documents keyed by the record's
+    public ID; filtered fields get expression indexes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Read-modify-write under the database write lock."""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SQLiteRepository(Repository):
+    """
+    Repository over one table of a `SQLiteStore`.
+
+    `array_fields` are matched per element through `json_each`, like MongoDB
+    matches arrays; `date_fields` are compared as stored date strings.
+    `indexed` fields get an index on (field, key), so filtered lists sorted
+    by key are a range scan. There is no archive: every record stays in its
+    table, and `include_archived` has nothing to add.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteStore,
+        name: str,
+        key: str,
+        array_fields: Sequence[str] = (),
+        date_fields: Sequence[str] = (),
+        indexed: Sequence[str] = (),
+    ):
+        self.store = store
+        self.name = name
+        self.key = key
+        self.array_fields = set(array_fields)
+        self.date_fields = set(date_fields)
+        self.indexed = list(indexed)
+
+    def create_schema(self):
+        conn = self.store.connection()
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.name} (record_key TEXT PRIMARY KEY, doc TEXT NOT NULL)")
+        for field in self.indexed:
+            index_name = f"{self.name}_{field.replace('.', '_')}"
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {index_name} ON {self.name} ({self._expression(field)}, record_key)"
+            )
+
+    def _path(self, field: str, value: Any = None) -> str:
+        path = "$." + ".".join(f'"{part}"' for part in field.split("."))
+        if field in self.date_fields or isinstance(value, datetime):
+            path += '."$date"'
+        return path
+
+    def _expression(self, field: str, value: Any = None) -> str:
+        if field == self.key:
+            return "record_key"
+        return f"json_extract(doc, '{self._path(field, value)}')"
+
+    def _condition(self, field: str, op: str, value: Any) -> Tuple[str, List[Any]]:
+        if op not in QUERY_OPERATORS and op != "$eq":
+            raise ValueError(f"Unsupported query operator {op} on {field}")
+        values = [_param(v) for v in value] if op == "$in" else [_param(value)]
+        sample = value[0] if op == "$in" and value else value
+
+        if field in self.array_fields and field != self.key:
+            elements = f"SELECT 1 FROM json_each(doc, '{self._path(field)}') WHERE value"
+            if op == "$in":
+                return f"EXISTS ({elements} IN ({', '.join('?' * len(values))}))", values
+            if op == "$ne":
+                return f"NOT EXISTS ({elements} = ?)", values
+            return f"EXISTS ({elements} {_COMPARISONS.get(op, '=')} ?)", values
+
+        expression = self._expression(field, sample)
+        if op == "$in":
+            return f"{expression} IN ({', '.join('?' * len(values))})", values
+        if op == "$ne":
+            return f"{expression} IS NOT ?", values
+        return f"{expression} {_COMPARISONS.get(op, 'IS')} ?", values
+
+    def _where(self, query: Document) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for field, condition in query.items():
+            operators = condition if isinstance(condition, dict) and condition and all(
+                k.startswith("$") for k in condition
+            ) else {"$eq": condition}
+            for op, value in operators.items():
+                clause, values = self._condition(field, op, value)
+                clauses.append(clause)
+                params.extend(values)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _record_key(self, document: Document) -> str:
+        return str(document[self.key])
+
+    def insert(self, document: Document) -> Document:
+        document = dict(document)
+        document.setdefault("_id", str(ObjectId()))
+        text = dumps(document)
+        try:
+            self.store.connection().execute(
+                f"INSERT INTO {self.name} (record_key, doc) VALUES (?, ?)", (self._record_key(document), text)
+            )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateRecord(document.get(self.key)) from e
+        return loads(text)
+
+    def get(self, key: str) -> Optional[Document]:
+        row = self.store.connection().execute(
+            f"SELECT doc FROM {self.name} WHERE record_key = ?", (key,)
+        ).fetchone()
+        return loads(row[0]) if row else None
+
+    def get_many(self, keys: List[str]) -> Tuple[List[Document], List[str]]:
+        rows = self.store.connection().execute(
+            f"SELECT doc FROM {self.name} WHERE record_key IN ({', '.join('?' * len(keys))})", keys
+        ).fetchall()
+        found = {self._record_key(doc): doc for doc in map(loads, (row[0] for row in rows))}
+        return [found[k] for k in keys if k in found], [k for k in keys if k not in found]
+
+    def find(
+        self,
+        query: Document,
+        sort: Sort,
+        skip: int = 0,
+        limit: int = 100,
+        include_archived: bool = False,
+    ) -> List[Document]:
+        where, params = self._where(query)
+        order = ", ".join(f"{self._expression(field)} {'DESC' if direction < 0 else 'ASC'}" for field, direction in sort)
+        sql = f"SELECT doc FROM {self.name}{where}" + (f" ORDER BY {order}" if order else "") + " LIMIT ? OFFSET ?"
+        rows = self.store.connection().execute(sql, params + [limit or -1, skip]).fetchall()
+        return [loads(row[0]) for row in rows]
+
+    def count(self, query: Document, include_archived: bool = False) -> int:
+        where, params = self._where(query)
+        return self.store.connection().execute(f"SELECT COUNT(*) FROM {self.name}{where}", params).fetchone()[0]
+
+    def count_values(self, field: str, query: Document, include_archived: bool = False) -> Dict[Any, int]:
+        where, params = self._where(query)
+        array_field = next((f for f in self.array_fields if field == f or field.startswith(f + ".")), None)
+        if array_field:
+            # Inside an array of documents the rest of the path is read from each element
+            rest = field[len(array_field) + 1:]
+            value = f"json_extract(element.value, '$.{rest}')" if rest else "element.value"
+            where = f"{where} AND {value} IS NOT NULL" if where else f" WHERE {value} IS NOT NULL"
+            sql = (
+                f"SELECT {value}, COUNT(*) FROM {self.name}, "
+                f"json_each({self.name}.doc, '{self._path(array_field)}') AS element{where} "
+                f"GROUP BY 1 ORDER BY 2 DESC"
+            )
+        else:
+            expression = self._expression(field)
+            where = f"{where} AND {expression} IS NOT NULL" if where else f" WHERE {expression} IS NOT NULL"
+            sql = f"SELECT {expression}, COUNT(*) FROM {self.name}{where} GROUP BY 1 ORDER BY 2 DESC"
+        return {value: count for value, count in self.store.connection().execute(sql, params)}
+
+    def update(
+        self,
+        key: str,
+        changes: Document,
+        if_match: Optional[str],
+        not_found_detail: str,
+    ) -> Document:
+        with self.store.transaction() as conn:
+            row = conn.execute(f"SELECT doc FROM {self.name} WHERE record_key = ?", (key,)).fetchone()
+            if row is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+            document = loads(row[0])
+            if not etag_matches(if_match, document):
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="If-Match does not match the current version"
+                )
+            for path, value in changes.items():
+                _set_path(document, path, value)
+            document["version"] = (document.get("version") or 0) + 1
+            text = dumps(document)
+            conn.execute(f"UPDATE {self.name} SET doc = ? WHERE record_key = ?", (text, key))
+        return loads(text)
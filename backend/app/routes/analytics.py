@@ -1,26 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 from datetime import datetime, timedelta
+import asyncio
 import json
 
+from app.core import archive
+from app.core.anomaly import spike_detector
+from app.core.cache import LRUCache
+from app.core.config import settings
 from app.core.database import mongodb
-from app.schemas.analytics import AnalyticsResponse, ViolationTypeCount, TimelineData, GeoData
+from app.core.hotspots import SOURCES as HOTSPOT_SOURCES, find_hotspots, np
+from app.schemas.analytics import (
+    AnalyticsResponse, Anomaly, Hotspot, ViolationTypeCount, TimelineData, GeoData, VictimAnalytics,
+)
 
 router = APIRouter()
 
+hotspot_cache = LRUCache("hotspots", max_entries=64, ttl_seconds=settings.HOTSPOT_CACHE_TTL_SECONDS)
+
 
 @router.get("/violations", response_model=List[ViolationTypeCount])
-async def get_violation_counts():
+async def get_violation_counts(include_archived: bool = Query(False, description="Also count archived cases")):
     """
     Get counts of violations by type.
     
     This endpoint provides aggregated statistics about the number of human rights
     violations recorded in the system, grouped by violation type.
     """
-    cases_collection = mongodb.get_collection("cases")
+    cases_collection = mongodb.get_analytics_collection("cases")
     
     # Aggregate cases by violation type
-    pipeline = [
+    pipeline = archive.match_stages("cases", {}, include_archived) + [
         {"$unwind": "$violation_types"},
         {"$group": {
             "_id": "$violation_types",
@@ -43,7 +55,8 @@ async def get_violation_counts():
 @router.get("/geodata", response_model=List[GeoData])
 async def get_geo_data(
     country: Optional[str] = Query(None),
-    violation_type: Optional[str] = Query(None)
+    violation_type: Optional[str] = Query(None),
+    include_archived: bool = Query(False, description="Also count archived cases")
 ):
     """
     Get geographical data for violations.
@@ -51,7 +64,7 @@ async def get_geo_data(
     This endpoint provides location-based data for human rights violations,
     which can be used for map visualizations.
     """
-    cases_collection = mongodb.get_collection("cases")
+    cases_collection = mongodb.get_analytics_collection("cases")
     
     # Build match stage for filtering
     match_stage = {}
@@ -61,10 +74,7 @@ async def get_geo_data(
         match_stage["violation_types"] = violation_type
     
     # Aggregation pipeline
-    pipeline = []
-    if match_stage:
-        pipeline.append({"$match": match_stage})
-    
+    pipeline = archive.match_stages("cases", match_stage, include_archived)
     pipeline.extend([
         {"$group": {
             "_id": {
@@ -115,20 +125,64 @@ async def get_geo_data(
     return result
 
 
+TIMELINE_UNITS = ("day", "week", "month", "year")
+
+TIMELINE_GROUPS = {
+    "violation_type": "$violation_types",
+    "country": "$location.country",
+    "status": "$status",
+}
+
+
+def _bucket_start(value: datetime, unit: str) -> datetime:
+    """Truncate a datetime to the start of its bucket (weeks start on Monday)."""
+    day = datetime(value.year, value.month, value.day)
+    if unit == "day":
+        return day
+    if unit == "week":
+        return day - timedelta(days=day.weekday())
+    if unit == "month":
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def _next_bucket(value: datetime, unit: str) -> datetime:
+    """Start of the bucket following the one that starts at `value`."""
+    if unit == "day":
+        return value + timedelta(days=1)
+    if unit == "week":
+        return value + timedelta(weeks=1)
+    if unit == "month":
+        return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+    return value.replace(year=value.year + 1)
+
+
 @router.get("/timeline", response_model=List[TimelineData])
 async def get_timeline_data(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     violation_type: Optional[str] = Query(None),
-    interval: str = Query("month", description="Interval for grouping: day, week, month, year")
+    interval: str = Query("month", description="Interval for grouping: day, week, month, year"),
+    group_by: Optional[str] = Query(None, description="Split into series by: violation_type, country, status"),
+    fill_gaps: bool = Query(True, description="Return zero counts for periods without cases"),
+    include_archived: bool = Query(False, description="Also count archived cases")
 ):
     """
     Get timeline data for violations.
     
     This endpoint provides time-series data for human rights violations,
-    which can be used for timeline visualizations.
+    which can be used for timeline visualizations. With `group_by`, all series
+    are returned from a single pipeline, each labelled with its `series` value.
+    Missing periods are filled with zero counts on the server.
     """
-    cases_collection = mongodb.get_collection("cases")
+    cases_collection = mongodb.get_analytics_collection("cases")
+    
+    if group_by is not None and group_by not in TIMELINE_GROUPS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by must be one of: {', '.join(TIMELINE_GROUPS)}"
+        )
+    unit = interval if interval in TIMELINE_UNITS else "month"
     
     # Parse dates
     start = datetime.fromisoformat(start_date) if start_date else datetime.now() - timedelta(days=365)
@@ -144,74 +198,162 @@ async def get_timeline_data(
     if violation_type:
         match_stage["violation_types"] = violation_type
     
-    # Determine date format for grouping
-    date_format = {
-        "day": "%Y-%m-%d",
-        "week": "%G-W%V",
-        "month": "%Y-%m",
-        "year": "%Y"
-    }.get(interval, "%Y-%m")
+    # Aggregation pipeline: buckets are truncated dates, so no string parsing is needed
+    pipeline = archive.match_stages("cases", match_stage, include_archived)
+    if group_by == "violation_type":
+        pipeline.append({"$unwind": "$violation_types"})
+        if violation_type:
+            pipeline.append({"$match": {"violation_types": violation_type}})
     
-    # Aggregation pipeline
-    pipeline = [
-        {"$match": match_stage},
-        {"$project": {
-            "date_str": {"$dateToString": {"format": date_format, "date": "$date_occurred"}},
-            "violation_types": 1
-        }},
+    pipeline.extend([
         {"$group": {
-            "_id": "$date_str",
-            "count": {"$sum": 1},
-            "violations": {"$push": "$violation_types"}
+            "_id": {
+                "date": {"$dateTrunc": {"date": "$date_occurred", "unit": unit, "startOfWeek": "monday"}},
+                "series": TIMELINE_GROUPS[group_by] if group_by else None
+            },
+            "count": {"$sum": 1}
         }},
-        {"$sort": {"_id": 1}}
-    ]
+        {"$project": {"_id": 0, "date": "$_id.date", "series": "$_id.series", "count": 1}}
+    ])
+    
+    if fill_gaps:
+        pipeline.extend([
+            {"$densify": {
+                "field": "date",
+                "partitionByFields": ["series"],
+                "range": {
+                    "step": 1,
+                    "unit": unit,
+                    "bounds": [_bucket_start(start, unit), _next_bucket(_bucket_start(end, unit), unit)]
+                }
+            }},
+            {"$set": {"count": {"$ifNull": ["$count", 0]}}}
+        ])
+    
+    pipeline.append({"$sort": {"series": 1, "date": 1}})
     
     timeline_data = list(cases_collection.aggregate(pipeline))
     
     # Format the results
     result = []
     for item in timeline_data:
-        # Convert date string back to date object for the response
-        date_parts = item["_id"].split("-")
-        if len(date_parts) == 2:  # month format
-            date_obj = datetime(int(date_parts[0]), int(date_parts[1]), 1).date()
-        elif len(date_parts) == 3:  # day format
-            date_obj = datetime(int(date_parts[0]), int(date_parts[1]), int(date_parts[2])).date()
-        elif "W" in item["_id"]:  # week format
-            year, week = item["_id"].split("-W")
-            date_obj = datetime.strptime(f"{year}-W{week}-1", "%G-W%V-%u").date()
-        else:  # year format
-            date_obj = datetime(int(date_parts[0]), 1, 1).date()
-        
+        series = item.get("series")
         timeline_item = TimelineData(
-            date=date_obj,
+            date=item["date"].date(),
             count=item["count"],
-            violation_type=violation_type
+            violation_type=series if group_by == "violation_type" else violation_type,
+            series=str(series) if group_by and series is not None else None
         )
         result.append(timeline_item)
     
     return result
 
 
-@router.get("/", response_model=AnalyticsResponse)
-async def get_analytics_overview(
+@router.get("/anomalies", response_model=List[Anomaly])
+async def get_anomalies(
+    region: Optional[str] = Query(None, description="Region key (the country), e.g. Syria"),
+    violation_type: Optional[str] = Query(None),
+    since: Optional[str] = Query(None),
+    limit: int = Query(100, le=1000)
+):
+    """
+    List incident spikes flagged by the streaming detector, newest first.
+
+    Every new case and report updates rolling per-(region, violation type)
+    statistics; a spike is flagged when the current period's count exceeds the
+    weighted average by ANOMALY_THRESHOLD_SIGMA standard deviations.
+    """
+    anomalies_collection = mongodb.get_analytics_collection("anomalies")
+    
+    query = {}
+    if region:
+        query["region"] = region
+    if violation_type:
+        query["violation_type"] = violation_type
+    if since:
+        query["detected_at"] = {"$gte": datetime.fromisoformat(since)}
+    
+    return list(anomalies_collection.find(query).sort("detected_at", -1).limit(limit))
+
+
+@router.get("/anomalies/stream")
+async def stream_anomalies(request: Request):
+    """
+    Push spikes as Server-Sent Events as soon as this worker flags them.
+    """
+    queue = spike_detector.subscribe()
+    
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    anomaly = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: anomaly\ndata: {Anomaly(**anomaly).json()}\n\n"
+        finally:
+            spike_detector.unsubscribe(queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.get("/hotspots", response_model=List[Hotspot])
+async def get_hotspots(
+    source: str = Query("all", description="cases, reports or all"),
+    eps_km: float = Query(5.0, ge=0.1, le=500, description="Spatial neighborhood radius in km"),
+    eps_days: float = Query(7.0, ge=0.1, le=3650, description="Temporal neighborhood in days"),
+    min_samples: int = Query(5, ge=2, description="Incidents needed in a neighborhood to seed a cluster"),
+    min_cluster_size: int = Query(5, ge=1),
+    country: Optional[str] = Query(None),
+    violation_type: Optional[str] = Query(None),
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
-    country: Optional[str] = Query(None),
-    violation_type: Optional[str] = Query(None)
+    limit: int = Query(50, ge=1, le=500)
 ):
     """
-    Get comprehensive analytics overview.
-    
-    This endpoint provides a comprehensive overview of analytics data,
-    including counts, trends, and geographical distribution of human rights violations.
+    Find spatio-temporal clusters of cases and reports.
+
+    Incidents that are close in both space and time are grouped with a
+    grid-based, DBSCAN-style clustering, revealing possible coordinated
+    campaigns. Results are cached per filter set for HOTSPOT_CACHE_TTL_SECONDS.
     """
-    cases_collection = mongodb.get_collection("cases")
-    reports_collection = mongodb.get_collection("incident_reports")
-    victims_collection = mongodb.get_collection("victims")
+    if source != "all" and source not in HOTSPOT_SOURCES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="source must be one of: cases, reports, all"
+        )
+    if np is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Hotspot clustering requires numpy to be installed on the server"
+        )
     
-    # Build match stage for filtering
+    sources = list(HOTSPOT_SOURCES) if source == "all" else [source]
+    cache_key = (
+        tuple(sources), eps_km, eps_days, min_samples, min_cluster_size,
+        country, violation_type, start_date, end_date, limit
+    )
+    hotspots = hotspot_cache.get(cache_key)
+    if hotspots is None:
+        # Clustering is CPU-bound; keep it off the event loop
+        hotspots = await run_in_threadpool(
+            find_hotspots,
+            sources, eps_km, eps_days, min_samples, min_cluster_size, limit,
+            country=country,
+            violation_type=violation_type,
+            start_date=datetime.fromisoformat(start_date) if start_date else None,
+            end_date=datetime.fromisoformat(end_date) if end_date else None,
+        )
+        hotspot_cache.set(cache_key, hotspots)
+    
+    return hotspots
+
+
+def _case_match(
+    start_date: Optional[str], end_date: Optional[str], country: Optional[str], violation_type: Optional[str]
+) -> dict:
+    """Case filter shared by the overview and the victim analytics."""
     match_stage = {}
     if start_date or end_date:
         date_query = {}
@@ -226,9 +368,147 @@ async def get_analytics_overview(
     
     if violation_type:
         match_stage["violation_types"] = violation_type
+    return match_stage
+
+
+def _victim_stages(case_match: dict, include_archived: bool) -> List[dict]:
+    """
+    Pipeline stages producing the distinct victims involved in the cases
+    matching `case_match`, to run on the cases collection.
+
+    The matching cases are narrowed by their own indexes first; victims are
+    joined through the index on `cases_involved`. A victim involved in
+    several matching cases is counted once.
+    """
+    lookups = [("victims", "_victims")]
+    if include_archived:
+        lookups.append((archive.ARCHIVES["victims"], "_archived_victims"))
+    stages = archive.match_stages("cases", case_match, include_archived) + [{"$project": {"case_id": 1}}]
+    for collection_name, field in lookups:
+        stages.append({"$lookup": {
+            "from": collection_name,
+            "localField": "case_id",
+            "foreignField": "cases_involved",
+            "as": field,
+        }})
+    stages += [
+        {"$project": {"_victim": {"$concatArrays": [f"${field}" for _, field in lookups]}}},
+        {"$unwind": "$_victim"},
+        {"$group": {"_id": "$_victim._id", "victim": {"$first": "$_victim"}}},
+        {"$replaceRoot": {"newRoot": "$victim"}},
+    ]
+    return stages
+
+
+# Lower bounds of the age bands; ages outside them count as unknown
+AGE_BOUNDARIES = [0, 18, 30, 45, 60, 150]
+
+
+def _age_band(lower) -> str:
+    if lower == "unknown":
+        return lower
+    upper = AGE_BOUNDARIES[AGE_BOUNDARIES.index(lower) + 1]
+    return f"{lower}+" if upper == AGE_BOUNDARIES[-1] else f"{lower}-{upper - 1}"
+
+
+def _counts(groups: List[dict]) -> dict:
+    return {str(item["_id"]): item["count"] for item in groups}
+
+
+@router.get("/victims", response_model=VictimAnalytics)
+async def get_victim_analytics(
+    start_date: Optional[str] = Query(None, description="Cases that occurred on or after this date"),
+    end_date: Optional[str] = Query(None, description="Cases that occurred on or before this date"),
+    country: Optional[str] = Query(None),
+    violation_type: Optional[str] = Query(None),
+    include_archived: bool = Query(False, description="Also count victims of archived cases")
+):
+    """
+    Get victim and witness statistics.
+    
+    Breaks victims down by type, gender, age band, risk level and protection
+    need, and their support services by status and type. With case filters
+    only victims involved in a matching case are counted, joined through
+    `cases_involved`; without them every victim is. All breakdowns come from
+    one faceted aggregation.
+    """
+    case_match = _case_match(start_date, end_date, country, violation_type)
+    if case_match:
+        collection = mongodb.get_analytics_collection("cases")
+        pipeline = _victim_stages(case_match, include_archived)
+    else:
+        collection = mongodb.get_analytics_collection("victims")
+        pipeline = archive.match_stages("victims", {}, include_archived)
+    
+    def group_count(expression) -> List[dict]:
+        return [{"$group": {"_id": expression, "count": {"$sum": 1}}}, {"$sort": {"count": -1}}]
+    
+    pipeline.append({"$facet": {
+        "total": [{"$count": "count"}],
+        "by_type": group_count({"$ifNull": ["$type", "unknown"]}),
+        "by_gender": group_count({"$ifNull": ["$demographics.gender", "unknown"]}),
+        "by_age_band": [{"$bucket": {
+            "groupBy": "$demographics.age",
+            "boundaries": AGE_BOUNDARIES,
+            "default": "unknown",
+        }}],
+        "by_risk_level": group_count({"$ifNull": ["$risk_assessment.level", "unknown"]}),
+        "protection_needed": [{"$match": {"risk_assessment.protection_needed": True}}, {"$count": "count"}],
+        "support_services": [
+            {"$unwind": "$support_services"},
+            {"$group": {
+                "_id": {
+                    "type": {"$ifNull": ["$support_services.type", "unknown"]},
+                    "status": {"$ifNull": ["$support_services.status", "unknown"]},
+                },
+                "count": {"$sum": 1},
+            }},
+        ],
+    }})
+    
+    facets = list(collection.aggregate(pipeline, allowDiskUse=True))[0]
+    
+    by_status: dict = {}
+    by_type: dict = {}
+    for item in facets["support_services"]:
+        service_type, service_status = item["_id"]["type"], item["_id"]["status"]
+        by_status[service_status] = by_status.get(service_status, 0) + item["count"]
+        by_type.setdefault(service_type, {})[service_status] = item["count"]
+    
+    return VictimAnalytics(
+        total_victims=facets["total"][0]["count"] if facets["total"] else 0,
+        by_type=_counts(facets["by_type"]),
+        by_gender=_counts(facets["by_gender"]),
+        by_age_band={_age_band(item["_id"]): item["count"] for item in facets["by_age_band"]},
+        by_risk_level=_counts(facets["by_risk_level"]),
+        protection_needed=facets["protection_needed"][0]["count"] if facets["protection_needed"] else 0,
+        support_services_by_status=by_status,
+        support_services_by_type=by_type,
+    )
+
+
+@router.get("/", response_model=AnalyticsResponse)
+async def get_analytics_overview(
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    country: Optional[str] = Query(None),
+    violation_type: Optional[str] = Query(None),
+    include_archived: bool = Query(False, description="Also count archived cases and their records")
+):
+    """
+    Get comprehensive analytics overview.
+    
+    This endpoint provides a comprehensive overview of analytics data,
+    including counts, trends, and geographical distribution of human rights violations.
+    Archived (old resolved/closed) cases are only counted with `include_archived`.
+    """
+    cases_collection = mongodb.get_analytics_collection("cases")
+    
+    # Build match stage for filtering
+    match_stage = _case_match(start_date, end_date, country, violation_type)
     
     # Count documents with filters
-    total_cases = cases_collection.count_documents(match_stage)
+    total_cases = archive.count_documents("cases", match_stage, include_archived)
     
     # Adjust match stage for reports
     report_match = {}
@@ -246,14 +526,19 @@ async def get_analytics_overview(
     if violation_type:
         report_match["incident_details.violation_types"] = violation_type
     
-    total_reports = reports_collection.count_documents(report_match)
+    total_reports = archive.count_documents("incident_reports", report_match, include_archived)
     
-    # Count victims (this is simplified, in a real app you'd need to filter by case involvement)
-    total_victims = victims_collection.count_documents({})
+    # Count victims; with case filters only those involved in a matching case
+    if match_stage:
+        counted = list(cases_collection.aggregate(
+            _victim_stages(match_stage, include_archived) + [{"$count": "count"}], allowDiskUse=True
+        ))
+        total_victims = counted[0]["count"] if counted else 0
+    else:
+        total_victims = archive.count_documents("victims", {}, include_archived)
     
     # Get violation counts
-    violation_counts_pipeline = [
-        {"$match": match_stage} if match_stage else {"$match": {}},
+    violation_counts_pipeline = archive.match_stages("cases", match_stage, include_archived) + [
         {"$unwind": "$violation_types"},
         {"$group": {
             "_id": "$violation_types",
@@ -3,7 +3,8 @@ from typing import Dict
 from datetime import datetime, timedelta
 
 from app.core.security import create_access_token, verify_password, get_password_hash
-from app.core.database import mongodb
+from app.core.storage import repository
+from app.repositories.base import DuplicateRecord
 
 router = APIRouter()
 
@@ -16,8 +17,7 @@ async def login(username: str = Body(...), password: str = Body(...)):
     This endpoint validates user credentials and returns a JWT token
     for authenticated API access.
     """
-    users_collection = mongodb.get_collection("users")
-    user = users_collection.find_one({"username": username})
+    user = repository("users").get(username)
     
     if not user or not verify_password(password, user["hashed_password"]):
         raise HTTPException(
@@ -48,10 +48,10 @@ async def register_user(
     This endpoint creates a new user account with the provided credentials
     and role information.
     """
-    users_collection = mongodb.get_collection("users")
+    users = repository("users")
     
     # Check if username already exists
-    existing_user = users_collection.find_one({"username": username})
+    existing_user = users.get(username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -67,6 +67,12 @@ async def register_user(
         "created_at": datetime.utcnow()
     }
     
-    result = users_collection.insert_one(user_data)
+    try:
+        user = users.insert(user_data)
+    except DuplicateRecord:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already registered"
+        )
     
-    return {"id": str(result.inserted_id), "message": "User registered successfully"}
+    return {"id": str(user["_id"]), "message": "User registered successfully"}
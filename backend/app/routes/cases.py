@@ -1,14 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Header, Request, Response
 from typing import List, Optional
-from datetime import datetime
-import uuid
+from datetime import datetime, timedelta
 
+from pymongo import ReturnDocument
+
+from app.core import archive, subdocuments
+from app.core.anomaly import location_key, spike_detector
+from app.core.batch import id_query, resolve_batch_ids
+from app.core.cache import doc_cache
+from app.core.conditional import not_modified_response, set_cache_headers
 from app.core.database import mongodb
-from app.schemas.case import Case, CaseCreate, CaseUpdate, CaseStatus
+from app.core.geo import lon_lat, near_pipeline
+from app.core.ids import new_case_id, new_evidence_id
+from app.core.perpetrator_graph import case_perpetrator_keys, perpetrator_key, update_case_graph
+from app.core.storage import repository, require_mongodb, uses_mongodb
+from app.core.suggest import record_case, suggester
+from app.schemas.case import (
+    Case, CaseBatch, CaseBundle, CaseCreate, CaseUpdate, CaseStatus,
+    Evidence, EvidencePage, EvidenceUpdate, Perpetrator,
+)
+from app.schemas.report import NearbyReport
 
 router = APIRouter()
 
 
+def _projection_stages(fields: Optional[str]) -> List[dict]:
+    """Turn a comma-separated field list into $project/$addFields stages."""
+    stages = []
+    if fields:
+        stages.append({"$project": {f.strip(): 1 for f in fields.split(",") if f.strip()}})
+    # ObjectIds are not JSON serializable; the bundle returns them as strings
+    stages.append({"$addFields": {"_id": {"$toString": "$_id"}}})
+    return stages
+
+
 @router.post("/", response_model=Case, status_code=status.HTTP_201_CREATED)
 async def create_case(case: CaseCreate = Body(...)):
     """
@@ -17,47 +42,230 @@ async def create_case(case: CaseCreate = Body(...)):
     This endpoint allows authorized users to create a new case with all relevant details
     including violation types, location, dates, and associated evidence.
     """
-    cases_collection = mongodb.get_collection("cases")
-    
-    # Generate a unique case ID with prefix
-    current_year = datetime.now().year
-    case_id = f"HRM-{current_year}-{str(uuid.uuid4())[:8]}"
+    # Generate a unique, time-ordered case ID with prefix
+    case_id = new_case_id()
     
     # Prepare case data for insertion
     case_data = case.dict()
+    evidence = subdocuments.assign_ids(case_data.pop("evidence"), "evidence_id", new_evidence_id, keep_existing=False)
+    if subdocuments.evidence_in_collection():
+        case_data.update({"evidence": [], "evidence_count": len(evidence)})
+    else:
+        case_data["evidence"] = evidence
     case_data.update({
         "case_id": case_id,
         "created_by": "system",  # In a real app, this would be the authenticated user's ID
         "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
+        "updated_at": datetime.utcnow(),
+        "version": 1,
+        "perpetrator_keys": case_perpetrator_keys(case_data["perpetrators"])
     })
     
     # Insert case into database
-    result = cases_collection.insert_one(case_data)
+    created_case = repository("cases").insert(case_data)
+    if subdocuments.evidence_in_collection():
+        subdocuments.insert_case_evidence(case_id, evidence)
+    
+    # Add the case's perpetrators to the co-occurrence graph
+    if uses_mongodb():
+        update_case_graph([], case_data["perpetrator_keys"], case_data["perpetrators"])
+    
+    # Feed the streaming spike detector
+    spike_detector.record(location_key(case_data["location"]), case_data["violation_types"], "case")
+    
+    # Make its perpetrators and region available as typeahead suggestions
+    record_case(case_data)
     
     # Return the created case with its ID
-    created_case = cases_collection.find_one({"_id": result.inserted_id})
     return created_case
 
 
+@router.get("/batch", response_model=CaseBatch)
+async def get_cases_batch(ids: str = Query(..., description="Comma-separated IDs")):
+    """
+    Retrieve several cases by ID in one request.
+
+    Results follow the order of the requested IDs; IDs that do not exist are
+    listed under `missing` instead of failing the whole request.
+    """
+    items, missing = repository("cases").get_many(resolve_batch_ids(query_ids=ids))
+    return CaseBatch(items=items, missing=missing)
+
+
+@router.post("/batch", response_model=CaseBatch)
+async def post_cases_batch(ids: List[str] = Body(..., embed=True)):
+    """
+    Retrieve several cases by ID, with the IDs sent in the request body.
+
+    Use this variant when the ID list is too long for a query string.
+    """
+    items, missing = repository("cases").get_many(resolve_batch_ids(body_ids=ids))
+    return CaseBatch(items=items, missing=missing)
+
+
 @router.get("/{case_id}", response_model=Case)
-async def get_case(case_id: str):
+async def get_case(case_id: str, request: Request, response: Response):
     """
     Retrieve a specific case by its ID.
     
     This endpoint returns detailed information about a specific human rights case,
     including all associated data such as victims, evidence, and status.
+    Archived cases are returned as well.
+    Supports If-None-Match / If-Modified-Since and answers 304 when unchanged.
+    """
+    case = doc_cache.get_or_load(
+        "cases", case_id, lambda: repository("cases").get(case_id),
+        revision=lambda: repository("cases").revision(case_id)
+    )
+    
+    if not case:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Case with ID {case_id} not found"
+        )
+    
+    return not_modified_response(request, response, case) or case
+
+
+def _bundle_pipeline(
+    case_id: str,
+    related: set,
+    victim_fields: Optional[str],
+    report_fields: Optional[str],
+    archived: bool,
+) -> List[dict]:
+    """Aggregation joining a case with its victims and reports; archived cases also join the archives."""
+    # An archived case's victims and reports can be in either tier
+    victim_sources = ["victims", archive.ARCHIVES["victims"]] if archived else ["victims"]
+    report_sources = ["incident_reports", archive.ARCHIVES["incident_reports"]] if archived else ["incident_reports"]
+
+    pipeline = [{"$match": {"case_id": case_id}}, {"$limit": 1}]
+    if "victims" in related:
+        pipeline.append(
+            # Victim IDs may be stored as strings or ObjectId hex strings
+            {"$addFields": {"_victim_ids": {"$concatArrays": [
+                {"$ifNull": ["$victims", []]},
+                {"$map": {
+                    "input": {"$ifNull": ["$victims", []]},
+                    "in": {"$convert": {"input": "$$this", "to": "objectId", "onError": None, "onNull": None}}
+                }}
+            ]}}}
+        )
+        parts = []
+        for n, source in enumerate(victim_sources):
+            pipeline.extend([
+                {"$lookup": {
+                    "from": source,
+                    "localField": "_victim_ids",
+                    "foreignField": "_id",
+                    "pipeline": _projection_stages(victim_fields),
+                    "as": f"_listed_victims_{n}"
+                }},
+                {"$lookup": {
+                    "from": source,
+                    "localField": "case_id",
+                    "foreignField": "cases_involved",
+                    "pipeline": _projection_stages(victim_fields),
+                    "as": f"_linked_victims_{n}"
+                }},
+            ])
+            parts.extend([f"$_listed_victims_{n}", f"$_linked_victims_{n}"])
+        pipeline.append({"$addFields": {"_victims": {"$setUnion": parts}}})
+    if "reports" in related:
+        for n, source in enumerate(report_sources):
+            pipeline.append({"$lookup": {
+                "from": source,
+                "localField": "case_id",
+                "foreignField": "case_id",
+                "pipeline": _projection_stages(report_fields),
+                "as": f"_reports_{n}"
+            }})
+        pipeline.append({"$addFields": {
+            "_reports": {"$concatArrays": [f"$_reports_{n}" for n in range(len(report_sources))]}
+        }})
+    return pipeline
+
+
+@router.get("/{case_id}/bundle", response_model=CaseBundle, dependencies=[Depends(require_mongodb)])
+async def get_case_bundle(
+    case_id: str,
+    include: str = Query("victims,reports", description="Related records to include: victims, reports"),
+    fields: Optional[str] = Query(None, description="Comma-separated case fields to return"),
+    victim_fields: Optional[str] = Query(None, description="Comma-separated victim fields to return"),
+    report_fields: Optional[str] = Query(None, description="Comma-separated report fields to return"),
+):
+    """
+    Retrieve a case together with its victims and linked reports.
+
+    Victims are matched both through the case's `victims` list and through the
+    victims' `cases_involved`, and reports through their `case_id`, in a single
+    aggregation so the case page loads in one round trip. Archived cases are
+    looked up in the archive only when the case is not active.
+    """
+    related = {part.strip() for part in include.split(",")}
+
+    bundles = []
+    for archived in (False, True):
+        collection = mongodb.get_collection(archive.ARCHIVES["cases"] if archived else "cases")
+        bundles = list(collection.aggregate(_bundle_pipeline(case_id, related, victim_fields, report_fields, archived)))
+        if bundles:
+            break
+    if not bundles:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Case with ID {case_id} not found"
+        )
+
+    bundle = bundles[0]
+    victims = bundle.pop("_victims", [])
+    reports = bundle.pop("_reports", [])
+    helper_fields = [k for k in bundle if k.startswith(("_victim_ids", "_listed_victims_", "_linked_victims_", "_reports_"))]
+    for helper_field in helper_fields:
+        bundle.pop(helper_field)
+
+    case_data = {"_id": str(bundle["_id"])}
+    wanted = {f.strip() for f in fields.split(",") if f.strip()} if fields else None
+    case_data.update({k: v for k, v in bundle.items() if k != "_id" and (wanted is None or k in wanted)})
+
+    return CaseBundle(case=case_data, victims=victims, reports=reports)
+
+
+@router.get("/{case_id}/nearby-reports", response_model=List[NearbyReport], dependencies=[Depends(require_mongodb)])
+async def find_nearby_reports(
+    case_id: str,
+    radius_km: float = Query(25.0, gt=0, le=2000),
+    days: int = Query(30, ge=0, le=3650, description="Days before and after the case's date_occurred"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Find incident reports close to a case in space and time.
+
+    Returns reports within `radius_km` of the case location whose incident date
+    is within `days` of the case's `date_occurred`, nearest first. Used to
+    triage new reports against existing cases.
     """
-    cases_collection = mongodb.get_collection("cases")
-    case = cases_collection.find_one({"case_id": case_id})
+    reports_collection = mongodb.get_collection("incident_reports")
     
+    case = archive.find_one("cases", {"case_id": case_id}, {"location": 1, "date_occurred": 1})
     if not case:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Case with ID {case_id} not found"
         )
+    point = lon_lat((case.get("location") or {}).get("coordinates"))
+    if point is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Case with ID {case_id} has no coordinates"
+        )
     
-    return case
+    window = timedelta(days=days)
+    occurred = case["date_occurred"]
+    pipeline = near_pipeline(
+        "incident_details.location.coordinates", point[0], point[1], radius_km,
+        "incident_details.date", occurred - window, occurred + window, limit=limit
+    )
+    return list(reports_collection.aggregate(pipeline))
 
 
 @router.get("/", response_model=List[Case])
@@ -67,17 +275,20 @@ async def list_cases(
     country: Optional[str] = Query(None),
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
+    before: Optional[str] = Query(None, description="Return the cases listed after this case_id (keyset cursor)"),
+    include_archived: bool = Query(False, description="Also list archived resolved/closed cases"),
     skip: int = 0,
     limit: int = 100
 ):
     """
     List all cases with optional filtering.
     
-    This endpoint returns a list of human rights cases, with support for filtering
-    by various criteria such as status, violation type, location, and date range.
+    This endpoint returns a list of human rights cases, newest first, with support
+    for filtering by various criteria such as status, violation type, location, and
+    date range. For deep pagination pass the last `case_id` of a page as `before`
+    instead of increasing `skip`; each page is then a range scan on the
+    (created_at, case_id) index.
     """
-    cases_collection = mongodb.get_collection("cases")
-    
     # Build query filters
     query = {}
     
@@ -101,40 +312,297 @@ async def list_cases(
         query["date_occurred"] = date_query
     
     # Execute query with pagination
-    cases = list(cases_collection.find(query).skip(skip).limit(limit))
-    return cases
+    return repository("cases").find_newest(query, before, skip, limit, include_archived)
 
 
 @router.patch("/{case_id}", response_model=Case)
-async def update_case(case_id: str, case_update: CaseUpdate = Body(...)):
+async def update_case(
+    case_id: str,
+    response: Response,
+    case_update: CaseUpdate = Body(...),
+    if_match: Optional[str] = Header(None)
+):
     """
     Update a specific case.
     
     This endpoint allows authorized users to update various aspects of a case,
-    including its status, evidence, and other details.
+    including its status, evidence, and other details. When an If-Match header
+    is sent, the update only applies if the case is still at that version.
+    Updating an archived case moves it back to the active collection.
+    """
+    # Filter out None values from the update
+    update_data = {k: v for k, v in case_update.dict(exclude_unset=True).items() if v is not None}
+    
+    # Add updated timestamp
+    update_data["updated_at"] = datetime.utcnow()
+    
+    if "evidence" in update_data:
+        if subdocuments.evidence_in_collection():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Evidence is stored separately; use the /cases/{case_id}/evidence endpoints"
+            )
+        subdocuments.assign_ids(update_data["evidence"], "evidence_id", new_evidence_id)
+    
+    # Keep the normalized perpetrator keys next to the embedded list
+    previous_keys = None
+    if "perpetrators" in update_data:
+        update_data["perpetrator_keys"] = case_perpetrator_keys(update_data["perpetrators"])
+        previous = repository("cases").get(case_id)
+        previous_keys = (previous or {}).get("perpetrator_keys") or []
+    
+    # Update the case and return the new version
+    updated_case = repository("cases").update(
+        case_id,
+        update_data,
+        if_match,
+        f"Case with ID {case_id} not found"
+    )
+    if previous_keys is not None and uses_mongodb():
+        update_case_graph(previous_keys, update_data["perpetrator_keys"], update_data["perpetrators"])
+    record_case(update_data, count=0)
+    doc_cache.put("cases", case_id, updated_case)
+    set_cache_headers(response, updated_case)
+    return updated_case
+
+
+@router.get("/{case_id}/evidence", response_model=EvidencePage, dependencies=[Depends(require_mongodb)])
+async def list_case_evidence(
+    case_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
     """
-    cases_collection = mongodb.get_collection("cases")
+    List a case's evidence page by page, oldest first.
     
-    # Check if case exists
-    existing_case = cases_collection.find_one({"case_id": case_id})
-    if not existing_case:
+    With EVIDENCE_STORAGE=collection this is the only way to read evidence;
+    the case document then carries `evidence_count` instead of the items.
+    """
+    page = subdocuments.list_case_evidence(case_id, skip, limit)
+    if page is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Case with ID {case_id} not found"
         )
+    items, total = page
+    return EvidencePage(items=items, total=total)
+
+
+@router.post("/{case_id}/evidence", response_model=Evidence, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_mongodb)])
+async def add_case_evidence(
+    case_id: str,
+    response: Response,
+    evidence: Evidence = Body(...),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Append one evidence item to a case.
     
-    # Filter out None values from the update
-    update_data = {k: v for k, v in case_update.dict(exclude_unset=True).items() if v is not None}
+    The item is added with `$push` (or inserted into the evidence collection),
+    so the existing evidence is neither re-sent nor rewritten and concurrent
+    appends do not overwrite each other. The new `evidence_id` is returned;
+    the ETag describes the case's new version.
+    """
+    item, case = subdocuments.add_case_evidence(case_id, evidence.dict(), if_match)
+    doc_cache.invalidate("cases", case_id)
+    set_cache_headers(response, case)
+    return item
+
+
+@router.patch("/{case_id}/evidence/{evidence_id}", response_model=Evidence, dependencies=[Depends(require_mongodb)])
+async def update_case_evidence(
+    case_id: str,
+    evidence_id: str,
+    response: Response,
+    evidence_update: EvidenceUpdate = Body(...),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Update fields of one evidence item in place.
+    """
+    changes = {k: v for k, v in evidence_update.dict(exclude_unset=True).items() if v is not None}
+    item, case = subdocuments.update_case_evidence(case_id, evidence_id, changes, if_match)
+    doc_cache.invalidate("cases", case_id)
+    set_cache_headers(response, case)
+    return item
+
+
+@router.delete("/{case_id}/evidence/{evidence_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_mongodb)])
+async def remove_case_evidence(case_id: str, evidence_id: str, if_match: Optional[str] = Header(None)):
+    """
+    Remove one evidence item from a case.
+    """
+    case = subdocuments.remove_case_evidence(case_id, evidence_id, if_match)
+    doc_cache.invalidate("cases", case_id)
+    response = Response(status_code=status.HTTP_204_NO_CONTENT)
+    set_cache_headers(response, case)
+    return response
+
+
+@router.post("/{case_id}/perpetrators", response_model=List[Perpetrator], status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_mongodb)])
+async def add_case_perpetrator(
+    case_id: str,
+    response: Response,
+    perpetrator: Perpetrator = Body(...),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Add one perpetrator to a case and update the co-occurrence graph.
     
-    # Add updated timestamp
-    update_data["updated_at"] = datetime.utcnow()
+    Returns the case's perpetrators. A perpetrator whose normalized key is
+    already on the case is refused with 409.
+    """
+    key = perpetrator_key(perpetrator.name, perpetrator.type)
+    if archive.find_one("cases", {"case_id": case_id, "perpetrator_keys": key}, {"_id": 1}):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Perpetrator {key} is already linked to case {case_id}"
+        )
+    
+    updated_case = archive.update(
+        "cases",
+        {"case_id": case_id, "perpetrator_keys": {"$ne": key}},
+        {
+            "$push": {"perpetrators": perpetrator.dict(), "perpetrator_keys": key},
+            "$set": {"updated_at": datetime.utcnow()},
+        },
+        if_match,
+        f"Case with ID {case_id} not found",
+        {"perpetrators": 1, "perpetrator_keys": 1, "version": 1, "updated_at": 1}
+    )
+    new_keys = updated_case["perpetrator_keys"]
+    update_case_graph([k for k in new_keys if k != key], new_keys, updated_case["perpetrators"])
+    suggester.record("perpetrator", [perpetrator.name])
+    doc_cache.invalidate("cases", case_id)
+    set_cache_headers(response, updated_case)
+    return updated_case["perpetrators"]
+
+
+@router.delete("/{case_id}/perpetrators/{key}", response_model=List[Perpetrator], dependencies=[Depends(require_mongodb)])
+async def remove_case_perpetrator(
+    case_id: str,
+    key: str,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Remove a perpetrator, given by its normalized key, from a case and update
+    the co-occurrence graph. Returns the remaining perpetrators.
+    """
+    case = archive.find_one("cases", {"case_id": case_id}, {"perpetrators": 1, "perpetrator_keys": 1})
+    if not case:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Case with ID {case_id} not found"
+        )
+    matching = [p for p in case.get("perpetrators") or [] if perpetrator_key(p.get("name"), p.get("type")) == key]
+    if not matching:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Perpetrator {key} not found in case {case_id}"
+        )
     
-    # Update the case
-    cases_collection.update_one(
+    # The graph delta is taken from the version the $pull applied to, not the
+    # earlier read, so a perpetrator added in between is not counted twice
+    now = datetime.utcnow()
+    previous = archive.update(
+        "cases",
         {"case_id": case_id},
-        {"$set": update_data}
+        {
+            "$pull": {"perpetrators": {"$in": matching}, "perpetrator_keys": key},
+            "$set": {"updated_at": now},
+        },
+        if_match,
+        f"Case with ID {case_id} not found",
+        {"perpetrators": 1, "perpetrator_keys": 1, "version": 1},
+        ReturnDocument.BEFORE,
     )
+    previous_keys = previous.get("perpetrator_keys") or []
+    updated_case = {
+        "perpetrators": [p for p in previous.get("perpetrators") or [] if p not in matching],
+        "perpetrator_keys": [k for k in previous_keys if k != key],
+        "version": (previous.get("version") or 0) + 1,
+        "updated_at": now,
+    }
+    update_case_graph(previous_keys, updated_case["perpetrator_keys"], updated_case["perpetrators"])
+    doc_cache.invalidate("cases", case_id)
+    set_cache_headers(response, updated_case)
+    return updated_case["perpetrators"]
+
+
+@router.put("/{case_id}/victims/{victim_id}", response_model=List[str], dependencies=[Depends(require_mongodb)])
+async def link_case_victim(
+    case_id: str,
+    victim_id: str,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Link a victim/witness to a case.
     
-    # Return the updated case
-    updated_case = cases_collection.find_one({"case_id": case_id})
-    return updated_case
+    Adds the victim to the case's `victims` and the case to the victim's
+    `cases_involved` with `$addToSet`, so repeating the call is harmless and
+    also completes a link that a failed call left one-sided.
+    Returns the case's victim IDs.
+    """
+    # Victims are never deleted, only archived, so once found the victim side
+    # cannot go missing and the case never needs rolling back
+    if archive.find_one("victims", id_query(victim_id), {"_id": 1}) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Victim with ID {victim_id} not found"
+        )
+    now = datetime.utcnow()
+    updated_case = archive.update(
+        "cases",
+        {"case_id": case_id},
+        {"$addToSet": {"victims": victim_id}, "$set": {"updated_at": now}},
+        if_match,
+        f"Case with ID {case_id} not found",
+        {"victims": 1, "version": 1, "updated_at": 1}
+    )
+    archive.update(
+        "victims",
+        id_query(victim_id),
+        {"$addToSet": {"cases_involved": case_id}, "$set": {"updated_at": now}},
+        None,
+        f"Victim with ID {victim_id} not found"
+    )
+    doc_cache.invalidate("cases", case_id)
+    doc_cache.invalidate("victims", victim_id)
+    set_cache_headers(response, updated_case)
+    return updated_case["victims"]
+
+
+@router.delete("/{case_id}/victims/{victim_id}", response_model=List[str], dependencies=[Depends(require_mongodb)])
+async def unlink_case_victim(
+    case_id: str,
+    victim_id: str,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Remove the link between a case and a victim/witness on both sides.
+    Returns the case's remaining victim IDs.
+    """
+    now = datetime.utcnow()
+    updated_case = archive.update(
+        "cases",
+        {"case_id": case_id, "victims": victim_id},
+        {"$pull": {"victims": victim_id}, "$set": {"updated_at": now}},
+        if_match,
+        f"Victim {victim_id} is not linked to case {case_id}",
+        {"victims": 1, "version": 1, "updated_at": 1}
+    )
+    # The victim side is updated wherever the victim lives, without restoring it from the archive
+    for collection_name in ("victims", archive.ARCHIVES["victims"]):
+        result = mongodb.get_collection(collection_name).update_one(
+            id_query(victim_id),
+            {"$pull": {"cases_involved": case_id}, "$set": {"updated_at": now}, "$inc": {"version": 1}}
+        )
+        if result.matched_count:
+            break
+    doc_cache.invalidate("cases", case_id)
+    doc_cache.invalidate("victims", victim_id)
+    set_cache_headers(response, updated_case)
+    return updated_case["victims"]
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime
+
+from app.core.export import ENTITIES, DEFAULT_BATCH_SIZE, arrow_ipc_stream, build_query, pa
+
+router = APIRouter()
+
+
+@router.get("/arrow")
+async def export_arrow(
+    entity: str = Query("cases", description="One of: cases, reports, victims"),
+    country: Optional[str] = Query(None),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=100, le=100000)
+):
+    """
+    Stream cases, reports or victims as an Apache Arrow IPC stream.
+
+    Records are flattened for analysis: violation types are exploded to one row
+    each, coordinates become `lat`/`lon` columns, and victims get one row per
+    linked case. Batches are converted and sent as the cursor advances, so
+    large extracts never need to fit in memory.
+    """
+    if entity not in ENTITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown entity {entity}; expected one of {', '.join(ENTITIES)}"
+        )
+    if pa is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Arrow export requires pyarrow to be installed on the server"
+        )
+
+    query = build_query(
+        entity,
+        country=country,
+        start_date=datetime.fromisoformat(start_date) if start_date else None,
+        end_date=datetime.fromisoformat(end_date) if end_date else None,
+    )
+    return StreamingResponse(
+        arrow_ipc_stream(entity, query, batch_size),
+        media_type="application/vnd.apache.arrow.stream",
+        headers={"Content-Disposition": f'attachment; filename="{entity}.arrows"'}
+    )
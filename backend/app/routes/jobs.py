@@ -0,0 +1,110 @@
+from fastapi import APIRouter, HTTPException, status, Body, Query
+from fastapi.responses import FileResponse
+from typing import List, Optional
+import os
+
+from app.core.database import mongodb
+from app.core.export import pa
+from app.core.jobs import JOBS, cancel_job, submit_job
+from app.schemas.job import Job, JobCreate, JobStatus, JobType
+
+router = APIRouter()
+
+
+def _get_job(job_id: str) -> dict:
+    job = mongodb.get_collection(JOBS).find_one({"_id": job_id})
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found"
+        )
+    return job
+
+
+@router.post("/", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(job: JobCreate = Body(...)):
+    """
+    Submit a background job and return it with its ID.
+
+    Job types:
+    - `export`: params `entity`, `format` (parquet/arrow), `country`, `year` or `start_date`/`end_date`
+    - `analytics_report`: params `country`, `year` or `start_date`/`end_date`
+    - `reaggregate`: params `target` (perpetrator_graph)
+    - `archive`: params `older_than_days`, `dry_run`
+
+    Poll `GET /jobs/{job_id}` for status and progress, then download the
+    output from `GET /jobs/{job_id}/result`.
+    """
+    if job.type == JobType.EXPORT and pa is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Export jobs require pyarrow to be installed on the server"
+        )
+    return submit_job(job.type.value, job.params, job.priority)
+
+
+@router.get("/", response_model=List[Job])
+async def list_jobs(
+    status: Optional[JobStatus] = Query(None),
+    type: Optional[JobType] = Query(None),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    List recent jobs, newest first.
+    """
+    jobs_collection = mongodb.get_collection(JOBS)
+
+    query = {}
+    if status:
+        query["status"] = status.value
+    if type:
+        query["type"] = type.value
+
+    return list(jobs_collection.find(query).sort("created_at", -1).limit(limit))
+
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    """
+    Get a job's status, progress and, once finished, its result metadata.
+    """
+    return _get_job(job_id)
+
+
+@router.post("/{job_id}/cancel", response_model=Job)
+async def cancel(job_id: str):
+    """
+    Cancel a queued or running job.
+
+    Queued jobs are cancelled immediately. Running jobs stop at their next
+    progress report; poll the job to see when it reaches `cancelled`.
+    """
+    job = _get_job(job_id)
+    if job["status"] not in (JobStatus.QUEUED, JobStatus.RUNNING):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is already {job['status']}"
+        )
+    return cancel_job(job_id)
+
+
+@router.get("/{job_id}/result")
+async def download_result(job_id: str):
+    """
+    Download the output of a succeeded job.
+
+    Results are kept for JOBS_RESULT_TTL_HOURS and then deleted (410).
+    """
+    job = _get_job(job_id)
+    if job["status"] != JobStatus.SUCCEEDED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job['status']}, no result available"
+        )
+    result = job["result"]
+    if not os.path.exists(result["path"]):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Job result has expired"
+        )
+    return FileResponse(result["path"], media_type=result["media_type"], filename=result["filename"])
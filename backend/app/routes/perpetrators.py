@@ -0,0 +1,93 @@
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import List, Optional
+
+from app.core import perpetrator_graph
+from app.core.database import mongodb
+from app.schemas.perpetrator import PerpetratorEntity, PerpetratorGraph, PerpetratorNeighbor, PerpetratorPair
+
+router = APIRouter()
+
+
+def _get_entity(key: str) -> dict:
+    entity = mongodb.get_analytics_collection(perpetrator_graph.ENTITIES).find_one({"_id": key})
+    if not entity:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Perpetrator {key} not found"
+        )
+    return entity
+
+
+@router.get("/", response_model=List[PerpetratorEntity])
+async def list_perpetrators(
+    type: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    List perpetrators named in the most cases.
+
+    Perpetrators are normalized across cases, so spelling variants of the
+    same unit are counted together. Keys returned here identify the
+    perpetrator in the graph endpoints.
+    """
+    perpetrators_collection = mongodb.get_analytics_collection(perpetrator_graph.ENTITIES)
+
+    query = {"case_count": {"$gt": 0}}
+    if type:
+        query["type"] = type
+
+    cursor = perpetrators_collection.find(query).sort("case_count", -1).limit(limit)
+    return [
+        {"key": doc["_id"], "name": doc.get("name"), "type": doc.get("type"), "case_count": doc.get("case_count", 0)}
+        for doc in cursor
+    ]
+
+
+@router.get("/top-pairs", response_model=List[PerpetratorPair])
+async def get_top_pairs(
+    limit: int = Query(50, ge=1, le=500),
+    min_weight: int = Query(2, ge=1)
+):
+    """
+    Get the perpetrator pairs that appear together in the most cases.
+    """
+    return perpetrator_graph.top_pairs(limit, min_weight)
+
+
+@router.get("/{key}/neighbors", response_model=List[PerpetratorNeighbor])
+async def get_neighbors(
+    key: str,
+    limit: int = Query(25, ge=1, le=500),
+    min_weight: int = Query(1, ge=1)
+):
+    """
+    Get the perpetrators that co-occur with a perpetrator, strongest first.
+
+    `weight` is the number of cases naming both.
+    """
+    _get_entity(key)
+    return perpetrator_graph.neighbors(key, limit, min_weight)
+
+
+@router.get("/{key}/expand", response_model=PerpetratorGraph)
+async def expand_perpetrator(
+    key: str,
+    depth: int = Query(2, ge=1, le=4),
+    min_weight: int = Query(1, ge=1),
+    max_nodes: int = Query(200, ge=1, le=2000),
+    per_node: int = Query(25, ge=1, le=500),
+    include_cases: bool = Query(False),
+    case_limit: int = Query(500, ge=1, le=5000)
+):
+    """
+    Expand the co-occurrence graph up to `depth` hops from a perpetrator.
+
+    Returns the reached perpetrators with their hop distance and the edges
+    between them. With `include_cases`, the IDs of cases naming any of the
+    reached perpetrators are returned too.
+    """
+    _get_entity(key)
+    graph = perpetrator_graph.expand(key, depth, min_weight, max_nodes, per_node)
+    if include_cases:
+        graph["case_ids"] = perpetrator_graph.linked_case_ids([n["key"] for n in graph["nodes"]], case_limit)
+    return graph
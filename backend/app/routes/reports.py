@@ -1,33 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Header, Request, Response
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 from datetime import datetime
-import uuid
 
+from bson import ObjectId
+
+from app.core import subdocuments
+from app.core.anomaly import location_key, spike_detector
+from app.core.batch import resolve_batch_ids
+from app.core.cache import doc_cache
+from app.core.conditional import not_modified_response, set_cache_headers
 from app.core.database import mongodb
-from app.schemas.report import Report, ReportCreate, ReportUpdate, ReportStatus
+from app.core.geo import bbox_polygon, near_pipeline
+from app.core.ids import new_evidence_id, new_report_id
+from app.core.intake import IntakeFull, intake_queue
+from app.core.storage import repository, require_mongodb
+from app.core.suggest import record_report
+from app.repositories.base import DuplicateRecord
+from app.schemas.report import (
+    NearbyReport, Report, ReportBatch, ReportCreate, ReportEvidence, ReportEvidenceUpdate, ReportUpdate, ReportStatus,
+)
 
 router = APIRouter()
 
 
 @router.post("/", response_model=Report, status_code=status.HTTP_201_CREATED)
-async def create_report(report: ReportCreate = Body(...)):
-    reports_collection = mongodb.get_collection("incident_reports")
+async def create_report(response: Response, report: ReportCreate = Body(...)):
+    """
+    Submit a new incident report.
     
+    With INTAKE_MODE=buffered the report is written to the worker's local
+    intake log and acknowledged with 202 before it reaches MongoDB; a
+    background flusher inserts it shortly after. When the backlog is full
+    the submission is refused with 503 and a Retry-After header. A report
+    with a client-chosen `report_id` is always inserted directly, so a
+    taken ID is answered with 409 instead of failing after the 202.
+    """
     try:
-        report_id = f"IR-{datetime.now().year}-{str(uuid.uuid4())[:8]}"
+        report_id = new_report_id()
         report_data = report.dict()
-        if not report_data.get("report_id"):
+        client_id = bool(report_data.get("report_id"))
+        if not client_id:
             report_data["report_id"] = report_id
+        subdocuments.assign_ids(report_data["evidence"], "evidence_id", new_evidence_id, keep_existing=False)
         
+        now = datetime.utcnow()
         report_data.update({
-            "created_at": datetime.utcnow(),
-            "status": ReportStatus.NEW
+            "created_at": now,
+            "updated_at": now,
+            "status": ReportStatus.NEW,
+            "version": 1
         })
+        details = report_data["incident_details"]
+        
+        if intake_queue.enabled and not client_id:
+            # The _id is assigned here so replaying the log cannot insert twice
+            report_data["_id"] = ObjectId()
+            await run_in_threadpool(intake_queue.submit, report_data)
+            spike_detector.record(location_key(details["location"]), details["violation_types"], "report")
+            record_report(report_data)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return {**report_data, "_id": str(report_data["_id"])}
         
-        result = reports_collection.insert_one(report_data)
-        created_report = reports_collection.find_one({"_id": result.inserted_id})
+        created_report = repository("incident_reports").insert(report_data)
+        spike_detector.record(location_key(details["location"]), details["violation_types"], "report")
+        record_report(report_data)
         return created_report
     
+    except DuplicateRecord:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report with ID {report_data['report_id']} already exists"
+        )
+    except IntakeFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Report intake is at capacity, please retry",
+            headers={"Retry-After": str(intake_queue.retry_after_seconds())}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -35,16 +85,111 @@ async def create_report(report: ReportCreate = Body(...)):
         )
 
 
+@router.get("/batch", response_model=ReportBatch)
+async def get_reports_batch(ids: str = Query(..., description="Comma-separated IDs")):
+    """
+    Retrieve several incident reports by ID in one request.
+
+    Results follow the order of the requested IDs; IDs that do not exist are
+    listed under `missing` instead of failing the whole request.
+    """
+    items, missing = repository("incident_reports").get_many(resolve_batch_ids(query_ids=ids))
+    return ReportBatch(items=items, missing=missing)
+
+
+@router.post("/batch", response_model=ReportBatch)
+async def post_reports_batch(ids: List[str] = Body(..., embed=True)):
+    """
+    Retrieve several incident reports by ID, with the IDs sent in the request body.
+
+    Use this variant when the ID list is too long for a query string.
+    """
+    items, missing = repository("incident_reports").get_many(resolve_batch_ids(body_ids=ids))
+    return ReportBatch(items=items, missing=missing)
+
+
+@router.get("/near", response_model=List[NearbyReport], dependencies=[Depends(require_mongodb)])
+async def find_reports_near(
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    radius_km: float = Query(10.0, gt=0, le=2000),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    violation_type: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Find incident reports near a point or inside a bounding box.
+
+    With `lon`/`lat`, reports within `radius_km` are returned nearest first with
+    their `distance_m`. With `bbox`, reports inside the box are returned. Both
+    are answered from the 2dsphere index on the report coordinates.
+    """
+    reports_collection = mongodb.get_collection("incident_reports")
+    
+    start = datetime.fromisoformat(start_date) if start_date else None
+    end = datetime.fromisoformat(end_date) if end_date else None
+    query = {}
+    if violation_type:
+        query["incident_details.violation_types"] = violation_type
+    
+    if bbox:
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="bbox must be min_lon,min_lat,max_lon,max_lat"
+            )
+        if not (
+            -180 <= min_lon < max_lon <= 180
+            and -90 <= min_lat < max_lat <= 90
+            and max_lon - min_lon < 180  # Wider boxes are ambiguous as GeoJSON polygons
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="bbox must have min < max, coordinates within range and span less than 180 degrees of longitude"
+            )
+        query["incident_details.location.coordinates"] = {
+            "$geoWithin": {"$geometry": bbox_polygon(min_lon, min_lat, max_lon, max_lat)}
+        }
+        if start or end:
+            query["incident_details.date"] = {
+                **({"$gte": start} if start else {}),
+                **({"$lte": end} if end else {}),
+            }
+        return list(reports_collection.find(query).limit(limit))
+    
+    if lon is None or lat is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either lon and lat, or bbox, is required"
+        )
+    
+    pipeline = near_pipeline(
+        "incident_details.location.coordinates", lon, lat, radius_km,
+        "incident_details.date", start, end, query, limit
+    )
+    return list(reports_collection.aggregate(pipeline))
+
+
 @router.get("/{report_id}", response_model=Report)
-async def get_report(report_id: str):
+async def get_report(report_id: str, request: Request, response: Response):
     """
     Retrieve a specific incident report by its ID.
     
     This endpoint returns detailed information about a specific incident report,
-    including all associated evidence and metadata.
+    including all associated evidence and metadata. Reports of archived cases
+    are returned as well.
+    Supports If-None-Match / If-Modified-Since and answers 304 when unchanged.
     """
-    reports_collection = mongodb.get_collection("incident_reports")
-    report = reports_collection.find_one({"report_id": report_id})
+    report = doc_cache.get_or_load(
+        "incident_reports", report_id,
+        # Reports accepted by the intake queue are served before they are flushed
+        lambda: repository("incident_reports").get(report_id) or intake_queue.get_pending(report_id),
+        revision=lambda: repository("incident_reports").revision(report_id)
+    )
     
     if not report:
         raise HTTPException(
@@ -52,7 +197,7 @@ async def get_report(report_id: str):
             detail=f"Report with ID {report_id} not found"
         )
     
-    return report
+    return not_modified_response(request, response, report) or report
 
 
 @router.get("/", response_model=List[Report])
@@ -62,17 +207,18 @@ async def list_reports(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     violation_type: Optional[str] = Query(None),
+    before: Optional[str] = Query(None, description="Return the reports listed after this report_id (keyset cursor)"),
+    include_archived: bool = Query(False, description="Also list reports of archived cases"),
     skip: int = 0,
     limit: int = 100
 ):
     """
     List all incident reports with optional filtering.
     
-    This endpoint returns a list of incident reports, with support for filtering
-    by various criteria such as status, location, and date range.
+    This endpoint returns a list of incident reports, newest first, with support
+    for filtering by various criteria such as status, location, and date range.
+    Pass the last `report_id` of a page as `before` to fetch the next page.
     """
-    reports_collection = mongodb.get_collection("incident_reports")
-    
     # Build query filters
     query = {}
     
@@ -96,73 +242,119 @@ async def list_reports(
         query["incident_details.date"] = date_query
     
     # Execute query with pagination
-    reports = list(reports_collection.find(query).skip(skip).limit(limit))
-    return reports
+    return repository("incident_reports").find_newest(query, before, skip, limit, include_archived)
 
 
 @router.patch("/{report_id}", response_model=Report)
-async def update_report(report_id: str, report_update: ReportUpdate = Body(...)):
+async def update_report(
+    report_id: str,
+    response: Response,
+    report_update: ReportUpdate = Body(...),
+    if_match: Optional[str] = Header(None)
+):
     """
     Update a specific incident report.
     
     This endpoint allows authorized users to update various aspects of a report,
-    including its status, evidence, and other details.
+    including its status, evidence, and other details. When an If-Match header
+    is sent, the update only applies if the report is still at that version.
     """
-    reports_collection = mongodb.get_collection("incident_reports")
-    
-    # Check if report exists
-    existing_report = reports_collection.find_one({"report_id": report_id})
-    if not existing_report:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Report with ID {report_id} not found"
-        )
-    
     # Filter out None values from the update
     update_data = {k: v for k, v in report_update.dict(exclude_unset=True).items() if v is not None}
     
     # Add updated timestamp
     update_data["updated_at"] = datetime.utcnow()
+    if "evidence" in update_data:
+        subdocuments.assign_ids(update_data["evidence"], "evidence_id", new_evidence_id)
     
-    # Update the report
-    reports_collection.update_one(
-        {"report_id": report_id},
-        {"$set": update_data}
+    # Update the report and return the new version
+    updated_report = repository("incident_reports").update(
+        report_id,
+        update_data,
+        if_match,
+        f"Report with ID {report_id} not found"
     )
-    
-    # Return the updated report
-    updated_report = reports_collection.find_one({"report_id": report_id})
+    record_report(update_data, count=0)
+    doc_cache.put("incident_reports", report_id, updated_report)
+    set_cache_headers(response, updated_report)
     return updated_report
 
 
+@router.post("/{report_id}/evidence", response_model=ReportEvidence, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_mongodb)])
+async def add_report_evidence(
+    report_id: str,
+    response: Response,
+    evidence: ReportEvidence = Body(...),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Append one evidence item to a report with `$push` and return it with its
+    new `evidence_id`. The ETag describes the report's new version.
+    """
+    item = {**evidence.dict(), "evidence_id": new_evidence_id()}
+    updated_report = subdocuments.push_item(
+        "incident_reports", {"report_id": report_id}, "evidence", item,
+        if_match, f"Report with ID {report_id} not found", subdocuments.WITHOUT_EVIDENCE
+    )
+    doc_cache.invalidate("incident_reports", report_id)
+    set_cache_headers(response, updated_report)
+    return item
+
+
+@router.patch("/{report_id}/evidence/{evidence_id}", response_model=ReportEvidence, dependencies=[Depends(require_mongodb)])
+async def update_report_evidence(
+    report_id: str,
+    evidence_id: str,
+    response: Response,
+    evidence_update: ReportEvidenceUpdate = Body(...),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Update fields of one evidence item of a report in place.
+    """
+    changes = {k: v for k, v in evidence_update.dict(exclude_unset=True).items() if v is not None}
+    updated_report = subdocuments.set_item_fields(
+        "incident_reports", {"report_id": report_id}, "evidence", "evidence_id", evidence_id, changes,
+        if_match, f"Evidence {evidence_id} not found in report {report_id}",
+        {"evidence": {"$elemMatch": {"evidence_id": evidence_id}}, "version": 1, "updated_at": 1}
+    )
+    doc_cache.invalidate("incident_reports", report_id)
+    set_cache_headers(response, updated_report)
+    return updated_report["evidence"][0]
+
+
+@router.delete("/{report_id}/evidence/{evidence_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_mongodb)])
+async def remove_report_evidence(report_id: str, evidence_id: str, if_match: Optional[str] = Header(None)):
+    """
+    Remove one evidence item from a report.
+    """
+    updated_report = subdocuments.pull_item(
+        "incident_reports", {"report_id": report_id}, "evidence", "evidence_id", evidence_id,
+        if_match, f"Evidence {evidence_id} not found in report {report_id}", subdocuments.WITHOUT_EVIDENCE
+    )
+    doc_cache.invalidate("incident_reports", report_id)
+    response = Response(status_code=status.HTTP_204_NO_CONTENT)
+    set_cache_headers(response, updated_report)
+    return response
+
+
 @router.get("/analytics", response_model=dict)
-async def get_report_analytics():
+async def get_report_analytics(include_archived: bool = Query(False)):
     """
     Get analytics data for incident reports.
     
     This endpoint provides aggregated statistics about incident reports,
-    such as counts by violation type, status, and location.
+    such as counts by violation type, status, and location. Reports of
+    archived cases are counted only with `include_archived`.
     """
-    reports_collection = mongodb.get_collection("incident_reports")
-    
-    # Aggregate reports by violation type
-    pipeline = [
-        {"$unwind": "$incident_details.violation_types"},
-        {"$group": {
-            "_id": "$incident_details.violation_types",
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"count": -1}}
-    ]
-    
-    violation_counts = list(reports_collection.aggregate(pipeline))
+    reports = repository("incident_reports")
     
     # Format the results
     result = {
-        "total_reports": reports_collection.count_documents({}),
-        "by_violation_type": {item["_id"]: item["count"] for item in violation_counts},
+        "total_reports": reports.count({}, include_archived),
+        "by_violation_type": reports.count_values("incident_details.violation_types", {}, include_archived),
         "by_status": {
-            status: reports_collection.count_documents({"status": status})
+            status: reports.count({"status": status}, include_archived)
             for status in [s.value for s in ReportStatus]
         }
     }
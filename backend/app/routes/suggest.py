@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, status, Query, Response
+from typing import List
+
+from app.core.config import settings
+from app.core.suggest import suggester
+from app.schemas.suggest import SuggestField, Suggestion
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[Suggestion])
+async def suggest(
+    response: Response,
+    field: SuggestField = Query(..., description="perpetrator, region or city"),
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(settings.SUGGEST_MAX_RESULTS, ge=1, le=settings.SUGGEST_MAX_RESULTS)
+):
+    """
+    Suggest values for a data entry field as the user types.
+
+    Returns perpetrator names, case regions or report cities starting with
+    `prefix` (ignoring case and extra spaces), most used first. Answers come
+    from an in-memory index in this worker; values entered through other
+    workers appear after the next refresh.
+    """
+    if not settings.SUGGEST_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Suggestions are disabled")
+    results = suggester.suggest(field.value, prefix, limit)
+    if results is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Suggestion index is being built, please retry",
+            headers={"Retry-After": "5"}
+        )
+    response.headers["Cache-Control"] = "private, max-age=60"
+    return [Suggestion(value=value, count=count) for value, count in results]
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, status, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import gzip
+import json
+
+from app.core.config import settings
+from app.core.sync import SYNC_ENTITIES, ExpiredToken, InvalidToken, changes_since, json_default
+
+router = APIRouter()
+
+
+@router.get("/")
+async def sync_changes(
+    request: Request,
+    since: Optional[str] = Query(None, description="Token from the previous sync; omit for a full download"),
+    entities: str = Query("cases,reports,victims", description="Comma-separated: cases, reports, victims"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum documents per entity in one response")
+):
+    """
+    Return cases, reports and victims changed or deleted since a sync token.
+
+    The response holds the changed documents per entity, the deleted keys
+    under `deleted`, and a new `token` to pass as `since` next time. While
+    `has_more` is true the client should call again straight away. Clients
+    apply documents as upserts by key. Responses are gzip-compressed when the
+    client accepts it. A token older than the tombstone retention returns 410
+    and the client must start over without `since`.
+    """
+    names = [name.strip() for name in entities.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SYNC_ENTITIES]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"entities must be a subset of {', '.join(SYNC_ENTITIES)}"
+        )
+
+    try:
+        changes = await run_in_threadpool(changes_since, since, names, limit)
+    except InvalidToken as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ExpiredToken as e:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
+
+    body = json.dumps(changes, default=json_default, separators=(",", ":")).encode()
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-store"}
+    if "gzip" in request.headers.get("accept-encoding", "") and len(body) >= settings.SYNC_GZIP_MIN_BYTES:
+        body = await run_in_threadpool(gzip.compress, body, 6)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
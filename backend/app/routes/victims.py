@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Header, Request, Response
 from typing import List, Optional
 from datetime import datetime
 import uuid
 
-from app.core.database import mongodb
-from app.schemas.victim import Victim, VictimCreate, VictimUpdate, RiskLevel
+from app.core import subdocuments
+from app.core.batch import id_query, resolve_batch_ids
+from app.core.cache import doc_cache
+from app.core.conditional import not_modified_response, set_cache_headers
+from app.core.ids import new_service_id
+from app.core.storage import repository, require_mongodb
+from app.schemas.victim import (
+    Victim, VictimBatch, VictimCreate, VictimUpdate, RiskLevel, SupportService, SupportServiceUpdate,
+)
 
 router = APIRouter()
 
@@ -17,33 +24,56 @@ async def create_victim(victim: VictimCreate = Body(...)):
     This endpoint allows authorized users to add a new victim or witness record
     with all relevant details including demographics, risk assessment, and support services.
     """
-    victims_collection = mongodb.get_collection("victims")
-    
     # Prepare victim data for insertion
     victim_data = victim.dict()
+    subdocuments.assign_ids(victim_data["support_services"], "service_id", new_service_id, keep_existing=False)
     victim_data.update({
         "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
+        "updated_at": datetime.utcnow(),
+        "version": 1
     })
     
-    # Insert victim into database
-    result = victims_collection.insert_one(victim_data)
-    
-    # Return the created victim with its ID
-    created_victim = victims_collection.find_one({"_id": result.inserted_id})
-    return created_victim
+    # Insert victim into database and return it with its ID
+    return repository("victims").insert(victim_data)
+
+
+@router.get("/batch", response_model=VictimBatch)
+async def get_victims_batch(ids: str = Query(..., description="Comma-separated IDs")):
+    """
+    Retrieve several victims/witnesses by ID in one request.
+
+    Results follow the order of the requested IDs; IDs that do not exist are
+    listed under `missing` instead of failing the whole request.
+    """
+    items, missing = repository("victims").get_many(resolve_batch_ids(query_ids=ids))
+    return VictimBatch(items=items, missing=missing)
+
+
+@router.post("/batch", response_model=VictimBatch)
+async def post_victims_batch(ids: List[str] = Body(..., embed=True)):
+    """
+    Retrieve several victims/witnesses by ID, with the IDs sent in the request body.
+
+    Use this variant when the ID list is too long for a query string.
+    """
+    items, missing = repository("victims").get_many(resolve_batch_ids(body_ids=ids))
+    return VictimBatch(items=items, missing=missing)
 
 
 @router.get("/{victim_id}", response_model=Victim)
-async def get_victim(victim_id: str):
+async def get_victim(victim_id: str, request: Request, response: Response):
     """
     Retrieve a specific victim/witness by ID.
     
     This endpoint returns detailed information about a specific victim or witness,
     including all associated data such as demographics, risk assessment, and support services.
+    Victims linked only to archived cases are returned as well.
+    Supports If-None-Match / If-Modified-Since and answers 304 when unchanged.
     """
-    victims_collection = mongodb.get_collection("victims")
-    victim = victims_collection.find_one({"_id": victim_id})
+    victim = doc_cache.get_or_load(
+        "victims", victim_id, lambda: repository("victims").get(victim_id),
+        revision=lambda: repository("victims").revision(victim_id)
+    )
     
     if not victim:
         raise HTTPException(
@@ -51,65 +81,66 @@ async def get_victim(victim_id: str):
             detail=f"Victim with ID {victim_id} not found"
         )
     
-    return victim
+    return not_modified_response(request, response, victim) or victim
 
 
 @router.patch("/{victim_id}", response_model=Victim)
-async def update_victim(victim_id: str, victim_update: VictimUpdate = Body(...)):
+async def update_victim(
+    victim_id: str,
+    response: Response,
+    victim_update: VictimUpdate = Body(...),
+    if_match: Optional[str] = Header(None)
+):
     """
     Update a specific victim/witness record.
     
     This endpoint allows authorized users to update various aspects of a victim record,
-    including risk level, support services, and other details.
+    including risk level, support services, and other details. When an If-Match
+    header is sent, the update only applies if the record is still at that version.
     """
-    victims_collection = mongodb.get_collection("victims")
-    
-    # Check if victim exists
-    existing_victim = victims_collection.find_one({"_id": victim_id})
-    if not existing_victim:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Victim with ID {victim_id} not found"
-        )
-    
     # Filter out None values from the update
     update_data = {k: v for k, v in victim_update.dict(exclude_unset=True).items() if v is not None}
     
     # Add updated timestamp
     update_data["updated_at"] = datetime.utcnow()
-    
-    # Update the victim
-    victims_collection.update_one(
-        {"_id": victim_id},
-        {"$set": update_data}
+    if "support_services" in update_data:
+        subdocuments.assign_ids(update_data["support_services"], "service_id", new_service_id)
+    
+    # Update the victim and return the new version
+    updated_victim = repository("victims").update(
+        victim_id,
+        update_data,
+        if_match,
+        f"Victim with ID {victim_id} not found"
     )
-    
-    # Return the updated victim
-    updated_victim = victims_collection.find_one({"_id": victim_id})
+    doc_cache.put("victims", victim_id, updated_victim)
+    set_cache_headers(response, updated_victim)
     return updated_victim
 
 
 @router.get("/case/{case_id}", response_model=List[Victim])
-async def list_victims_by_case(case_id: str):
+async def list_victims_by_case(case_id: str, include_archived: bool = Query(False)):
     """
     List all victims/witnesses linked to a specific case.
     
     This endpoint returns a list of victims and witnesses that are associated
-    with a particular human rights case.
+    with a particular human rights case. Victims of archived cases are moved
+    to the archive with them; pass `include_archived` to list those too.
     """
-    victims_collection = mongodb.get_collection("victims")
-    
     # Query victims by case ID
-    victims = list(victims_collection.find({"cases_involved": case_id}))
-    return victims
+    return repository("victims").find(
+        {"cases_involved": case_id}, [("_id", 1)], limit=0, include_archived=include_archived
+    )
 
 
 @router.patch("/{victim_id}/risk", response_model=Victim)
 async def update_risk_level(
     victim_id: str, 
+    response: Response,
     risk_level: RiskLevel = Body(..., embed=True),
     threats: List[str] = Body([], embed=True),
-    protection_needed: bool = Body(False, embed=True)
+    protection_needed: bool = Body(False, embed=True),
+    if_match: Optional[str] = Header(None)
 ):
     """
     Update the risk assessment for a victim/witness.
@@ -117,16 +148,6 @@ async def update_risk_level(
     This endpoint allows authorized users to update the risk level and related
     information for a specific victim or witness.
     """
-    victims_collection = mongodb.get_collection("victims")
-    
-    # Check if victim exists
-    existing_victim = victims_collection.find_one({"_id": victim_id})
-    if not existing_victim:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Victim with ID {victim_id} not found"
-        )
-    
     # Update risk assessment
     risk_assessment = {
         "level": risk_level,
@@ -135,17 +156,78 @@ async def update_risk_level(
         "updated_at": datetime.utcnow()
     }
     
-    # Update the victim
-    victims_collection.update_one(
-        {"_id": victim_id},
+    # Update the victim and return the new version
+    updated_victim = repository("victims").update(
+        victim_id,
         {
-            "$set": {
-                "risk_assessment": risk_assessment,
-                "updated_at": datetime.utcnow()
-            }
-        }
+            "risk_assessment": risk_assessment,
+            "updated_at": datetime.utcnow()
+        },
+        if_match,
+        f"Victim with ID {victim_id} not found"
     )
+    doc_cache.put("victims", victim_id, updated_victim)
+    set_cache_headers(response, updated_victim)
+    return updated_victim
+
+
+@router.post("/{victim_id}/support-services", response_model=Victim, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_mongodb)])
+async def add_support_service(
+    victim_id: str,
+    response: Response,
+    service: SupportService = Body(...),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Add one support service to a victim/witness with `$push`.
     
-    # Return the updated victim
-    updated_victim = victims_collection.find_one({"_id": victim_id})
+    The new entry gets a `service_id` for later updates and removal.
+    """
+    item = {**service.dict(), "service_id": new_service_id()}
+    updated_victim = subdocuments.push_item(
+        "victims", id_query(victim_id), "support_services", item,
+        if_match, f"Victim with ID {victim_id} not found"
+    )
+    doc_cache.put("victims", victim_id, updated_victim)
+    set_cache_headers(response, updated_victim)
+    return updated_victim
+
+
+@router.patch("/{victim_id}/support-services/{service_id}", response_model=Victim, dependencies=[Depends(require_mongodb)])
+async def update_support_service(
+    victim_id: str,
+    service_id: str,
+    response: Response,
+    service_update: SupportServiceUpdate = Body(...),
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Update one support service in place, e.g. to mark it completed.
+    """
+    changes = {k: v for k, v in service_update.dict(exclude_unset=True).items() if v is not None}
+    updated_victim = subdocuments.set_item_fields(
+        "victims", id_query(victim_id), "support_services", "service_id", service_id, changes,
+        if_match, f"Support service {service_id} not found for victim {victim_id}"
+    )
+    doc_cache.put("victims", victim_id, updated_victim)
+    set_cache_headers(response, updated_victim)
+    return updated_victim
+
+
+@router.delete("/{victim_id}/support-services/{service_id}", response_model=Victim, dependencies=[Depends(require_mongodb)])
+async def remove_support_service(
+    victim_id: str,
+    service_id: str,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
+    """
+    Remove one support service from a victim/witness.
+    """
+    updated_victim = subdocuments.pull_item(
+        "victims", id_query(victim_id), "support_services", "service_id", service_id,
+        if_match, f"Support service {service_id} not found for victim {victim_id}"
+    )
+    doc_cache.put("victims", victim_id, updated_victim)
+    set_cache_headers(response, updated_victim)
     return updated_victim
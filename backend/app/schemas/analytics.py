@@ -7,6 +7,7 @@ class TimelineData(BaseModel):
     date: date
     count: int
     violation_type: Optional[str] = None
+    series: Optional[str] = None  # Group value when the timeline is split with group_by
 
 
 class ViolationTypeCount(BaseModel):
@@ -37,3 +38,38 @@ class AnalyticsResponse(BaseModel):
     violation_counts: List[ViolationTypeCount]
     timeline_data: Optional[List[TimelineData]] = None
     geo_data: Optional[List[GeoData]] = None
+
+
+class Anomaly(BaseModel):
+    region: str
+    violation_type: str
+    source: str  # "case" or "report"
+    bucket_start: datetime
+    bucket_minutes: int
+    count: int
+    expected: float
+    stddev: float
+    score: float
+    detected_at: datetime
+
+
+class Hotspot(BaseModel):
+    cluster_id: int
+    size: int
+    counts_by_source: Dict[str, int]
+    centroid: List[float]  # [longitude, latitude]
+    bbox: List[float]  # [min_lon, min_lat, max_lon, max_lat]
+    start_date: datetime
+    end_date: datetime
+    violation_types: Dict[str, int]
+
+
+class VictimAnalytics(BaseModel):
+    total_victims: int
+    by_type: Dict[str, int]
+    by_gender: Dict[str, int]
+    by_age_band: Dict[str, int]
+    by_risk_level: Dict[str, int]
+    protection_needed: int  # Victims whose risk assessment asks for protection
+    support_services_by_status: Dict[str, int]
+    support_services_by_type: Dict[str, Dict[str, int]]  # Service type -> status -> count
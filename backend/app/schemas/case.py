@@ -3,6 +3,8 @@ from datetime import datetime
 from pydantic import BaseModel, Field, validator
 from enum import Enum
 
+from app.core.geo import geojson_point
+
 
 class ViolationType(str, Enum):
     FORCED_DISPLACEMENT = "forced_displacement"
@@ -43,13 +45,40 @@ class Location(BaseModel):
     coordinates: Optional[Coordinates] = None
 
 
+class LocationInput(Location):
+    # Only submitted locations are checked, so legacy stored values still read back
+
+    @validator("coordinates", pre=True)
+    def normalize_coordinates(cls, value):
+        """Accept GeoJSON, [lon, lat] or {"lat", "lon"/"lng"} within range, as the 2dsphere index requires."""
+        if value is None:
+            return None
+        point = geojson_point(value)
+        if point is None:
+            raise ValueError("coordinates must be a GeoJSON Point, [lon, lat] or {lat, lon} within range")
+        return point
+
+
 class Evidence(BaseModel):
+    evidence_id: Optional[str] = None  # Assigned by the server; kept on updates that resend it
     type: str
     url: str
     description: str
     date_captured: datetime
 
 
+class EvidenceUpdate(BaseModel):
+    type: Optional[str] = None
+    url: Optional[str] = None
+    description: Optional[str] = None
+    date_captured: Optional[datetime] = None
+
+
+class EvidencePage(BaseModel):
+    items: List[Evidence]
+    total: int
+
+
 class Perpetrator(BaseModel):
     name: str
     type: str
@@ -70,7 +99,7 @@ class CaseBase(BaseModel):
 
 
 class CaseCreate(CaseBase):
-    pass
+    location: LocationInput
 
 
 class CaseUpdate(BaseModel):
@@ -79,7 +108,7 @@ class CaseUpdate(BaseModel):
     violation_types: Optional[List[ViolationType]] = None
     status: Optional[CaseStatus] = None
     priority: Optional[Priority] = None
-    location: Optional[Location] = None
+    location: Optional[LocationInput] = None
     date_occurred: Optional[datetime] = None
     date_reported: Optional[datetime] = None
     victims: Optional[List[str]] = None
@@ -93,6 +122,8 @@ class CaseInDB(CaseBase):
     created_by: str
     created_at: datetime
     updated_at: datetime
+    version: Optional[int] = None
+    evidence_count: Optional[int] = None  # Set when evidence is stored in its own collection
 
     class Config:
         allow_population_by_field_name = True
@@ -100,3 +131,15 @@ class CaseInDB(CaseBase):
 
 class Case(CaseInDB):
     pass
+
+
+class CaseBundle(BaseModel):
+    """A case with its victims and linked reports, as loaded by the case page."""
+    case: Dict[str, Any]
+    victims: List[Dict[str, Any]] = []
+    reports: List[Dict[str, Any]] = []
+
+
+class CaseBatch(BaseModel):
+    items: List[Case]
+    missing: List[str] = []
@@ -0,0 +1,51 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+from enum import Enum
+
+
+class JobType(str, Enum):
+    EXPORT = "export"
+    ANALYTICS_REPORT = "analytics_report"
+    REAGGREGATE = "reaggregate"
+    ARCHIVE = "archive"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobCreate(BaseModel):
+    type: JobType
+    params: Dict[str, Any] = {}
+    priority: int = Field(5, ge=0, le=9)  # Higher runs first
+
+
+class JobResult(BaseModel):
+    filename: str
+    media_type: str
+    size: int
+
+
+class Job(BaseModel):
+    id: str = Field(..., alias="_id")
+    type: JobType
+    params: Dict[str, Any] = {}
+    priority: int
+    status: JobStatus
+    progress: float = 0.0
+    message: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[JobResult] = None
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+    class Config:
+        allow_population_by_field_name = True
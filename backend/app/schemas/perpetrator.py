@@ -0,0 +1,35 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class PerpetratorEntity(BaseModel):
+    key: str
+    name: Optional[str] = None
+    type: Optional[str] = None
+    case_count: int = 0
+
+
+class PerpetratorNeighbor(PerpetratorEntity):
+    weight: int  # Number of cases naming both perpetrators
+
+
+class PerpetratorNode(PerpetratorEntity):
+    depth: int
+
+
+class PerpetratorEdge(BaseModel):
+    source: str
+    target: str
+    weight: int
+
+
+class PerpetratorGraph(BaseModel):
+    nodes: List[PerpetratorNode]
+    edges: List[PerpetratorEdge]
+    case_ids: List[str] = []
+
+
+class PerpetratorPair(BaseModel):
+    source: PerpetratorEntity
+    target: PerpetratorEntity
+    weight: int
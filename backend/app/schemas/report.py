@@ -3,6 +3,8 @@ from datetime import datetime
 from pydantic import BaseModel, Field, validator
 from enum import Enum
 
+from app.core.geo import geojson_point
+
 
 class ReporterType(str, Enum):
     VICTIM = "victim"
@@ -30,7 +32,21 @@ class ContactInfo(BaseModel):
 class IncidentLocation(BaseModel):
     country: str
     city: str
-    coordinates: Optional[Dict[str, Any]] = None
+    coordinates: Optional[Dict[str, Any]] = None  # Stored as a GeoJSON Point
+
+
+class IncidentLocationInput(IncidentLocation):
+    # Only submitted locations are checked, so legacy stored values still read back
+
+    @validator("coordinates", pre=True)
+    def normalize_coordinates(cls, value):
+        """Accept GeoJSON, [lon, lat] or {"lat", "lon"/"lng"} and store GeoJSON."""
+        if value is None:
+            return None
+        point = geojson_point(value)
+        if point is None:
+            raise ValueError("coordinates must be a GeoJSON Point, [lon, lat] or {lat, lon} within range")
+        return point
 
 
 class IncidentDetails(BaseModel):
@@ -40,12 +56,23 @@ class IncidentDetails(BaseModel):
     violation_types: List[str]
 
 
+class IncidentDetailsInput(IncidentDetails):
+    location: IncidentLocationInput
+
+
 class ReportEvidence(BaseModel):
+    evidence_id: Optional[str] = None  # Assigned by the server; kept on updates that resend it
     type: str  # photo, video, document, audio
     url: str
     description: Optional[str] = None
 
 
+class ReportEvidenceUpdate(BaseModel):
+    type: Optional[str] = None
+    url: Optional[str] = None
+    description: Optional[str] = None
+
+
 class ReportBase(BaseModel):
     report_id: Optional[str] = None  # Will be generated if not provided
     reporter_type: ReporterType
@@ -57,24 +84,27 @@ class ReportBase(BaseModel):
 
 
 class ReportCreate(ReportBase):
-    pass
+    incident_details: IncidentDetailsInput
 
 
 class ReportUpdate(BaseModel):
     reporter_type: Optional[ReporterType] = None
     anonymous: Optional[bool] = None
     contact_info: Optional[ContactInfo] = None
-    incident_details: Optional[IncidentDetails] = None
+    incident_details: Optional[IncidentDetailsInput] = None
     evidence: Optional[List[ReportEvidence]] = None
     status: Optional[ReportStatus] = None
     assigned_to: Optional[str] = None
+    case_id: Optional[str] = None  # Case this report was merged into
 
 
 class ReportInDB(ReportBase):
     id: str = Field(..., alias="_id")
     assigned_to: Optional[str] = None
+    case_id: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: Optional[int] = None
 
     class Config:
         allow_population_by_field_name = True
@@ -82,3 +112,12 @@ class ReportInDB(ReportBase):
 
 class Report(ReportInDB):
     pass
+
+
+class ReportBatch(BaseModel):
+    items: List[Report]
+    missing: List[str] = []
+
+
+class NearbyReport(Report):
+    distance_m: Optional[float] = None
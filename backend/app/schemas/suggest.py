@@ -0,0 +1,13 @@
+from enum import Enum
+from pydantic import BaseModel
+
+
+class SuggestField(str, Enum):
+    PERPETRATOR = "perpetrator"
+    REGION = "region"
+    CITY = "city"
+
+
+class Suggestion(BaseModel):
+    value: str
+    count: int  # Records using this value
@@ -44,6 +44,7 @@ class RiskAssessment(BaseModel):
 
 
 class SupportService(BaseModel):
+    service_id: Optional[str] = None  # Assigned by the server; kept on updates that resend it
     type: str  # legal, medical, psychological, relocation
     provider: str
     status: str  # active, completed, pending
@@ -51,6 +52,14 @@ class SupportService(BaseModel):
     end_date: Optional[datetime] = None
 
 
+class SupportServiceUpdate(BaseModel):
+    type: Optional[str] = None
+    provider: Optional[str] = None
+    status: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+
 class VictimBase(BaseModel):
     type: IndividualType
     anonymous: bool = False
@@ -81,6 +90,7 @@ class VictimInDB(VictimBase):
     id: str = Field(..., alias="_id")
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: Optional[int] = None
 
     class Config:
         allow_population_by_field_name = True
@@ -88,3 +98,8 @@ class VictimInDB(VictimBase):
 
 class Victim(VictimInDB):
     pass
+
+
+class VictimBatch(BaseModel):
+    items: List[Victim]
+    missing: List[str] = []
@@ -0,0 +1,150 @@
+"""
+Storage backend benchmark for the repository layer.
+
+Runs the same operations the API performs (inserts, lookups by ID, batch
+fetches, filtered keyset pages, counts, per-value counts and conditional
+updates) through the repositories of each backend and prints operations
+per second side by side.
+
+MongoDB runs against a scratch database on MONGODB_URL that is dropped
+afterwards; SQLite against a temporary file.
+
+Usage (from the backend directory):
+    python benchmarks/bench_repositories.py --backends mongo sqlite --records 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core.config import settings  # noqa: E402
+from app.core.ids import new_case_id  # noqa: E402
+from app.core.storage import build_repositories  # noqa: E402
+
+COUNTRIES = ["SY", "YE", "SD", "MM", "UA", "AF", "ML", "CD"]
+STATUSES = ["new", "under_investigation", "pending_evidence", "legal_action", "resolved", "closed"]
+VIOLATIONS = [
+    "forced_displacement", "property_destruction", "arbitrary_detention", "torture",
+    "extrajudicial_killing", "enforced_disappearance", "sexual_violence", "child_recruitment",
+]
+
+
+def make_case(rng: random.Random, start: datetime) -> dict:
+    occurred = start + timedelta(days=rng.randrange(3 * 365), minutes=rng.randrange(1440))
+    now = datetime.utcnow()
+    return {
+        "case_id": new_case_id(),
+        "title": "Benchmark case",
+        "description": "x" * rng.randrange(200, 2000),
+        "violation_types": rng.sample(VIOLATIONS, rng.randint(1, 3)),
+        "status": rng.choice(STATUSES),
+        "priority": rng.choice(["low", "medium", "high", "urgent"]),
+        "location": {"country": rng.choice(COUNTRIES), "region": f"R{rng.randrange(40)}"},
+        "date_occurred": occurred,
+        "date_reported": occurred + timedelta(days=rng.randrange(30)),
+        "victims": [],
+        "perpetrators": [],
+        "evidence": [],
+        "created_by": "benchmark",
+        "created_at": now,
+        "updated_at": now,
+        "version": 1,
+    }
+
+
+def timed(label: str, operations: int, fn, results: dict):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    results[label] = operations / elapsed if elapsed else float("inf")
+
+
+def run(backend: str, records: int, lookups: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    cases = build_repositories(backend)["cases"]
+    start = datetime(2022, 1, 1)
+    documents = [make_case(rng, start) for _ in range(records)]
+    keys = [d["case_id"] for d in documents]
+    results = {}
+
+    timed("insert", records, lambda: [cases.insert(d) for d in documents], results)
+    timed("get", lookups, lambda: [cases.get(rng.choice(keys)) for _ in range(lookups)], results)
+    timed("get_many (50)", lookups // 10, lambda: [
+        cases.get_many(rng.sample(keys, 50)) for _ in range(lookups // 10)
+    ], results)
+
+    def keyset_pages():
+        for _ in range(lookups // 10):
+            query = {"status": rng.choice(STATUSES)}
+            page = cases.find(query, [("case_id", -1)], limit=50)
+            if page:
+                cases.find({**query, "case_id": {"$lt": page[-1]["case_id"]}}, [("case_id", -1)], limit=50)
+
+    timed("status pages (50)", 2 * (lookups // 10), keyset_pages, results)
+    timed("violation + country page", lookups // 10, lambda: [
+        cases.find(
+            {"violation_types": rng.choice(VIOLATIONS), "location.country": rng.choice(COUNTRIES)},
+            [("case_id", -1)], limit=50,
+        )
+        for _ in range(lookups // 10)
+    ], results)
+
+    def date_range_counts():
+        for _ in range(lookups // 10):
+            since = start + timedelta(days=rng.randrange(3 * 365))
+            cases.count({"date_occurred": {"$gte": since, "$lt": since + timedelta(days=30)}})
+
+    timed("date range count", lookups // 10, date_range_counts, results)
+    timed("count by violation", 10, lambda: [cases.count_values("violation_types", {}) for _ in range(10)], results)
+
+    def updates():
+        for key in rng.sample(keys, min(lookups, len(keys))):
+            cases.update(key, {"status": rng.choice(STATUSES), "updated_at": datetime.utcnow()}, '"v1"', "missing")
+
+    timed("conditional update", min(lookups, len(keys)), updates, results)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=["mongo", "sqlite"], default=["mongo", "sqlite"])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mongo-db", default="hrm_repository_benchmark")
+    args = parser.parse_args()
+
+    table = {}
+    for backend in args.backends:
+        if backend == "mongo":
+            from app.core.database import mongodb
+            from app.core.indexes import ensure_indexes
+
+            settings.MONGODB_DB_NAME = args.mongo_db
+            mongodb.connect_to_mongodb()
+            mongodb.client.drop_database(args.mongo_db)
+            ensure_indexes()
+            try:
+                table[backend] = run(backend, args.records, args.lookups, args.seed)
+            finally:
+                mongodb.client.drop_database(args.mongo_db)
+                mongodb.close_mongodb_connection()
+        else:
+            with tempfile.TemporaryDirectory() as directory:
+                settings.SQLITE_PATH = os.path.join(directory, "benchmark.sqlite3")
+                table[backend] = run(backend, args.records, args.lookups, args.seed)
+
+    operations = list(next(iter(table.values())))
+    print(f"{'operation':<26}" + "".join(f"{backend + ' ops/s':>16}" for backend in table))
+    for operation in operations:
+        print(f"{operation:<26}" + "".join(f"{table[backend][operation]:>16.0f}" for backend in table))
+
+
+if __name__ == "__main__":
+    main()
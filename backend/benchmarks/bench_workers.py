@@ -0,0 +1,102 @@
+"""
+Throughput scaling benchmark for the multi-worker launcher.
+
+Starts `server.py --mode prod` with an increasing number of workers, drives it
+with keep-alive HTTP clients running in separate processes, and prints the
+requests per second reached at each worker count.
+
+Usage (from the backend directory):
+    python benchmarks/bench_workers.py --workers 1 2 4 --duration 10 --path /
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for_port(host: str, port: int, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start on {host}:{port}")
+
+
+def client_loop(host: str, port: int, path: str, duration: float, results):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    done = errors = 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status < 500:
+                done += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+    results.put((done, errors))
+
+
+def run_load(host: str, port: int, path: str, clients: int, duration: float):
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=client_loop, args=(host, port, path, duration, results))
+        for _ in range(clients)
+    ]
+    for p in procs:
+        p.start()
+    totals = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return sum(t[0] for t in totals), sum(t[1] for t in totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=0, help="Client processes (default: 2 per worker)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    host = "127.0.0.1"
+    baseline = None
+    print(f"{'workers':>8} {'clients':>8} {'req/s':>10} {'errors':>8} {'scaling':>8}")
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, "server.py", "--mode", "prod", "--host", host, "--port", str(args.port),
+             "--workers", str(workers), "--max-requests", "0"],
+            cwd=BACKEND_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(host, args.port)
+            time.sleep(1.0)  # let every worker finish its startup hook
+            clients = args.clients or workers * 2
+            done, errors = run_load(host, args.port, args.path, clients, args.duration)
+            rps = done / args.duration
+            baseline = baseline or rps
+            print(f"{workers:>8} {clients:>8} {rps:>10.0f} {errors:>8} {rps / baseline:>7.2f}x")
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import argparse
 import os
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.responses import FileResponse
@@ -32,5 +33,43 @@ async def upload_file(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
+def parse_args():
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Run the Human Rights Monitor API server.")
+    parser.add_argument("--mode", choices=["dev", "prod"], default="dev",
+                        help="dev: single auto-reloading process; prod: multi-worker server")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS,
+                        help="Worker processes in prod mode (0 = number of CPU cores)")
+    parser.add_argument("--max-requests", type=int, default=settings.SERVER_MAX_REQUESTS,
+                        help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT,
+                        help="Seconds to drain in-flight requests on SIGTERM")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    uvicorn.run("server:app", host="0.0.0.0", port=8000, reload=True)
+    args = parse_args()
+    if args.mode == "dev":
+        uvicorn.run("server:app", host=args.host, port=args.port, reload=True)
+    else:
+        from app.core.config import settings
+
+        # Each worker is a fresh process that imports the app and opens its own
+        # MongoClient in the startup hook. The supervisor replaces workers that
+        # exit after --max-requests, and forwards SIGTERM so they drain first.
+        # Workers cache documents, so they watch each other's writes by default.
+        os.environ.setdefault("DOC_CACHE_CHANGE_STREAM", "true")
+        uvicorn.run(
+            "server:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers or os.cpu_count() or 1,
+            limit_max_requests=args.max_requests or None,
+            limit_max_requests_jitter=settings.SERVER_MAX_REQUESTS_JITTER if args.max_requests else 0,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            proxy_headers=True,
+            access_log=False,
+        )